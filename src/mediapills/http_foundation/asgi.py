@@ -0,0 +1,218 @@
+# Copyright (c) 2021-2021 Mediapills HttpFoundation.
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import typing as t
+from urllib.parse import quote
+
+from mediapills.http_foundation.bodies import RequestBody
+from mediapills.http_foundation.exceptions import ClientDisconnectedException
+from mediapills.http_foundation.exceptions import RequestBodyException
+from mediapills.http_foundation.headers import BaseHeaders
+from mediapills.http_foundation.headers import HEADER_CHARSET
+from mediapills.http_foundation.headers import Headers
+from mediapills.http_foundation.headers import parse_content_type
+from mediapills.http_foundation.headers import UNPREFIXED_ENVIRON_HEADERS
+from mediapills.http_foundation.multipart import MEDIA_TYPE_MULTIPART_FORM_DATA
+from mediapills.http_foundation.parameters import MultiDict
+from mediapills.http_foundation.requests import BaseRequest
+
+"""ASGI receive awaitable callable."""
+Receive = t.Callable[[], t.Awaitable[t.Dict[str, t.Any]]]
+
+
+class ASGIRequest(BaseRequest):
+    """Request built from an ASGI HTTP connection scope and receive callable.
+
+    Headers are read from the scope raw byte pairs and decoded on access, the
+    body is received only when stream() or body() is awaited.
+    """
+
+    __slots__ = ("_scope", "_receive", "_stream_consumed")
+
+    def __init__(
+        self,
+        scope: t.Dict[str, t.Any],
+        receive: Receive,
+        attributes: t.Optional[t.Dict[str, str]] = None,
+    ):
+        """Class constructor.
+
+        :param dict scope:              ASGI HTTP connection scope.
+        :param callable receive:        ASGI receive awaitable callable.
+        :param None or dict attributes: Arguments to be interpreted by the CGI script.
+        """
+        super().__init__(attributes=attributes)
+
+        self._scope = scope
+        self._receive = receive
+        self._stream_consumed = False
+
+        self._method = scope.get("method")
+
+    def reset(self) -> None:
+        """Release per-request state and the connection scope."""
+        super().reset()
+
+        self._scope = {}
+        self._receive = _closed
+        self._stream_consumed = True
+
+    @property
+    def scope(self) -> t.Dict[str, t.Any]:
+        """Property scope getter."""
+        return self._scope
+
+    async def stream(self) -> t.AsyncIterator[bytes]:
+        """Yield request body chunks as they are received from the server.
+
+        :raises RequestBodyException:        The body stream was already consumed.
+        :raises ClientDisconnectedException: The client went away mid body.
+        """
+        if self._payload is not None:
+            for data in self._payload.iter_chunks():
+                yield bytes(data)
+
+            return
+
+        if self._stream_consumed:
+            raise RequestBodyException("Request body stream was already consumed.")
+
+        self._stream_consumed = True
+        more_body = True
+
+        while more_body:
+            message = await self._receive()
+            if message["type"] == "http.disconnect":
+                raise ClientDisconnectedException("Client disconnected.")
+
+            more_body = message.get("more_body", False)
+            chunk = message.get("body", b"")
+            if chunk:
+                yield chunk
+
+    async def read_payload(self) -> RequestBody:
+        """Receive the whole request body, spilling large bodies to disk."""
+        if self._payload is None:
+            payload = RequestBody(max_memory_size=self.max_memory_size)
+
+            async for chunk in self.stream():
+                payload.write(chunk)
+
+            self._payload = payload
+
+        return self._payload
+
+    async def body(self) -> bytes:
+        """Receive and buffer the whole request body."""
+        payload = await self.read_payload()
+
+        return payload.getvalue()
+
+    async def form(self) -> t.Mapping[str, str]:
+        """Receive and parse the form body.
+
+        Multipart bodies are parsed while they are received, so file parts go
+        straight to spooled files and the raw payload is left empty.
+        """
+        if self._request is not None:
+            return self._request
+
+        content_type = self.headers.get("Content-Type", "")
+        media_type, params = parse_content_type(content_type)
+
+        if media_type != MEDIA_TYPE_MULTIPART_FORM_DATA or self._payload is not None:
+            await self.read_payload()
+            return self.request
+
+        parser = self._create_multipart_parser(params.get("boundary", ""))
+        async for chunk in self.stream():
+            parser.feed(chunk)
+
+        parser.close()
+        self._payload = RequestBody(max_memory_size=self.max_memory_size)
+        self._files = parser.files()
+        self._request = parser.fields()
+
+        return self._request
+
+    def _load_server(self) -> t.Dict[str, str]:
+        """Build CGI like server variables from the connection scope."""
+        scope = self._scope
+        query_string = scope.get("query_string", b"").decode(HEADER_CHARSET)
+        root_path, path = scope.get("root_path", ""), scope.get("path", "")
+        raw_path = scope.get("raw_path")
+        if raw_path is not None:
+            request_uri = raw_path.decode(HEADER_CHARSET)
+        else:
+            # Servers differ in whether path already includes root_path.
+            request_uri = quote(
+                path if path.startswith(root_path) else root_path + path
+            )
+
+        server = {
+            "REQUEST_METHOD": scope.get("method", ""),
+            "REQUEST_URI": request_uri + ("?" + query_string if query_string else ""),
+            "SCRIPT_NAME": root_path,
+            "PATH_INFO": path,
+            "QUERY_STRING": query_string,
+            "SERVER_PROTOCOL": "HTTP/" + scope.get("http_version", "1.1"),
+            "wsgi.url_scheme": scope.get("scheme", "http"),
+        }
+
+        if scope.get("server"):
+            server["SERVER_NAME"], server["SERVER_PORT"] = map(str, scope["server"])
+
+        if scope.get("client"):
+            server["REMOTE_ADDR"], server["REMOTE_PORT"] = map(str, scope["client"])
+
+        for raw_name, raw_value in scope.get("headers", ()):
+            key = raw_name.decode(HEADER_CHARSET).upper().replace("-", "_")
+            if key not in UNPREFIXED_ENVIRON_HEADERS:
+                key = "HTTP_" + key
+
+            value = raw_value.decode(HEADER_CHARSET)
+            if key in server:
+                value = server[key] + ("; " if key == "HTTP_COOKIE" else ", ") + value
+
+            server[key] = value
+
+        return server
+
+    def _load_headers(self) -> BaseHeaders:
+        """Wrap the scope raw header pairs, nothing is decoded up front."""
+        return Headers(self._scope.get("headers", ()))
+
+    def _load_query(self) -> t.Mapping[str, str]:
+        """Parse the scope query string."""
+        query_string = self._scope.get("query_string", b"").decode(HEADER_CHARSET)
+
+        return MultiDict.from_query_string(query_string)
+
+    def _load_payload(self) -> RequestBody:
+        """Return the received body.
+
+        :raises RequestBodyException: The body was not received yet.
+        """
+        raise RequestBodyException("Request body is not received, await body().")
+
+
+async def _closed() -> t.Dict[str, t.Any]:
+    """Receive callable of a released request, the client is gone."""
+    return {"type": "http.disconnect"}
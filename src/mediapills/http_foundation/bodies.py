@@ -0,0 +1,181 @@
+# Copyright (c) 2021-2021 Mediapills HttpFoundation.
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import mmap
+import tempfile
+import typing as t
+
+"""Body size in bytes kept in memory before spilling it to a temporary file."""
+DEFAULT_MAX_MEMORY_SIZE = 1024 * 1024
+
+"""Default chunk size in bytes used to iterate over a body."""
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+class RequestBody:
+    """Raw HTTP message body stored in memory or in a temporary file.
+
+    Small bodies are kept in a bytearray. Once the body grows above max_memory_size
+    bytes it is moved to an anonymous temporary file, so large uploads do not stay
+    resident in the worker memory.
+    """
+
+    def __init__(
+        self, data: bytes = b"", max_memory_size: int = DEFAULT_MAX_MEMORY_SIZE
+    ):
+        """Class constructor.
+
+        :param bytes data:          Initial body data.
+        :param int max_memory_size: Size in bytes to keep in memory.
+        """
+        self._max_memory_size = max_memory_size
+        self._buffer: t.Optional[bytearray] = bytearray()
+        self._file: t.Optional[t.BinaryIO] = None
+        self._mmap: t.Optional[mmap.mmap] = None
+        self._size = 0
+        self._position = 0
+
+        if data:
+            self.write(data)
+
+    def __len__(self) -> int:
+        """Return body size in bytes."""
+        return self._size
+
+    def __enter__(self) -> "RequestBody":
+        """Enter the runtime context."""
+        return self
+
+    def __exit__(self, *args: t.Any) -> None:
+        """Exit the runtime context and release the temporary file."""
+        self.close()
+
+    @property
+    def is_spooled(self) -> bool:
+        """Is body moved to a temporary file?"""
+        return self._file is not None
+
+    def write(self, data: t.Union[bytes, bytearray, memoryview]) -> int:
+        """Append data to the end of the body.
+
+        The body must not be written while a buffer from getbuffer() is alive.
+        """
+        if self._file is None and self._size + len(data) > self._max_memory_size:
+            self._rollover()
+
+        if self._file is not None:
+            self._file.seek(0, 2)
+            self._file.write(data)
+        elif self._buffer is not None:
+            self._buffer += data
+
+        self._size += len(data)
+
+        return len(data)
+
+    def read(self, size: int = -1) -> bytes:
+        """Read up to size bytes from the current position, all if negative."""
+        end = self._size if size < 0 else min(self._position + size, self._size)
+        start, self._position = self._position, max(end, self._position)
+
+        if self._file is not None:
+            self._file.seek(start)
+            return self._file.read(self._position - start)
+
+        return bytes(self._buffer[start:end]) if self._buffer else b""
+
+    def seek(self, position: int) -> int:
+        """Move read position to the given absolute offset."""
+        self._position = min(max(position, 0), self._size)
+
+        return self._position
+
+    def tell(self) -> int:
+        """Return current read position."""
+        return self._position
+
+    def iter_chunks(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> t.Iterator[bytes]:
+        """Iterate over the whole body independently of the read position.
+
+        Chunks are copies, so the body can be written to between them. Use
+        getbuffer() for zero-copy access.
+        """
+        if self._file is None:
+            for start in range(0, self._size, chunk_size):
+                end = start + chunk_size
+                # The view is released before yielding, a live export would make
+                # write() raise BufferError.
+                with memoryview(self._buffer or b"") as view:
+                    chunk = view[start:end].tobytes()
+
+                yield chunk
+
+            return
+
+        for start in range(0, self._size, chunk_size):
+            self._file.seek(start)
+            yield self._file.read(chunk_size)
+
+    def getbuffer(self) -> memoryview:
+        """Return zero-copy view over the body.
+
+        A spooled body is mapped into memory with mmap.
+        """
+        if self._file is not None:
+            if self._mmap is None or len(self._mmap) != self._size:
+                self._file.flush()
+                self._mmap = mmap.mmap(
+                    self._file.fileno(), self._size, access=mmap.ACCESS_READ
+                )
+
+            return memoryview(self._mmap)
+
+        return memoryview(self._buffer or b"")
+
+    def getvalue(self) -> bytes:
+        """Return the whole body as bytes."""
+        return bytes(self.getbuffer())
+
+    def decode(self, charset: str, errors: str = "replace") -> str:
+        """Decode the whole body using the given charset."""
+        return str(self.getbuffer(), charset, errors)
+
+    def close(self) -> None:
+        """Release the body buffer and the temporary file."""
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:  # pragma: no cover
+                pass  # exported views keep the mapping alive until collected
+
+            self._mmap = None
+
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+        self._buffer = bytearray()
+        self._size = self._position = 0
+
+    def _rollover(self) -> None:
+        """Move in-memory body to an anonymous temporary file."""
+        self._file = t.cast(t.BinaryIO, tempfile.TemporaryFile())
+        self._file.write(self._buffer or b"")
+        self._buffer = None
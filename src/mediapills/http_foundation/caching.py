@@ -0,0 +1,346 @@
+# Copyright (c) 2021-2021 Mediapills HttpFoundation.
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import collections
+import functools
+import threading
+import time
+import typing as t
+
+from mediapills.http_foundation.requests import BaseRequest
+from mediapills.http_foundation.requests import METHOD_GET
+from mediapills.http_foundation.requests import METHOD_HEAD
+from mediapills.http_foundation.responses import BaseHTTPResponse
+from mediapills.http_foundation.responses import StreamedResponse
+
+"""Total size in bytes of responses kept by a ResponseCache."""
+DEFAULT_CACHE_SIZE = 64 * 1024 * 1024
+
+"""Number of distinct Cache-Control header values kept parsed."""
+CACHE_CONTROL_CACHE_SIZE = 256
+
+"""Request methods which responses are served from the cache."""
+CACHEABLE_METHODS = frozenset([METHOD_GET, METHOD_HEAD])
+
+"""Status codes cacheable by default (RFC 7231, section 6.1)."""
+CACHEABLE_STATUS_CODES = frozenset([200, 203, 204, 300, 301, 404, 405, 410, 414, 501])
+
+CacheKey = t.Tuple[str, t.Tuple[t.Optional[str], ...]]
+Handler = t.Callable[[BaseRequest], BaseHTTPResponse]
+
+
+@functools.lru_cache(maxsize=CACHE_CONTROL_CACHE_SIZE)
+def parse_cache_control(value: str) -> t.Mapping[str, t.Optional[str]]:
+    """Return Cache-Control directives with their lowercase names.
+
+    The result is cached and shared between callers, it must not be modified.
+    """
+    directives: t.Dict[str, t.Optional[str]] = {}
+
+    for item in value.split(","):
+        name, sep, argument = item.partition("=")
+        name = name.strip().lower()
+        if name:
+            directives[name] = argument.strip().strip('"') if sep else None
+
+    return directives
+
+
+def _seconds(value: t.Optional[str]) -> t.Optional[int]:
+    """Return delta-seconds directive argument, None if missing or malformed."""
+    try:
+        return max(int(value), 0) if value is not None else None
+    except ValueError:
+        return None
+
+
+class CacheEntry:
+    """Stored response with its freshness lifetime."""
+
+    __slots__ = ("code", "headers", "body", "stored_at", "ttl", "stale_ttl", "size")
+
+    def __init__(
+        self,
+        response: BaseHTTPResponse,
+        stored_at: float,
+        ttl: int,
+        stale_ttl: int,
+    ):
+        """Class constructor.
+
+        :param BaseHTTPResponse response: Buffered response to store.
+        :param float stored_at:           Clock time of the response.
+        :param int ttl:                   Freshness lifetime in seconds.
+        :param int stale_ttl:             Seconds a stale response may still be served.
+        """
+        self.code = response.code
+        self.headers = response.headers.copy()
+        self.body = response.body
+        self.stored_at = stored_at - (_seconds(self.headers.get("Age")) or 0)
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.size = len(self.body) + len(self.headers.encode())
+
+    def age(self, now: float) -> float:
+        """Return age of the response in seconds."""
+        return now - self.stored_at
+
+    def is_fresh(self, now: float) -> bool:
+        """Can the response be served without contacting the handler?"""
+        return self.age(now) < self.ttl
+
+    def is_revalidatable(self, now: float) -> bool:
+        """Can the stale response be served while it is refreshed?"""
+        return self.age(now) < self.ttl + self.stale_ttl
+
+    def to_response(self, now: float) -> BaseHTTPResponse:
+        """Build a new response from the stored one."""
+        response = BaseHTTPResponse(code=self.code, headers=self.headers)
+        response.body = self.body
+        response.headers["Age"] = str(int(self.age(now)))
+
+        return response
+
+
+class ResponseCache:
+    """Thread-safe LRU cache of buffered responses bounded by their total size.
+
+    Responses are keyed on the request method, URI and the request headers named
+    in their Vary header. Cache-Control max-age, s-maxage, no-store, private and
+    stale-while-revalidate are honoured, HEAD requests are served from GET responses.
+    """
+
+    def __init__(
+        self,
+        max_size: int = DEFAULT_CACHE_SIZE,
+        shared: bool = True,
+        clock: t.Callable[[], float] = time.monotonic,
+    ):
+        """Class constructor.
+
+        :param int max_size:   Total size in bytes of cached responses.
+        :param bool shared:    Act as a shared cache, s-maxage and private apply.
+        :param callable clock: Monotonic clock returning seconds.
+        """
+        self._max_size = max_size
+        self._shared = shared
+        self._clock = clock
+        self._size = 0
+        self._entries: "collections.OrderedDict[CacheKey, CacheEntry]" = (
+            collections.OrderedDict()
+        )
+        self._vary: t.Dict[str, t.Tuple[str, ...]] = {}
+        self._variants: t.Dict[str, t.Set[CacheKey]] = {}
+        self._refreshing: t.Set[CacheKey] = set()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Return number of cached responses."""
+        return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        """Return total size in bytes of cached responses."""
+        return self._size
+
+    def get(self, request: BaseRequest) -> t.Optional[BaseHTTPResponse]:
+        """Return fresh cached response to the request, None on a miss."""
+        if not self._is_cacheable_request(request):
+            return None
+
+        now = self._clock()
+        entry = self._lookup(self._key(request))
+
+        return entry.to_response(now) if entry and entry.is_fresh(now) else None
+
+    def store(self, request: BaseRequest, response: BaseHTTPResponse) -> bool:
+        """Store response to the request if its Cache-Control allows it.
+
+        :return: True when the response was stored.
+        """
+        if request.method != METHOD_GET or isinstance(response, StreamedResponse):
+            return False
+
+        lifetime = self._lifetime(request, response)
+        if lifetime is None:
+            return False
+
+        vary = tuple(
+            name.strip().lower()
+            for name in ",".join(response.headers.get_all("Vary")).split(",")
+            if name.strip()
+        )
+        if "*" in vary:
+            return False
+
+        entry = CacheEntry(response, self._clock(), *lifetime)
+        if entry.size > self._max_size:
+            return False
+
+        uri = request.request_uri
+        with self._lock:
+            if self._vary.get(uri, vary) != vary:
+                self._purge(uri)
+
+            self._vary[uri] = vary
+            key = (uri, tuple(request.headers.get(name) for name in vary))
+
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= previous.size
+            else:
+                self._variants.setdefault(uri, set()).add(key)
+
+            self._entries[key] = entry
+            self._size += entry.size
+
+            while self._size > self._max_size:
+                evicted_key, evicted = self._entries.popitem(last=False)
+                self._size -= evicted.size
+                self._forget(evicted_key)
+
+        return True
+
+    def fetch(self, request: BaseRequest, handler: Handler) -> BaseHTTPResponse:
+        """Return cached response, calling the handler on a miss.
+
+        Stale responses within their stale-while-revalidate window are served
+        as is while a single background thread per key refreshes them.
+        """
+        if not self._is_cacheable_request(request):
+            return handler(request)
+
+        now = self._clock()
+        key = self._key(request)
+        entry = self._lookup(key)
+
+        if entry is not None:
+            if entry.is_fresh(now):
+                return entry.to_response(now)
+
+            if entry.is_revalidatable(now):
+                self._refresh(key, request, handler)
+                return entry.to_response(now)
+
+        response = handler(request)
+        self.store(request, response)
+
+        return response
+
+    def clear(self) -> None:
+        """Remove all cached responses."""
+        with self._lock:
+            self._entries.clear()
+            self._vary.clear()
+            self._variants.clear()
+            self._size = 0
+
+    def _is_cacheable_request(self, request: BaseRequest) -> bool:
+        """Check that the request can be answered from the cache."""
+        if request.method not in CACHEABLE_METHODS:
+            return False
+
+        directives = parse_cache_control(request.headers.get("Cache-Control", ""))
+
+        return "no-store" not in directives and "no-cache" not in directives
+
+    def _lifetime(
+        self, request: BaseRequest, response: BaseHTTPResponse
+    ) -> t.Optional[t.Tuple[int, int]]:
+        """Return freshness lifetime and stale window, None if not cacheable."""
+        headers = response.headers
+        if response.code not in CACHEABLE_STATUS_CODES or "Set-Cookie" in headers:
+            return None
+
+        directives = parse_cache_control(headers.get("Cache-Control", ""))
+        if "no-store" in directives or "no-cache" in directives:
+            return None
+
+        ttl = _seconds(directives.get("max-age"))
+        if self._shared:
+            if "private" in directives:
+                return None
+
+            s_maxage = _seconds(directives.get("s-maxage"))
+            ttl = ttl if s_maxage is None else s_maxage
+
+            if "Authorization" in request.headers and not (
+                s_maxage is not None or "public" in directives
+            ):
+                return None
+
+        if not ttl:
+            return None
+
+        return ttl, _seconds(directives.get("stale-while-revalidate")) or 0
+
+    def _key(self, request: BaseRequest) -> CacheKey:
+        """Return cache key of the request."""
+        uri = request.request_uri
+        vary = self._vary.get(uri, ())
+
+        return uri, tuple(request.headers.get(name) for name in vary)
+
+    def _lookup(self, key: CacheKey) -> t.Optional[CacheEntry]:
+        """Return cached entry, marking it as recently used."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+            return entry
+
+    def _purge(self, uri: str) -> None:
+        """Remove all variants of the URI, the lock must be held."""
+        for key in self._variants.pop(uri, ()):
+            self._size -= self._entries.pop(key).size
+
+    def _forget(self, key: CacheKey) -> None:
+        """Drop evicted key from the variants of its URI, the lock must be held."""
+        uri = key[0]
+        variants = self._variants[uri]
+        variants.discard(key)
+
+        if not variants:
+            del self._variants[uri]
+            self._vary.pop(uri, None)
+
+    def _refresh(self, key: CacheKey, request: BaseRequest, handler: Handler) -> None:
+        """Refresh the entry in a background thread unless one already does."""
+        with self._lock:
+            if key in self._refreshing:
+                return
+
+            self._refreshing.add(key)
+
+        # The live request may be reset or reused once it is answered, the
+        # thread gets its own copy of the environ and attributes.
+        copy = BaseRequest(
+            attributes=dict(request.attributes), server=dict(request.server)
+        )
+
+        def refresh() -> None:
+            try:
+                self.store(copy, handler(copy))
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, daemon=True).start()
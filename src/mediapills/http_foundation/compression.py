@@ -0,0 +1,312 @@
+# Copyright (c) 2021-2021 Mediapills HttpFoundation.
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import collections
+import threading
+import typing as t
+import zlib
+
+from mediapills.http_foundation.etags import generate_etag
+from mediapills.http_foundation.headers import parse_content_type
+from mediapills.http_foundation.negotiation import HEADER_ACCEPT_ENCODING
+from mediapills.http_foundation.negotiation import negotiate
+from mediapills.http_foundation.requests import BaseRequest
+from mediapills.http_foundation.responses import BaseHTTPResponse
+from mediapills.http_foundation.responses import HTTP_CODE_PARTIAL_CONTENT
+from mediapills.http_foundation.responses import StreamedResponse
+
+ENCODING_GZIP = "gzip"
+
+ENCODING_DEFLATE = "deflate"
+
+"""Supported content codings in order of server preference."""
+SUPPORTED_ENCODINGS = (ENCODING_GZIP, ENCODING_DEFLATE)
+
+"""Body size in bytes below which responses are sent uncompressed."""
+DEFAULT_MIN_SIZE = 1024
+
+"""zlib compression level, a balance between speed and ratio."""
+DEFAULT_COMPRESSION_LEVEL = 6
+
+"""Total size in bytes of compressed bodies kept by a CompressionCache."""
+DEFAULT_CACHE_SIZE = 32 * 1024 * 1024
+
+"""Media types and top level types that are already compressed."""
+INCOMPRESSIBLE_MEDIA_TYPES = frozenset(
+    [
+        "application/gzip",
+        "application/octet-stream",
+        "application/pdf",
+        "application/vnd.rar",
+        "application/x-7z-compressed",
+        "application/x-bzip2",
+        "application/x-gzip",
+        "application/x-xz",
+        "application/zip",
+        "application/zstd",
+        "audio",
+        "font/woff",
+        "font/woff2",
+        "image",
+        "video",
+    ]
+)
+
+"""Media types of their top level type which are still worth compressing."""
+COMPRESSIBLE_MEDIA_TYPES = frozenset(["image/svg+xml", "image/x-icon", "image/bmp"])
+
+_WBITS = {ENCODING_GZIP: 31, ENCODING_DEFLATE: 15}
+
+
+class CompressionCache:
+    """Thread-safe LRU cache of compressed bodies bounded by their total size."""
+
+    def __init__(self, max_size: int = DEFAULT_CACHE_SIZE):
+        """Class constructor.
+
+        :param int max_size: Total size in bytes of cached bodies.
+        """
+        self._max_size = max_size
+        self._size = 0
+        self._entries: "collections.OrderedDict[t.Tuple[str, str], bytes]" = (
+            collections.OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Return number of cached bodies."""
+        return len(self._entries)
+
+    def get(self, key: t.Tuple[str, str]) -> t.Optional[bytes]:
+        """Return compressed body by (entity tag, coding) key."""
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+
+            return data
+
+    def put(self, key: t.Tuple[str, str], data: bytes) -> None:
+        """Store compressed body, evicting least recently used ones."""
+        if len(data) > self._max_size:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+
+            self._entries[key] = data
+            self._size += len(data)
+
+            while self._size > self._max_size:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+
+class ResponseCompressor:
+    """Compress response bodies with the coding negotiated by Accept-Encoding.
+
+    Buffered bodies are compressed at once, streamed bodies chunk by chunk with
+    zlib.compressobj. With a cache, compressed bodies are stored by entity tag
+    (or a BLAKE2b hash of buffered bodies) and compressed only once.
+    """
+
+    def __init__(
+        self,
+        min_size: int = DEFAULT_MIN_SIZE,
+        level: int = DEFAULT_COMPRESSION_LEVEL,
+        encodings: t.Sequence[str] = SUPPORTED_ENCODINGS,
+        cache: t.Optional[CompressionCache] = None,
+    ):
+        """Class constructor.
+
+        :param int min_size:                   Smallest body size to compress.
+        :param int level:                      zlib compression level.
+        :param sequence encodings:             Codings in order of preference.
+        :param None or CompressionCache cache: Cache of compressed bodies.
+        """
+        self._min_size = min_size
+        self._level = level
+        self._encodings = tuple(e for e in encodings if e in _WBITS)
+        self._cache = cache
+
+    def compress(self, response: BaseHTTPResponse, request: BaseRequest) -> bool:
+        """Compress the response body in place.
+
+        :return: True when Content-Encoding was applied.
+        """
+        if not self._is_compressible(response):
+            return False
+
+        _add_vary(response)
+
+        # A range request is answered by prepare() from the uncompressed
+        # representation, so ranges and codings can not be mixed.
+        if "Range" in request.headers and _accepts_ranges(response):
+            return False
+
+        length = response.content_length
+        if length is not None and length < self._min_size:
+            return False
+
+        encoding = negotiate(
+            request.headers.get(HEADER_ACCEPT_ENCODING),
+            self._encodings,
+            HEADER_ACCEPT_ENCODING,
+        )
+        if encoding is None or HEADER_ACCEPT_ENCODING not in request.headers:
+            return False
+
+        etag = response.headers.get("ETag")
+
+        if isinstance(response, StreamedResponse):
+            self._compress_stream(response, encoding, etag)
+        elif self._cache is None:
+            response.body = self._compress(response.body, encoding)
+        else:
+            key = (etag or generate_etag(response.body), encoding)
+            data = self._cache.get(key)
+
+            if data is None:
+                data = self._compress(response.body, encoding)
+                self._cache.put(key, data)
+
+            response.body = data
+
+        response.headers.pop("Content-Length", None)
+        response.headers["Content-Encoding"] = encoding
+        if etag and not etag.startswith("W/"):
+            response.headers["ETag"] = "W/" + etag
+
+        return True
+
+    def _is_compressible(self, response: BaseHTTPResponse) -> bool:
+        """Check that the response is worth compressing at all."""
+        headers = response.headers
+        if (
+            not response.has_body
+            or response.code == HTTP_CODE_PARTIAL_CONTENT
+            or "Content-Encoding" in headers
+            or "no-transform" in headers.get("Cache-Control", "").lower()
+        ):
+            return False
+
+        media_type, _ = parse_content_type(headers.get("Content-Type", ""))
+        if media_type in COMPRESSIBLE_MEDIA_TYPES:
+            return True
+
+        return not (
+            media_type in INCOMPRESSIBLE_MEDIA_TYPES
+            or media_type.partition("/")[0] in INCOMPRESSIBLE_MEDIA_TYPES
+        )
+
+    def _compress(self, data: bytes, encoding: str) -> bytes:
+        """Compress whole body."""
+        compressor = self._compressobj(encoding)
+
+        return compressor.compress(data) + compressor.flush()
+
+    def _compressobj(self, encoding: str) -> "zlib._Compress":
+        """Create streaming compressor of the content coding."""
+        return zlib.compressobj(self._level, zlib.DEFLATED, _WBITS[encoding])
+
+    def _compress_stream(
+        self, response: StreamedResponse, encoding: str, etag: t.Optional[str]
+    ) -> None:
+        """Replace the body stream with its compressed version."""
+        key = (etag, encoding) if etag else None
+        cached = self._cache.get(key) if self._cache is not None and key else None
+
+        if cached is not None:
+            response.body = cached
+        elif response.is_async:
+            response.stream = self._acompress(
+                t.cast(t.AsyncIterable[bytes], response.stream), encoding, key
+            )
+        else:
+            response.stream = self._icompress(
+                t.cast(t.Iterable[bytes], response.stream), encoding, key
+            )
+
+    def _icompress(
+        self,
+        stream: t.Iterable[bytes],
+        encoding: str,
+        key: t.Optional[t.Tuple[str, str]],
+    ) -> t.Iterator[bytes]:
+        """Compress sync body stream chunk by chunk."""
+        compressor = self._compressobj(encoding)
+        collected: t.Optional[t.List[bytes]] = (
+            [] if self._cache is not None and key else None
+        )
+
+        for chunk in stream:
+            data = compressor.compress(chunk)
+            if data:
+                if collected is not None:
+                    collected.append(data)
+                yield data
+
+        data = compressor.flush()
+        yield data
+
+        if collected is not None and self._cache is not None and key is not None:
+            self._cache.put(key, b"".join(collected) + data)
+
+    async def _acompress(
+        self,
+        stream: t.AsyncIterable[bytes],
+        encoding: str,
+        key: t.Optional[t.Tuple[str, str]],
+    ) -> t.AsyncIterator[bytes]:
+        """Compress async body stream chunk by chunk."""
+        compressor = self._compressobj(encoding)
+        collected: t.Optional[t.List[bytes]] = (
+            [] if self._cache is not None and key else None
+        )
+
+        async for chunk in stream:
+            data = compressor.compress(chunk)
+            if data:
+                if collected is not None:
+                    collected.append(data)
+                yield data
+
+        data = compressor.flush()
+        yield data
+
+        if collected is not None and self._cache is not None and key is not None:
+            self._cache.put(key, b"".join(collected) + data)
+
+
+def _add_vary(response: BaseHTTPResponse) -> None:
+    """Add Accept-Encoding to the Vary header."""
+    vary = response.headers.get("Vary")
+
+    if not vary:
+        response.headers["Vary"] = HEADER_ACCEPT_ENCODING
+    elif vary.strip() != "*" and HEADER_ACCEPT_ENCODING.lower() not in vary.lower():
+        response.headers["Vary"] = vary + ", " + HEADER_ACCEPT_ENCODING
+
+
+def _accepts_ranges(response: BaseHTTPResponse) -> bool:
+    """Check that the response advertises support of range requests."""
+    return response.headers.get("Accept-Ranges", "none").strip().lower() != "none"
@@ -0,0 +1,145 @@
+# Copyright (c) 2021-2021 Mediapills HttpFoundation.
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import datetime
+import functools
+import re
+import typing as t
+from email.utils import formatdate
+
+SAMESITE_STRICT = "Strict"
+
+SAMESITE_LAX = "Lax"
+
+SAMESITE_NONE = "None"
+
+"""Allowed SameSite cookie attribute values."""
+SAMESITE_VALUES = frozenset([SAMESITE_STRICT, SAMESITE_LAX, SAMESITE_NONE])
+
+"""Number of distinct cookie attribute suffixes kept in the LRU cache."""
+ATTRIBUTES_CACHE_SIZE = 256
+
+_TOKEN = re.compile(r"^[!#$%&'*+\-.^_`|~0-9A-Za-z]+$")
+
+_COOKIE_VALUE = re.compile(r"^[\x21\x23-\x2B\x2D-\x3A\x3C-\x5B\x5D-\x7E]*$")
+
+_ATTRIBUTE_VALUE = re.compile(r"^[^\x00-\x1F\x7F;]*$")
+
+
+def parse_cookie_header(header: str) -> t.Dict[str, str]:
+    """Parse Cookie request header into a name to value dictionary.
+
+    The header is split on separators only, without the http.cookies regex
+    machinery. Quotes around values are dropped and the first occurrence of a
+    name wins, as user agents send cookies with more specific paths first.
+    """
+    cookies: t.Dict[str, str] = {}
+
+    for pair in header.split(";"):
+        name, sep, value = pair.partition("=")
+        name = name.strip()
+        if not sep or not name or name in cookies:
+            continue
+
+        value = value.strip()
+        if len(value) > 1 and value[0] == value[-1] == '"':
+            value = value[1:-1]
+
+        cookies[name] = value
+
+    return cookies
+
+
+@functools.lru_cache(maxsize=ATTRIBUTES_CACHE_SIZE)
+def cookie_attributes(
+    path: t.Optional[str] = "/",
+    domain: t.Optional[str] = None,
+    secure: bool = False,
+    httponly: bool = False,
+    samesite: t.Optional[str] = None,
+) -> str:
+    """Return Set-Cookie attribute suffix, cached for repeatedly set cookies.
+
+    :raises ValueError: Attribute value is not valid.
+    """
+    attributes = []
+
+    for name, value in (("Path", path), ("Domain", domain)):
+        if value is None:
+            continue
+
+        if not _ATTRIBUTE_VALUE.match(value):
+            raise ValueError("Invalid cookie %s attribute: %r" % (name, value))
+
+        attributes.append("; %s=%s" % (name, value))
+
+    if samesite is not None:
+        samesite = samesite.capitalize()
+        if samesite not in SAMESITE_VALUES:
+            raise ValueError("Invalid cookie SameSite attribute: %r" % samesite)
+
+        secure = secure or samesite == SAMESITE_NONE
+        attributes.append("; SameSite=" + samesite)
+
+    if secure:
+        attributes.append("; Secure")
+
+    if httponly:
+        attributes.append("; HttpOnly")
+
+    return "".join(attributes)
+
+
+def build_set_cookie(
+    name: str,
+    value: str = "",
+    max_age: t.Optional[int] = None,
+    expires: t.Optional[t.Union[int, float, datetime.datetime]] = None,
+    path: t.Optional[str] = "/",
+    domain: t.Optional[str] = None,
+    secure: bool = False,
+    httponly: bool = False,
+    samesite: t.Optional[str] = None,
+) -> str:
+    """Build Set-Cookie response header value.
+
+    Only the name, value and expiry are formatted per call, the remaining
+    attributes come from the cookie_attributes() cache.
+
+    :raises ValueError: Name, value or an attribute is not valid.
+    """
+    if not _TOKEN.match(name):
+        raise ValueError("Invalid cookie name: %r" % name)
+
+    if not _COOKIE_VALUE.match(value):
+        raise ValueError("Invalid cookie value: %r" % value)
+
+    header = name + "=" + value
+
+    if expires is not None:
+        if isinstance(expires, datetime.datetime):
+            expires = expires.timestamp()
+
+        header += "; Expires=" + formatdate(expires, usegmt=True)
+
+    if max_age is not None:
+        header += "; Max-Age=%d" % max_age
+
+    return header + cookie_attributes(path, domain, secure, httponly, samesite)
@@ -0,0 +1,89 @@
+# Copyright (c) 2021-2021 Mediapills HttpFoundation.
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import hashlib
+import re
+import typing as t
+
+"""Size in bytes of the generated entity tag digest."""
+ETAG_DIGEST_SIZE = 16
+
+_ETAG = re.compile(r'(W/)?"[\x21\x23-\x7E\x80-\xFF]*"')
+
+
+class ETagHasher:
+    """Entity tag generator hashing a body with BLAKE2b chunk by chunk."""
+
+    def __init__(self, weak: bool = False):
+        """Class constructor.
+
+        :param bool weak: Generate weak entity tag.
+        """
+        self._hash = hashlib.blake2b(digest_size=ETAG_DIGEST_SIZE)
+        self._weak = weak
+
+    def update(self, chunk: bytes) -> None:
+        """Hash next body chunk."""
+        self._hash.update(chunk)
+
+    @property
+    def etag(self) -> str:
+        """Return quoted entity tag of the data hashed so far."""
+        return ("W/" if self._weak else "") + '"%s"' % self._hash.hexdigest()
+
+    def wrap(self, stream: t.Iterable[bytes]) -> t.Iterator[bytes]:
+        """Yield stream chunks unchanged, hashing them on the way."""
+        for chunk in stream:
+            self._hash.update(chunk)
+            yield chunk
+
+    async def awrap(self, stream: t.AsyncIterable[bytes]) -> t.AsyncIterator[bytes]:
+        """Yield async stream chunks unchanged, hashing them on the way."""
+        async for chunk in stream:
+            self._hash.update(chunk)
+            yield chunk
+
+
+def generate_etag(data: bytes, weak: bool = False) -> str:
+    """Return quoted entity tag of the data."""
+    hasher = ETagHasher(weak)
+    hasher.update(data)
+
+    return hasher.etag
+
+
+def parse_etags(header: str) -> t.List[str]:
+    """Return entity tags listed in If-Match or If-None-Match header."""
+    return [match.group(0) for match in _ETAG.finditer(header)]
+
+
+def strong_match(etag: str, other: str) -> bool:
+    """Check that both entity tags are strong and equal."""
+    return etag == other and not etag.startswith("W/")
+
+
+def weak_match(etag: str, other: str) -> bool:
+    """Check that entity tags are equal ignoring the weakness indicator."""
+    return _opaque_tag(etag) == _opaque_tag(other)
+
+
+def _opaque_tag(etag: str) -> str:
+    """Return entity tag without the weakness indicator."""
+    return etag[2:] if etag.startswith("W/") else etag
@@ -0,0 +1,274 @@
+# Copyright (c) 2021-2021 Mediapills HttpFoundation.
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import asyncio
+import functools
+import re
+import typing as t
+
+from mediapills.http_foundation.responses import HTTP_CODE_OK
+from mediapills.http_foundation.responses import StreamedResponse
+
+"""Media type of Server-Sent Events streams."""
+MEDIA_TYPE_EVENT_STREAM = "text/event-stream"
+
+"""Seconds without events after which a heartbeat comment is sent."""
+DEFAULT_HEARTBEAT_INTERVAL = 15.0
+
+"""Number of events an EventChannel holds before senders wait."""
+DEFAULT_CHANNEL_SIZE = 64
+
+"""Number of distinct event type lines kept encoded."""
+EVENT_TYPE_CACHE_SIZE = 256
+
+"""Comment line keeping idle connections and proxies alive."""
+HEARTBEAT = b":\n\n"
+
+_LINE_BREAK = re.compile(r"\r\n|\r|\n")
+_CLOSED = object()
+
+
+@functools.lru_cache(maxsize=EVENT_TYPE_CACHE_SIZE)
+def _event_line(event: str) -> bytes:
+    """Return encoded event field line."""
+    if _LINE_BREAK.search(event):
+        raise ValueError("Event type must not contain line breaks.")
+
+    return b"event: " + event.encode("utf-8") + b"\n"
+
+
+def encode_event(
+    data: str,
+    event: t.Optional[str] = None,
+    id: t.Optional[str] = None,
+    retry: t.Optional[int] = None,
+) -> bytes:
+    """Return event in the text/event-stream wire format.
+
+    :param str data:           Event data, line breaks become separate data lines.
+    :param None or str event:  Event type.
+    :param None or str id:     Last event ID.
+    :param None or int retry:  Reconnection time in milliseconds.
+    """
+    parts = [_event_line(event)] if event is not None else []
+
+    if id is not None:
+        if _LINE_BREAK.search(id) or "\0" in id:
+            raise ValueError("Event ID must not contain line breaks or NULL.")
+
+        parts.append(b"id: " + id.encode("utf-8") + b"\n")
+
+    if retry is not None:
+        parts.append(b"retry: %d\n" % retry)
+
+    for line in _LINE_BREAK.split(data):
+        parts.append(b"data: " + line.encode("utf-8") + b"\n")
+
+    parts.append(b"\n")
+
+    return b"".join(parts)
+
+
+class ServerSentEvent:
+    """Event encoded once, however many streams it is sent to."""
+
+    __slots__ = ("data", "event", "id", "retry", "_encoded")
+
+    def __init__(
+        self,
+        data: str,
+        event: t.Optional[str] = None,
+        id: t.Optional[str] = None,
+        retry: t.Optional[int] = None,
+    ):
+        """Class constructor.
+
+        :param str data:           Event data.
+        :param None or str event:  Event type.
+        :param None or str id:     Last event ID.
+        :param None or int retry:  Reconnection time in milliseconds.
+        """
+        self.data = data
+        self.event = event
+        self.id = id
+        self.retry = retry
+        self._encoded: t.Optional[bytes] = None
+
+    def encode(self) -> bytes:
+        """Return the event in the text/event-stream wire format."""
+        if self._encoded is None:
+            self._encoded = encode_event(self.data, self.event, self.id, self.retry)
+
+        return self._encoded
+
+
+"""Event object, data string or already encoded event bytes."""
+Event = t.Union[ServerSentEvent, str, bytes]
+
+
+class EventChannel:
+    """Bounded async queue of events for a single stream.
+
+    send() waits while the channel is full, so a producer never gets ahead of
+    a slow client by more than maxsize events. Broadcasters that can not wait
+    use send_nowait() and drop the event or the client when it returns False.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_CHANNEL_SIZE):
+        """Class constructor.
+
+        :param int maxsize: Number of events held before senders wait.
+        """
+        self._queue: "asyncio.Queue[t.Any]" = asyncio.Queue(maxsize)
+        self._closed = False
+
+    @property
+    def closed(self) -> bool:
+        """Is the channel closed for sending?"""
+        return self._closed
+
+    async def send(self, event: Event) -> None:
+        """Queue event, waiting for room."""
+        if not self._closed:
+            await self._queue.put(event)
+
+    def send_nowait(self, event: Event) -> bool:
+        """Queue event if there is room.
+
+        :return: False when the channel is full or closed.
+        """
+        if self._closed or self._queue.full():
+            return False
+
+        self._queue.put_nowait(event)
+
+        return True
+
+    def close(self) -> None:
+        """End the stream once queued events are sent."""
+        if self._closed:
+            return
+
+        self._closed = True
+        # A full queue is drained by the reader before it waits again, it then
+        # finds the channel closed without the end marker.
+        if not self._queue.full():
+            self._queue.put_nowait(_CLOSED)
+
+    def __aiter__(self) -> "EventChannel":
+        """Return async iterator over queued events."""
+        return self
+
+    async def __anext__(self) -> Event:
+        """Return next queued event."""
+        if self._closed and self._queue.empty():
+            raise StopAsyncIteration
+
+        event = await self._queue.get()
+        if event is _CLOSED:
+            raise StopAsyncIteration
+
+        return t.cast(Event, event)
+
+
+class EventStreamResponse(StreamedResponse):
+    """Server-Sent Events response streaming events of an async iterable.
+
+    Events are pulled from the iterable only when the server asks for the next
+    body chunk, so a slow client stops the producer instead of growing a buffer.
+    A heartbeat comment is sent when no event arrives for heartbeat_interval.
+    """
+
+    __slots__ = ()
+
+    def __init__(
+        self,
+        events: t.AsyncIterable[Event],
+        code: int = HTTP_CODE_OK,
+        headers: t.Optional[t.Mapping[str, str]] = None,
+        heartbeat_interval: t.Optional[float] = DEFAULT_HEARTBEAT_INTERVAL,
+        retry: t.Optional[int] = None,
+    ):
+        """Class constructor.
+
+        :param async iterable events:            Events to send.
+        :param int code:                         Response status code.
+        :param None or dict headers:             Response headers.
+        :param None or float heartbeat_interval: Idle seconds before a heartbeat.
+        :param None or int retry:                Client reconnection time in ms.
+        """
+        super().__init__(_stream(events, heartbeat_interval, retry), code, headers)
+
+        self.headers["Content-Type"] = MEDIA_TYPE_EVENT_STREAM
+        if "Cache-Control" not in self.headers:
+            self.headers["Cache-Control"] = "no-cache"
+
+        # Stops nginx from buffering the stream.
+        self.headers["X-Accel-Buffering"] = "no"
+
+
+def _encode(event: Event) -> bytes:
+    """Return event in the wire format."""
+    if isinstance(event, ServerSentEvent):
+        return event.encode()
+
+    if isinstance(event, str):
+        return encode_event(event)
+
+    return event
+
+
+async def _stream(
+    events: t.AsyncIterable[Event],
+    heartbeat_interval: t.Optional[float],
+    retry: t.Optional[int],
+) -> t.AsyncIterator[bytes]:
+    """Encode events, sending heartbeats while the iterable is idle."""
+    if retry is not None:
+        yield b"retry: %d\n\n" % retry
+
+    if heartbeat_interval is None:
+        async for event in events:
+            yield _encode(event)
+        return
+
+    iterator = events.__aiter__()
+    pending: t.Optional["asyncio.Future[Event]"] = None
+
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(iterator.__anext__())
+
+            done, _ = await asyncio.wait([pending], timeout=heartbeat_interval)
+            if not done:
+                yield HEARTBEAT
+                continue
+
+            future, pending = pending, None
+            try:
+                event = future.result()
+            except StopAsyncIteration:
+                return
+
+            yield _encode(event)
+    finally:
+        if pending is not None:
+            pending.cancel()
@@ -37,3 +37,35 @@ class ResponseException(BaseHTTPFoundationException):  # dead: disable
     """Base response exception"""
 
     pass
+
+
+class ClientDisconnectedException(RequestException):  # dead: disable
+    """Client closed the connection before the request body was received"""
+
+    pass
+
+
+class RequestBodyException(RequestException):  # dead: disable
+    """Request body is not available in the requested form"""
+
+    pass
+
+
+class MultipartException(RequestException):  # dead: disable
+    """Multipart body is malformed or exceeds configured limits"""
+
+    pass
+
+
+class ProtocolException(RequestException):  # dead: disable
+    """Request message is malformed or exceeds configured limits"""
+
+    def __init__(self, message: str, code: int = 400):
+        """Class constructor.
+
+        :param str message: Error description.
+        :param int code:    Status code of the error response.
+        """
+        super().__init__(message)
+
+        self.code = code
@@ -0,0 +1,249 @@
+# Copyright (c) 2021-2021 Mediapills HttpFoundation.
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import mmap
+import mimetypes
+import os
+import socket
+import typing as t
+from email.utils import formatdate
+
+from mediapills.http_foundation.bodies import DEFAULT_CHUNK_SIZE
+from mediapills.http_foundation.etags import strong_match
+from mediapills.http_foundation.requests import BaseRequest
+from mediapills.http_foundation.responses import HTTP_CODE_OK
+from mediapills.http_foundation.responses import HTTP_CODE_PARTIAL_CONTENT
+from mediapills.http_foundation.responses import (
+    HTTP_CODE_REQUESTED_RANGE_NOT_SATISFIABLE,
+)
+from mediapills.http_foundation.responses import StreamedResponse
+
+"""Media type sent when it can not be guessed from the file name."""
+DEFAULT_CONTENT_TYPE = "application/octet-stream"
+
+"""Path of a file or an open file descriptor."""
+FileReference = t.Union[str, "os.PathLike[str]", int]
+
+
+"""Result of parse_range for a range which does not overlap the file."""
+RANGE_NOT_SATISFIABLE = (0, 0)
+
+
+def parse_range(value: str, size: int) -> t.Optional[t.Tuple[int, int]]:
+    """Parse a single byte range of the Range header into (offset, count).
+
+    Return None for a header that has to be ignored: an unknown unit, multiple
+    ranges or a malformed range. Return RANGE_NOT_SATISFIABLE for a range that
+    does not overlap a file of the given size.
+    """
+    unit, _, spec = value.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+
+    first, sep, last = spec.strip().partition("-")
+    if not sep or not (first + last).isdigit():
+        return None
+
+    if not first:
+        count = min(int(last), size)
+        return (size - count, count) if count else RANGE_NOT_SATISFIABLE
+
+    start = int(first)
+    if last and int(last) < start:
+        return None
+
+    end = min(int(last), size - 1) if last else size - 1
+    if start > end:
+        return RANGE_NOT_SATISFIABLE
+
+    return start, end - start + 1
+
+
+class FileResponse(StreamedResponse):
+    """Response which body is a file on disk.
+
+    The file is sent with os.sendfile when the server exposes a socket, otherwise
+    it is streamed as bytes chunks copied from a read-only memory map. A single range
+    of Range request header is honored with 206 and 416 responses.
+    """
+
+    __slots__ = (
+        "_owns_fd",
+        "_fd",
+        "_size",
+        "_offset",
+        "_count",
+        "_chunk_size",
+        "_file_stream",
+    )
+
+    def __init__(
+        self,
+        file: FileReference,
+        code: int = HTTP_CODE_OK,
+        headers: t.Optional[t.Mapping[str, str]] = None,
+        content_type: t.Optional[str] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ):
+        """Class constructor.
+
+        A file descriptor passed in is not closed by the response.
+
+        :param str or int file:          Path of the file or an open file descriptor.
+        :param int code:                 Response status code.
+        :param None or dict headers:     Response headers.
+        :param None or str content_type: Media type, guessed from path if missing.
+        :param int chunk_size:           Size in bytes of streamed chunks.
+        """
+        self._owns_fd = not isinstance(file, int)
+        if isinstance(file, int):
+            self._fd = file
+        else:
+            self._fd = os.open(file, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+
+        stat = os.fstat(self._fd)
+        self._size = stat.st_size
+        self._offset = 0
+        self._count = self._size
+        self._chunk_size = chunk_size
+
+        self._file_stream = self._iter_file()
+        super().__init__(self._file_stream, code, headers, content_length=self._size)
+
+        if content_type is None and not isinstance(file, int):
+            content_type = mimetypes.guess_type(os.fspath(file))[0]
+
+        self.headers.setdefault("Content-Type", content_type or DEFAULT_CONTENT_TYPE)
+        self.headers.setdefault("Last-Modified", formatdate(stat.st_mtime, usegmt=True))
+        self.headers.setdefault("Accept-Ranges", "bytes")
+
+    @property
+    def fileno(self) -> int:
+        """Return file descriptor of the sent file."""
+        return self._fd
+
+    @property
+    def offset(self) -> int:
+        """Return offset of the first sent byte."""
+        return self._offset
+
+    @property
+    def sends_file(self) -> bool:
+        """Is the body still the file, not a stream that replaced it?"""
+        return self._stream is self._file_stream
+
+    def prepare(self, request: t.Optional[BaseRequest] = None) -> None:
+        """Apply request Range and If-Range headers and set framing headers."""
+        value = request.headers.get("Range") if request is not None else None
+        if_range = request.headers.get("If-Range") if request is not None else None
+
+        byte_range = None
+        if value and self.code == HTTP_CODE_OK and self._is_range_fresh(if_range):
+            byte_range = parse_range(value, self._size)
+
+        if byte_range is not None:
+            if byte_range == RANGE_NOT_SATISFIABLE:
+                self.code = HTTP_CODE_REQUESTED_RANGE_NOT_SATISFIABLE
+                self.headers["Content-Range"] = "bytes */%d" % self._size
+                self._offset, self._count = 0, 0
+            else:
+                self.code = HTTP_CODE_PARTIAL_CONTENT
+                self._offset, self._count = byte_range
+                self.headers["Content-Range"] = "bytes %d-%d/%d" % (
+                    self._offset,
+                    self._offset + self._count - 1,
+                    self._size,
+                )
+
+            self._content_length = self._count
+
+        super().prepare(request)
+
+    def sendfile(self, sock: socket.socket) -> int:
+        """Send the body to a blocking socket and return number of bytes sent.
+
+        Falls back to socket.sendall when os.sendfile is not available.
+        """
+        count = self._count
+        if not hasattr(os, "sendfile"):
+            for chunk in self.iter_body():
+                sock.sendall(chunk)
+
+            return count
+
+        sent = 0
+        while sent < count:
+            size = os.sendfile(
+                sock.fileno(), self._fd, self._offset + sent, count - sent
+            )
+            if not size:
+                break
+
+            sent += size
+
+        return sent
+
+    def close(self) -> None:
+        """Close the file descriptor opened by the response."""
+        if self._owns_fd and self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def reset(self) -> None:
+        """Close the file and release the body stream."""
+        self.close()
+        super().reset()
+
+    def _is_range_fresh(self, if_range: t.Optional[str]) -> bool:
+        """Check that If-Range validator matches the current representation."""
+        if not if_range:
+            return True
+
+        if if_range.startswith(('"', "W/")):
+            return strong_match(if_range, self.headers.get("ETag", ""))
+
+        return if_range == self.headers.get("Last-Modified")
+
+    def _iter_file(self) -> t.Iterator[bytes]:
+        """Iterate over the selected part of the file.
+
+        The part is read from offset and count rather than content length, which
+        is unknown once the stream is wrapped, e.g. by compression.
+        """
+        end = self._offset + self._count
+        if end <= self._offset:
+            return
+
+        try:
+            mapping = mmap.mmap(self._fd, 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            yield from self._read_file(end)
+            return
+
+        with mapping:
+            for start in range(self._offset, end, self._chunk_size):
+                stop = min(start + self._chunk_size, end)
+                yield mapping[start:stop]
+
+    def _read_file(self, end: int) -> t.Iterator[bytes]:
+        """Iterate over the selected part of a file that can not be mapped."""
+        for start in range(self._offset, end, self._chunk_size):
+            os.lseek(self._fd, start, os.SEEK_SET)
+            yield os.read(self._fd, min(self._chunk_size, end - start))
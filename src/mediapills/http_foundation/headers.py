@@ -0,0 +1,311 @@
+# Copyright (c) 2021-2021 Mediapills HttpFoundation.
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import abc
+import re
+import typing as t
+from urllib.parse import unquote
+
+"""Charset of HTTP header field names and values."""
+HEADER_CHARSET = "latin-1"
+
+"""Header name or value given as text or as raw bytes."""
+HeaderField = t.Union[str, bytes]
+
+"""Environ variables that carry headers without the HTTP_ prefix."""
+UNPREFIXED_ENVIRON_HEADERS = frozenset(["CONTENT_TYPE", "CONTENT_LENGTH"])
+
+"""Header names which encoded form is cached."""
+COMMON_HEADER_NAMES = (
+    "Accept-Ranges",
+    "Age",
+    "Allow",
+    "Cache-Control",
+    "Connection",
+    "Content-Encoding",
+    "Content-Language",
+    "Content-Length",
+    "Content-Range",
+    "Content-Type",
+    "Date",
+    "ETag",
+    "Expires",
+    "Keep-Alive",
+    "Last-Modified",
+    "Location",
+    "Server",
+    "Set-Cookie",
+    "Transfer-Encoding",
+    "Vary",
+)
+
+_ENCODED_NAMES = {name: name.encode(HEADER_CHARSET) for name in COMMON_HEADER_NAMES}
+
+_PARAMETER = re.compile(r';\s*([^\s;=]+)\s*=\s*("(?:[^"\\]|\\.)*"|[^;]*)')
+_QUOTED_PAIR = re.compile(r'\\([\\"])')
+
+
+def _encode(field: HeaderField) -> bytes:
+    """Encode header field, rejecting line breaks that would split the header."""
+    raw = field.encode(HEADER_CHARSET) if isinstance(field, str) else field
+    if b"\r" in raw or b"\n" in raw:
+        raise ValueError("Header field contains line break: %r" % raw)
+
+    return raw
+
+
+def parse_content_type(value: str) -> t.Tuple[str, t.Dict[str, str]]:
+    """Split Content-Type like header value into lowercase media type and parameters.
+
+    Quoted values may hold semicolons and escaped quotes. RFC 5987 extended values
+    such as filename*=UTF-8''a%C3%A9.txt are decoded and take precedence over the
+    plain parameter of the same name.
+    """
+    media_type, sep, rest = value.partition(";")
+    params: t.Dict[str, str] = {}
+    extended: t.Dict[str, str] = {}
+
+    for match in _PARAMETER.finditer(sep + rest):
+        key, val = match.group(1).lower(), match.group(2).strip()
+        if val.startswith('"') and val.endswith('"') and len(val) > 1:
+            val = _QUOTED_PAIR.sub(r"\1", val[1:-1])
+        else:
+            val = val.strip('"')
+
+        if key.endswith("*"):
+            extended[key[:-1]] = _decode_extended_value(val)
+        else:
+            params[key] = val
+
+    params.update(extended)
+
+    return media_type.strip().lower(), params
+
+
+def _decode_extended_value(value: str) -> str:
+    """Decode charset'language'percent-encoded parameter value of RFC 5987."""
+    charset, _, rest = value.partition("'")
+    _, _, encoded = rest.partition("'")
+
+    try:
+        return unquote(encoded, encoding=charset or "utf-8", errors="replace")
+    except LookupError:
+        return unquote(encoded, encoding=HEADER_CHARSET)
+
+
+class BaseHeaders(t.Mapping[str, str], metaclass=abc.ABCMeta):
+    """Case-insensitive read access to HTTP message headers."""
+
+    __slots__ = ()
+
+    @abc.abstractmethod
+    def get_all(self, name: str) -> t.List[str]:
+        """Return all values of the header, in order of appearance."""
+        raise NotImplementedError()
+
+
+class Headers(BaseHeaders, t.MutableMapping[str, str]):
+    """Case-insensitive multi-value HTTP headers stored as raw bytes.
+
+    Fields are kept as (name, value) byte pairs in the order they were added, so
+    repeated fields such as Set-Cookie survive. The lowercase name index is built
+    on the first keyed lookup and values are decoded only when they are read.
+    """
+
+    __slots__ = ("_items", "_index")
+
+    def __init__(
+        self,
+        headers: t.Optional[
+            t.Union[t.Mapping[str, str], t.Iterable[t.Tuple[HeaderField, HeaderField]]]
+        ] = None,
+    ):
+        """Class constructor.
+
+        :param None or dict or iterable headers: Mapping or (name, value) pairs.
+        """
+        self._items: t.List[t.Tuple[bytes, bytes]] = []
+        self._index: t.Optional[t.Dict[str, t.List[int]]] = None
+
+        if isinstance(headers, Headers):
+            self._items = list(headers._items)
+        elif isinstance(headers, t.Mapping):
+            self._items = [(_encode(k), _encode(v)) for k, v in headers.items()]
+        elif headers is not None:
+            self._items = [(_encode(k), _encode(v)) for k, v in headers]
+
+    def __getitem__(self, name: str) -> str:
+        """Return first value of the header."""
+        positions = self._lookup(name)
+        if not positions:
+            raise KeyError(name)
+
+        return self._items[positions[0]][1].decode(HEADER_CHARSET)
+
+    def __setitem__(self, name: str, value: str) -> None:
+        """Replace all values of the header with the given one."""
+        positions = self._lookup(name)
+        pair = (_ENCODED_NAMES.get(name) or _encode(name), _encode(value))
+
+        if len(positions) == 1:
+            self._items[positions[0]] = pair
+            return
+
+        if positions:
+            self._remove(positions)
+
+        self.add(*pair)
+
+    def __delitem__(self, name: str) -> None:
+        """Remove all values of the header."""
+        positions = self._lookup(name)
+        if not positions:
+            raise KeyError(name)
+
+        self._remove(positions)
+
+    def __contains__(self, name: object) -> bool:
+        """Check that the header is present."""
+        return isinstance(name, str) and bool(self._lookup(name))
+
+    def __iter__(self) -> t.Iterator[str]:
+        """Iterate over distinct header names as first added."""
+        seen = set()
+
+        for raw_name, _ in self._items:
+            name = raw_name.decode(HEADER_CHARSET)
+            if name.lower() not in seen:
+                seen.add(name.lower())
+                yield name
+
+    def __len__(self) -> int:
+        """Return number of distinct header names."""
+        return len(self._index if self._index is not None else set(self))
+
+    def __repr__(self) -> str:
+        """Return header pairs representation."""
+        return "%s(%r)" % (type(self).__name__, self.multi_items())
+
+    def add(self, name: HeaderField, value: HeaderField) -> None:
+        """Append a header value, keeping the existing ones."""
+        position = len(self._items)
+        raw_name = _ENCODED_NAMES.get(name) if isinstance(name, str) else name
+        self._items.append((raw_name or _encode(name), _encode(value)))
+
+        if self._index is not None:
+            key = self._items[-1][0].decode(HEADER_CHARSET).lower()
+            self._index.setdefault(key, []).append(position)
+
+    def get_all(self, name: str) -> t.List[str]:
+        """Return all values of the header, in order of appearance."""
+        return [self._items[i][1].decode(HEADER_CHARSET) for i in self._lookup(name)]
+
+    def multi_items(self) -> t.List[t.Tuple[str, str]]:
+        """Return all decoded (name, value) pairs, repeated fields included."""
+        return [
+            (name.decode(HEADER_CHARSET), value.decode(HEADER_CHARSET))
+            for name, value in self._items
+        ]
+
+    def raw(self) -> t.List[t.Tuple[bytes, bytes]]:
+        """Return the underlying (name, value) byte pairs in order of appearance."""
+        return self._items
+
+    def encode(self) -> bytes:
+        """Return header block terminated with an empty line, ready for the wire."""
+        return b"".join([b"%s: %s\r\n" % pair for pair in self._items]) + b"\r\n"
+
+    def copy(self) -> "Headers":
+        """Return shallow copy of the headers."""
+        return Headers(self)
+
+    def clear(self) -> None:
+        """Remove all headers."""
+        self._items = []
+        self._index = None
+
+    def _lookup(self, name: str) -> t.List[int]:
+        """Return positions of the header values, building the index on demand."""
+        if self._index is None:
+            index: t.Dict[str, t.List[int]] = {}
+
+            for position, (raw_name, _) in enumerate(self._items):
+                key = raw_name.decode(HEADER_CHARSET).lower()
+                index.setdefault(key, []).append(position)
+
+            self._index = index
+
+        return self._index.get(name.lower(), [])
+
+    def _remove(self, positions: t.List[int]) -> None:
+        """Remove header values at the given positions."""
+        dropped = set(positions)
+        self._items = [p for i, p in enumerate(self._items) if i not in dropped]
+        self._index = None
+
+
+class EnvironHeaders(BaseHeaders):
+    """Read-only headers view over CGI or WSGI environ variables.
+
+    Lookups translate the header name to the environ key, so nothing is copied
+    or converted when the view is created.
+    """
+
+    __slots__ = ("_environ",)
+
+    def __init__(self, environ: t.Mapping[str, t.Any]):
+        """Class constructor.
+
+        :param dict environ: CGI or WSGI environment variables.
+        """
+        self._environ = environ
+
+    def __getitem__(self, name: str) -> str:
+        """Return value of the header."""
+        return t.cast(str, self._environ[self._key(name)])
+
+    def __contains__(self, name: object) -> bool:
+        """Check that the header is present."""
+        return isinstance(name, str) and self._key(name) in self._environ
+
+    def __iter__(self) -> t.Iterator[str]:
+        """Iterate over header names present in the environ."""
+        for key in self._environ:
+            if key.startswith("HTTP_"):
+                yield key[5:].replace("_", "-").title()
+            elif key in UNPREFIXED_ENVIRON_HEADERS:
+                yield key.replace("_", "-").title()
+
+    def __len__(self) -> int:
+        """Return number of headers present in the environ."""
+        return sum(1 for _ in self)
+
+    def get_all(self, name: str) -> t.List[str]:
+        """Return header value as a single item list, environ joins repeated ones."""
+        value = self._environ.get(self._key(name))
+
+        return [value] if value is not None else []
+
+    @staticmethod
+    def _key(name: str) -> str:
+        """Translate header name to environ variable name."""
+        key = name.upper().replace("-", "_")
+
+        return key if key in UNPREFIXED_ENVIRON_HEADERS else "HTTP_" + key
@@ -0,0 +1,204 @@
+# Copyright (c) 2021-2021 Mediapills HttpFoundation.
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import json
+import typing as t
+
+from mediapills.http_foundation.bodies import DEFAULT_CHUNK_SIZE
+from mediapills.http_foundation.responses import BaseHTTPResponse
+from mediapills.http_foundation.responses import HTTP_CODE_OK
+from mediapills.http_foundation.responses import StreamedResponse
+
+"""Media type of JSON documents."""
+MEDIA_TYPE_JSON = "application/json"
+
+"""Media type of newline delimited JSON documents."""
+MEDIA_TYPE_NDJSON = "application/x-ndjson"
+
+"""Function serializing an object to UTF-8 encoded JSON."""
+Encoder = t.Callable[[t.Any], bytes]
+
+
+def _json_dumps(obj: t.Any) -> bytes:
+    """Serialize object with the standard library json module."""
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _load_encoder() -> Encoder:
+    """Return the fastest installed JSON encoder: orjson, ujson or json."""
+    try:
+        import orjson
+
+        return t.cast(Encoder, orjson.dumps)
+    except ImportError:
+        pass
+
+    try:
+        import ujson
+
+        def ujson_dumps(obj: t.Any) -> bytes:
+            """Serialize object with ujson."""
+            return t.cast(bytes, ujson.dumps(obj, ensure_ascii=False).encode("utf-8"))
+
+        return ujson_dumps
+    except ImportError:
+        pass
+
+    return _json_dumps
+
+
+"""Default encoder, picked once at import time."""
+dumps = _load_encoder()
+
+
+class JSONResponse(BaseHTTPResponse):
+    """Response which body is an object serialized to JSON.
+
+    The encoder output is used as the body as is, without a round-trip through
+    a str content.
+    """
+
+    __slots__ = ()
+
+    def __init__(
+        self,
+        data: t.Any = None,
+        code: int = HTTP_CODE_OK,
+        headers: t.Optional[t.Mapping[str, str]] = None,
+        encoder: t.Optional[Encoder] = None,
+    ):
+        """Class constructor.
+
+        :param any data:                 Object to serialize.
+        :param int code:                 Response status code.
+        :param None or dict headers:     Response headers.
+        :param None or callable encoder: Object to JSON bytes function.
+        """
+        super().__init__(code=code, headers=headers)
+
+        self.body = (encoder or dumps)(data)
+        if "Content-Type" not in self.headers:
+            self.headers["Content-Type"] = MEDIA_TYPE_JSON
+
+
+class StreamedJSONResponse(StreamedResponse):
+    """Response streaming items of a sync or async iterable one at a time.
+
+    Items are serialized as elements of a JSON array or, with ndjson, as lines of
+    newline delimited JSON. Encoded items are joined into chunks of about
+    chunk_size bytes so small items do not become one body chunk each, a zero
+    chunk_size sends every item as soon as it is encoded.
+    """
+
+    __slots__ = ()
+
+    def __init__(
+        self,
+        items: t.Union[t.Iterable[t.Any], t.AsyncIterable[t.Any]],
+        code: int = HTTP_CODE_OK,
+        headers: t.Optional[t.Mapping[str, str]] = None,
+        ndjson: bool = False,
+        encoder: t.Optional[Encoder] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ):
+        """Class constructor.
+
+        :param iterable items:           Sync or async iterable of objects.
+        :param int code:                 Response status code.
+        :param None or dict headers:     Response headers.
+        :param bool ndjson:              Stream newline delimited JSON.
+        :param None or callable encoder: Object to JSON bytes function.
+        :param int chunk_size:           Size in bytes of streamed chunks.
+        """
+        framing = _NDJSON if ndjson else _ARRAY
+        encode = encoder or dumps
+
+        if hasattr(items, "__aiter__"):
+            stream: t.Union[t.Iterator[bytes], t.AsyncIterator[bytes]] = _aencode(
+                t.cast(t.AsyncIterable[t.Any], items), encode, framing, chunk_size
+            )
+        else:
+            stream = _encode(items, encode, framing, chunk_size)
+
+        super().__init__(stream, code, headers)
+
+        if "Content-Type" not in self.headers:
+            self.headers["Content-Type"] = (
+                MEDIA_TYPE_NDJSON if ndjson else MEDIA_TYPE_JSON
+            )
+
+
+"""Opening, separator, closing and item terminator of streamed documents."""
+_ARRAY = (b"[", b",", b"]", b"")
+_NDJSON = (b"", b"", b"", b"\n")
+
+
+def _encode(
+    items: t.Iterable[t.Any],
+    encode: Encoder,
+    framing: t.Tuple[bytes, bytes, bytes, bytes],
+    chunk_size: int,
+) -> t.Iterator[bytes]:
+    """Serialize items into chunks of about chunk_size bytes."""
+    opening, separator, closing, terminator = framing
+    chunk = bytearray(opening)
+
+    for i, item in enumerate(items):
+        if i and separator:
+            chunk += separator
+
+        chunk += encode(item)
+        chunk += terminator
+
+        if len(chunk) >= chunk_size:
+            yield bytes(chunk)
+            chunk.clear()
+
+    chunk += closing
+    if chunk:
+        yield bytes(chunk)
+
+
+async def _aencode(
+    items: t.AsyncIterable[t.Any],
+    encode: Encoder,
+    framing: t.Tuple[bytes, bytes, bytes, bytes],
+    chunk_size: int,
+) -> t.AsyncIterator[bytes]:
+    """Serialize items of an async iterable into chunks of about chunk_size bytes."""
+    opening, separator, closing, terminator = framing
+    chunk = bytearray(opening)
+    first = True
+
+    async for item in items:
+        if not first and separator:
+            chunk += separator
+
+        first = False
+        chunk += encode(item)
+        chunk += terminator
+
+        if len(chunk) >= chunk_size:
+            yield bytes(chunk)
+            chunk.clear()
+
+    chunk += closing
+    if chunk:
+        yield bytes(chunk)
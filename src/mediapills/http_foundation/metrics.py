@@ -0,0 +1,185 @@
+# Copyright (c) 2021-2021 Mediapills HttpFoundation.
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import time
+import typing as t
+from array import array
+from bisect import bisect_left
+
+from mediapills.http_foundation.requests import HTTPRequestMethod
+from mediapills.http_foundation.responses import STATUS_CLASS_SERVER_ERROR
+from mediapills.http_foundation.responses import status_class
+
+"""Request head received and the request object built."""
+STAGE_REQUEST = "request"
+
+"""Request body received."""
+STAGE_BODY = "body"
+
+"""Handler called."""
+STAGE_HANDLER = "handler"
+
+"""Response serialized and written, including waits for the client to drain it."""
+STAGE_WRITE = "write"
+
+STAGES = (STAGE_REQUEST, STAGE_BODY, STAGE_HANDLER, STAGE_WRITE)
+
+"""Upper bounds in seconds of histogram buckets."""
+DEFAULT_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+"""Name of the exposed histogram metric."""
+METRIC_NAME = "http_request_stage_duration_seconds"
+
+"""Method label of requests with a method outside HTTPRequestMethod."""
+METHOD_OTHER = "OTHER"
+
+_METHODS = tuple(m.value for m in HTTPRequestMethod) + (METHOD_OTHER,)
+_METHOD_INDEX = {method: i for i, method in enumerate(_METHODS)}
+_STAGE_INDEX = {stage: i for i, stage in enumerate(STAGES)}
+_STATUS_CLASS_LABELS = ("unknown", "1xx", "2xx", "3xx", "4xx", "5xx")
+
+
+def _perf_counter_ns() -> int:
+    """Fallback of time.perf_counter_ns for Python < 3.7."""
+    return int(time.perf_counter() * 1e9)
+
+
+"""Monotonic clock in nanoseconds."""
+now_ns: t.Callable[[], int] = getattr(time, "perf_counter_ns", _perf_counter_ns)
+
+
+class RequestMetrics:
+    """Fixed bucket latency histograms per stage, method and status class.
+
+    Counters live in arrays allocated once, so observe() only bisects the bucket
+    bounds and increments two integers. A disabled instance returns from observe()
+    right away, callers holding None instead of an instance pay a single check.
+    """
+
+    def __init__(
+        self, buckets: t.Sequence[float] = DEFAULT_BUCKETS, enabled: bool = True
+    ):
+        """Class constructor.
+
+        :param sequence buckets: Ascending bucket upper bounds in seconds.
+        :param bool enabled:     Record observations.
+        """
+        self.enabled = enabled
+
+        self._buckets = tuple(buckets)
+        self._bounds = [int(bound * 1e9) for bound in self._buckets]
+        self._width = len(self._bounds) + 1
+
+        series = len(STAGES) * len(_METHODS) * (STATUS_CLASS_SERVER_ERROR + 1)
+        self._counts = array("Q", bytes(8 * series * self._width))
+        self._sums = array("Q", bytes(8 * series))
+
+    def observe(self, stage: str, method: str, code: int, duration_ns: int) -> None:
+        """Record duration of a request lifecycle stage.
+
+        :param str stage:       One of STAGES.
+        :param str method:      Request method.
+        :param int code:        Response status code, 0 if unknown.
+        :param int duration_ns: Stage duration in nanoseconds.
+        """
+        if not self.enabled:
+            return
+
+        series = self._series(stage, method, code)
+        self._counts[series * self._width + bisect_left(self._bounds, duration_ns)] += 1
+        self._sums[series] += max(duration_ns, 0)
+
+    def count(self, stage: str, method: str, code: int) -> int:
+        """Return number of observations of the series."""
+        start = self._series(stage, method, code) * self._width
+        stop = start + self._width
+
+        return sum(self._counts[start:stop])
+
+    def reset(self) -> None:
+        """Forget all observations."""
+        for i in range(len(self._counts)):
+            self._counts[i] = 0
+
+        for i in range(len(self._sums)):
+            self._sums[i] = 0
+
+    def render(self) -> str:
+        """Return histograms in Prometheus text exposition format (0.0.4)."""
+        lines = [
+            "# HELP %s Duration of HTTP request lifecycle stages." % METRIC_NAME,
+            "# TYPE %s histogram" % METRIC_NAME,
+        ]
+        bounds = [repr(bound) for bound in self._buckets] + ["+Inf"]
+        classes = len(_STATUS_CLASS_LABELS)
+
+        for series in range(len(self._sums)):
+            start = series * self._width
+            stop = start + self._width
+            counts = self._counts[start:stop]
+            if not any(counts):
+                continue
+
+            stage, rest = divmod(series, len(_METHODS) * classes)
+            method, tag = divmod(rest, classes)
+            labels = 'stage="%s",method="%s",status_class="%s"' % (
+                STAGES[stage],
+                _METHODS[method],
+                _STATUS_CLASS_LABELS[tag],
+            )
+
+            total = 0
+            for bound, count in zip(bounds, counts):
+                total += count
+                lines.append(
+                    '%s_bucket{%s,le="%s"} %d' % (METRIC_NAME, labels, bound, total)
+                )
+
+            lines.append(
+                "%s_sum{%s} %r" % (METRIC_NAME, labels, self._sums[series] / 1e9)
+            )
+            lines.append("%s_count{%s} %d" % (METRIC_NAME, labels, total))
+
+        return "\n".join(lines) + "\n"
+
+    def _series(self, stage: str, method: str, code: int) -> int:
+        """Return index of the stage, method and status class series."""
+        index = _STAGE_INDEX[stage] * len(_METHODS) + _METHOD_INDEX.get(
+            method, len(_METHODS) - 1
+        )
+
+        return index * len(_STATUS_CLASS_LABELS) + status_class(code)
@@ -0,0 +1,285 @@
+# Copyright (c) 2021-2021 Mediapills HttpFoundation.
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import typing as t
+
+from mediapills.http_foundation.bodies import DEFAULT_MAX_MEMORY_SIZE
+from mediapills.http_foundation.bodies import RequestBody
+from mediapills.http_foundation.exceptions import MultipartException
+from mediapills.http_foundation.headers import HEADER_CHARSET
+from mediapills.http_foundation.headers import Headers
+from mediapills.http_foundation.headers import parse_content_type
+from mediapills.http_foundation.parameters import MultiDict
+
+"""Media type of HTML form data with file uploads."""
+MEDIA_TYPE_MULTIPART_FORM_DATA = "multipart/form-data"
+
+"""Maximum number of parts in a multipart body."""
+DEFAULT_MAX_PARTS = 1000
+
+"""Maximum size in bytes of a non-file part."""
+DEFAULT_MAX_FIELD_SIZE = 1024 * 1024
+
+"""Maximum size in bytes of the headers of a single part."""
+DEFAULT_MAX_HEADER_SIZE = 16 * 1024
+
+_STATE_PREAMBLE = 0
+_STATE_HEADERS = 1
+_STATE_BODY = 2
+_STATE_DELIMITER = 3
+_STATE_EPILOGUE = 4
+
+
+class MultipartPart:
+    """Single part of a multipart/form-data body.
+
+    Part data is held by a RequestBody, so file parts larger than the memory
+    threshold are spooled to a temporary file.
+    """
+
+    def __init__(self, headers: Headers, max_memory_size: int, charset: str):
+        """Class constructor.
+
+        :param Headers headers:     Part headers.
+        :param int max_memory_size: Part size in bytes kept in memory.
+        :param str charset:         Charset of field values.
+        """
+        # Browsers send field and file names in the form charset, not latin-1.
+        disposition = headers.get("Content-Disposition", "").encode(HEADER_CHARSET)
+        _, params = parse_content_type(disposition.decode(charset, "replace"))
+
+        self.headers = headers
+        self.name = params.get("name", "")
+        self.filename = params.get("filename")
+        self.content_type = headers.get("Content-Type", "text/plain")
+        self.body = RequestBody(max_memory_size=max_memory_size)
+        self.charset = charset
+
+    @property
+    def is_file(self) -> bool:
+        """Is the part a file upload?"""
+        return self.filename is not None
+
+    @property
+    def value(self) -> str:
+        """Return part data decoded with the form charset."""
+        _, params = parse_content_type(self.content_type)
+
+        return self.body.decode(params.get("charset", self.charset))
+
+    def close(self) -> None:
+        """Release part data."""
+        self.body.close()
+
+
+class MultipartParser:
+    """Push style multipart/form-data parser accepting chunks of any size.
+
+    Boundaries are found with bytes.find over the unconsumed buffer, keeping only
+    the tail that can hold the beginning of a delimiter between feed() calls.
+    """
+
+    def __init__(
+        self,
+        boundary: t.Union[str, bytes],
+        charset: str = "utf-8",
+        max_parts: int = DEFAULT_MAX_PARTS,
+        max_field_size: int = DEFAULT_MAX_FIELD_SIZE,
+        max_total_size: t.Optional[int] = None,
+        max_memory_size: int = DEFAULT_MAX_MEMORY_SIZE,
+        max_header_size: int = DEFAULT_MAX_HEADER_SIZE,
+    ):
+        """Class constructor.
+
+        :param str or bytes boundary:      Boundary from the Content-Type header.
+        :param str charset:                Charset of field values.
+        :param int max_parts:              Maximum number of parts.
+        :param int max_field_size:         Maximum size of a non-file part.
+        :param None or int max_total_size: Maximum size of the whole body.
+        :param int max_memory_size:        Part size kept in memory before spooling.
+        :param int max_header_size:        Maximum size of part headers.
+        """
+        if isinstance(boundary, str):
+            boundary = boundary.encode(HEADER_CHARSET)
+
+        if not boundary or len(boundary) > 70:
+            raise MultipartException("Invalid multipart boundary.")
+
+        self._delimiter = b"\r\n--" + boundary
+        self._charset = charset
+        self._max_parts = max_parts
+        self._max_field_size = max_field_size
+        self._max_total_size = max_total_size
+        self._max_memory_size = max_memory_size
+        self._max_header_size = max_header_size
+
+        # The preamble is parsed as if it was preceded by CRLF, so the first
+        # boundary is found with the same delimiter as the following ones.
+        self._buffer = bytearray(b"\r\n")
+        self._state = _STATE_PREAMBLE
+        self._total_size = 0
+        self._part: t.Optional[MultipartPart] = None
+        self._parts: t.List[MultipartPart] = []
+
+    @property
+    def parts(self) -> t.List[MultipartPart]:
+        """Return completed parts in order of appearance."""
+        return self._parts
+
+    @property
+    def is_complete(self) -> bool:
+        """Is the closing delimiter parsed?"""
+        return self._state == _STATE_EPILOGUE
+
+    def feed(self, data: bytes) -> t.List[MultipartPart]:
+        """Parse a chunk of the body and return parts completed by it.
+
+        :raises MultipartException: Body is malformed or exceeds a limit.
+        """
+        self._total_size += len(data)
+        if self._max_total_size is not None and self._total_size > self._max_total_size:
+            raise MultipartException("Multipart body is too large.")
+
+        if self._state == _STATE_EPILOGUE:
+            return []
+
+        self._buffer += data
+        completed = len(self._parts)
+
+        while self._step():
+            pass
+
+        return self._parts[completed:]
+
+    def close(self) -> None:
+        """Check that the whole body was parsed.
+
+        :raises MultipartException: Body ended before the closing delimiter.
+        """
+        if self._state != _STATE_EPILOGUE:
+            raise MultipartException("Multipart body is truncated.")
+
+    def fields(self) -> MultiDict:
+        """Return decoded values of non-file parts."""
+        return MultiDict([(p.name, p.value) for p in self._parts if not p.is_file])
+
+    def files(self) -> t.Dict[str, t.List[MultipartPart]]:
+        """Return file parts grouped by field name."""
+        files: t.Dict[str, t.List[MultipartPart]] = {}
+
+        for part in self._parts:
+            if part.is_file:
+                files.setdefault(part.name, []).append(part)
+
+        return files
+
+    def _step(self) -> bool:
+        """Advance the state machine, return False when more data is needed."""
+        buffer = self._buffer
+
+        if self._state in (_STATE_PREAMBLE, _STATE_BODY):
+            position = buffer.find(self._delimiter)
+            if position < 0:
+                keep = len(self._delimiter) - 1
+                if len(buffer) > keep:
+                    self._write(buffer[: len(buffer) - keep])
+                    del buffer[: len(buffer) - keep]
+
+                return False
+
+            self._write(buffer[:position])
+            del buffer[: position + len(self._delimiter)]
+            self._finish_part()
+            self._state = _STATE_DELIMITER
+
+            return True
+
+        if self._state == _STATE_DELIMITER:
+            if len(buffer) < 2:
+                return False
+
+            if buffer.startswith(b"--"):
+                self._state = _STATE_EPILOGUE
+                buffer.clear()
+                return False
+
+            position = buffer.find(b"\r\n")
+            if position < 0:
+                return False
+
+            if buffer[:position].strip(b" \t"):
+                raise MultipartException("Malformed multipart delimiter.")
+
+            del buffer[: position + 2]
+            self._state = _STATE_HEADERS
+
+            return True
+
+        if self._state == _STATE_HEADERS:
+            position = buffer.find(b"\r\n\r\n")
+            if position < 0:
+                if len(buffer) > self._max_header_size:
+                    raise MultipartException("Multipart part headers are too large.")
+
+                return False
+
+            if position > self._max_header_size:
+                raise MultipartException("Multipart part headers are too large.")
+
+            self._start_part(bytes(buffer[:position]))
+            del buffer[: position + 4]
+            self._state = _STATE_BODY
+
+            return True
+
+        return False
+
+    def _start_part(self, raw_headers: bytes) -> None:
+        """Create a part from its raw header block."""
+        if len(self._parts) >= self._max_parts:
+            raise MultipartException("Too many multipart parts.")
+
+        headers = Headers()
+
+        for line in raw_headers.split(b"\r\n"):
+            name, sep, value = line.partition(b":")
+            if not sep:
+                raise MultipartException("Malformed multipart part header.")
+
+            headers.add(name.strip(), value.strip())
+
+        self._part = MultipartPart(headers, self._max_memory_size, self._charset)
+
+    def _write(self, data: bytearray) -> None:
+        """Append data to the current part, the preamble is discarded."""
+        part = self._part
+        if part is None or not data:
+            return
+
+        if not part.is_file and len(part.body) + len(data) > self._max_field_size:
+            raise MultipartException("Multipart field %r is too large." % part.name)
+
+        part.body.write(data)
+
+    def _finish_part(self) -> None:
+        """Complete the current part."""
+        if self._part is not None:
+            self._parts.append(self._part)
+            self._part = None
@@ -0,0 +1,172 @@
+# Copyright (c) 2021-2021 Mediapills HttpFoundation.
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import functools
+import typing as t
+
+HEADER_ACCEPT = "Accept"
+
+HEADER_ACCEPT_CHARSET = "Accept-Charset"
+
+HEADER_ACCEPT_ENCODING = "Accept-Encoding"
+
+HEADER_ACCEPT_LANGUAGE = "Accept-Language"
+
+"""Number of distinct raw Accept-* header values kept parsed in the LRU cache."""
+ACCEPT_CACHE_SIZE = 512
+
+"""Content coding which is acceptable unless refused explicitly."""
+IDENTITY_ENCODING = "identity"
+
+
+class AcceptValue(t.NamedTuple):
+    """Single item of an Accept-* header."""
+
+    value: str
+    quality: float
+    params: t.Tuple[t.Tuple[str, str], ...]
+
+
+@functools.lru_cache(maxsize=ACCEPT_CACHE_SIZE)
+def parse_accept_header(header: str) -> t.Tuple[AcceptValue, ...]:
+    """Parse Accept-* header value into items ordered by quality, best first.
+
+    Results are cached by the raw header value, so repeated headers sent by the
+    same user agents are parsed once. Items with equal quality keep their order.
+    """
+    items = []
+
+    for item in header.split(","):
+        value, *raw_params = item.split(";")
+        value = value.strip().lower()
+        if not value:
+            continue
+
+        quality = 1.0
+        params = []
+
+        for raw_param in raw_params:
+            name, _, param = raw_param.partition("=")
+            name, param = name.strip().lower(), param.strip().strip('"')
+
+            if name != "q":
+                params.append((name, param))
+                continue
+
+            try:
+                quality = min(max(float(param), 0.0), 1.0)
+            except ValueError:
+                quality = 0.0
+
+        items.append(AcceptValue(value, quality, tuple(params)))
+
+    return tuple(sorted(items, key=lambda accept: -accept.quality))
+
+
+def _match_media_type(accept: str, offer: str) -> int:
+    """Return precedence of a media range matching the media type, -1 if none."""
+    if accept == offer:
+        return 3
+
+    accept_type, _, accept_subtype = accept.partition("/")
+    if accept_subtype != "*":
+        return -1
+
+    if accept_type == "*":
+        return 1
+
+    return 2 if offer.partition("/")[0] == accept_type else -1
+
+
+def _match_language(accept: str, offer: str) -> int:
+    """Return precedence of a language range matching the tag, -1 if none."""
+    if accept == offer:
+        return 2
+
+    if accept == "*":
+        return 0
+
+    return 1 if offer.startswith(accept + "-") else -1
+
+
+def _match_token(accept: str, offer: str) -> int:
+    """Return precedence of a charset or coding matching the offer, -1 if none."""
+    if accept == offer:
+        return 1
+
+    return 0 if accept == "*" else -1
+
+
+_MATCHERS: t.Dict[str, t.Callable[[str, str], int]] = {
+    HEADER_ACCEPT: _match_media_type,
+    HEADER_ACCEPT_CHARSET: _match_token,
+    HEADER_ACCEPT_ENCODING: _match_token,
+    HEADER_ACCEPT_LANGUAGE: _match_language,
+}
+
+
+def quality(header: t.Optional[str], offer: str, name: str = HEADER_ACCEPT) -> float:
+    """Return quality the header assigns to the offer, using its most specific item.
+
+    A missing header accepts everything, identity coding is acceptable unless the
+    header refuses it explicitly.
+    """
+    if header is None:
+        return 1.0
+
+    match = _MATCHERS[name]
+    offer = offer.lower()
+    best_precedence, best_quality = -1, 0.0
+
+    for accept in parse_accept_header(header):
+        precedence = match(accept.value, offer)
+        if precedence > best_precedence:
+            best_precedence, best_quality = precedence, accept.quality
+
+    if best_precedence < 0 and name == HEADER_ACCEPT_ENCODING:
+        return 1.0 if offer == IDENTITY_ENCODING else 0.0
+
+    return best_quality
+
+
+def negotiate(
+    header: t.Optional[str], available: t.Iterable[str], name: str = HEADER_ACCEPT
+) -> t.Optional[str]:
+    """Return the available value preferred by the Accept-* header.
+
+    Ties are resolved in favor of the first available value, None is returned when
+    nothing is acceptable.
+    """
+    best, best_quality = None, 0.0
+
+    for offer in available:
+        offer_quality = quality(header, offer, name)
+        if offer_quality > best_quality:
+            best, best_quality = offer, offer_quality
+
+    return best
+
+
+def accepted_values(header: t.Optional[str]) -> t.List[str]:
+    """Return values of the Accept-* header that are not refused, best first."""
+    if not header:
+        return []
+
+    return [accept.value for accept in parse_accept_header(header) if accept.quality]
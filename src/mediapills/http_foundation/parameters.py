@@ -0,0 +1,135 @@
+# Copyright (c) 2021-2021 Mediapills HttpFoundation.
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import functools
+import typing as t
+from urllib.parse import parse_qsl
+
+"""Number of distinct raw query strings kept parsed in the LRU cache."""
+QUERY_CACHE_SIZE = 4096
+
+"""Longest raw query string in characters that is kept in the LRU cache."""
+QUERY_CACHE_MAX_LENGTH = 1024
+
+
+class MultiDict(t.Mapping[str, str]):
+    """Immutable mapping of request parameters that keeps repeated keys.
+
+    Keys and values are stored in two parallel tuples in order of appearance, the
+    key index is built on the first keyed lookup. Item access returns the last
+    value of a key, getlist() returns all of them.
+    """
+
+    __slots__ = ("_keys", "_values", "_index")
+
+    def __init__(
+        self,
+        items: t.Optional[
+            t.Union[t.Mapping[str, str], t.Iterable[t.Tuple[str, str]]]
+        ] = None,
+    ):
+        """Class constructor.
+
+        :param None or dict or iterable items: Mapping or (key, value) pairs.
+        """
+        pairs: t.Iterable[t.Tuple[str, str]] = ()
+
+        if isinstance(items, MultiDict):
+            pairs = zip(items._keys, items._values)
+        elif isinstance(items, t.Mapping):
+            pairs = items.items()
+        elif items is not None:
+            pairs = items
+
+        keys_values = tuple(zip(*pairs))
+        self._keys: t.Tuple[str, ...] = keys_values[0] if keys_values else ()
+        self._values: t.Tuple[str, ...] = keys_values[1] if keys_values else ()
+        self._index: t.Optional[t.Dict[str, t.List[int]]] = None
+
+    def __getitem__(self, key: str) -> str:
+        """Return last value of the key."""
+        return self._values[self._lookup(key)[-1]]
+
+    def __contains__(self, key: object) -> bool:
+        """Check that the key is present."""
+        return key in self._get_index()
+
+    def __iter__(self) -> t.Iterator[str]:
+        """Iterate over distinct keys in order of first appearance."""
+        return iter(self._get_index())
+
+    def __len__(self) -> int:
+        """Return number of distinct keys."""
+        return len(self._get_index())
+
+    def __repr__(self) -> str:
+        """Return key value pairs representation."""
+        return "%s(%r)" % (type(self).__name__, self.multi_items())
+
+    @classmethod
+    def from_query_string(
+        cls, query_string: str, encoding: str = "utf-8", cache: bool = True
+    ) -> "MultiDict":
+        """Parse URL encoded query string.
+
+        Short query strings are served from a bounded LRU cache when cache is set,
+        which is safe because parsed parameters are immutable.
+        """
+        if cache and len(query_string) <= QUERY_CACHE_MAX_LENGTH:
+            return _parse_cached(query_string, encoding)
+
+        return cls(parse_qsl(query_string, True, encoding=encoding))
+
+    def getlist(self, key: str) -> t.List[str]:
+        """Return all values of the key in order of appearance."""
+        return [self._values[i] for i in self._get_index().get(key, ())]
+
+    def multi_items(self) -> t.List[t.Tuple[str, str]]:
+        """Return all (key, value) pairs, repeated keys included."""
+        return list(zip(self._keys, self._values))
+
+    def to_dict(self) -> t.Dict[str, str]:
+        """Return plain dictionary holding the last value of every key."""
+        return dict(zip(self._keys, self._values))
+
+    def _get_index(self) -> t.Dict[str, t.List[int]]:
+        """Return positions of every key, building the index on demand."""
+        if self._index is None:
+            index: t.Dict[str, t.List[int]] = {}
+
+            for position, key in enumerate(self._keys):
+                index.setdefault(key, []).append(position)
+
+            self._index = index
+
+        return self._index
+
+    def _lookup(self, key: str) -> t.List[int]:
+        """Return positions of the key values.
+
+        :raises KeyError: Key is not present.
+        """
+        return self._get_index()[key]
+
+
+@functools.lru_cache(maxsize=QUERY_CACHE_SIZE)
+def _parse_cached(query_string: str, encoding: str) -> MultiDict:
+    """Parse URL encoded query string once per distinct value."""
+    return MultiDict(parse_qsl(query_string, True, encoding=encoding))
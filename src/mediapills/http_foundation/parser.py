@@ -0,0 +1,461 @@
+# Copyright (c) 2021-2021 Mediapills HttpFoundation.
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import re
+import sys
+import typing as t
+from urllib.parse import unquote_to_bytes
+from urllib.parse import urlsplit
+
+from mediapills.http_foundation.bodies import DEFAULT_MAX_MEMORY_SIZE
+from mediapills.http_foundation.bodies import RequestBody
+from mediapills.http_foundation.exceptions import ProtocolException
+from mediapills.http_foundation.headers import HEADER_CHARSET
+from mediapills.http_foundation.responses import HTTP_CODE_NOT_IMPLEMENTED
+from mediapills.http_foundation.responses import (
+    HTTP_CODE_REQUEST_ENTITY_TOO_LARGE,
+)
+from mediapills.http_foundation.responses import (
+    HTTP_CODE_REQUEST_HEADER_FIELDS_TOO_LARGE,
+)
+from mediapills.http_foundation.responses import HTTP_CODE_REQUEST_URI_TOO_LONG
+from mediapills.http_foundation.responses import HTTP_CODE_VERSION_NOT_SUPPORTED
+from mediapills.http_foundation.wsgi import WSGIRequest
+
+"""Maximum size in bytes of the request line."""
+DEFAULT_MAX_REQUEST_LINE_SIZE = 8 * 1024
+
+"""Maximum size in bytes of the header section."""
+DEFAULT_MAX_HEADER_SIZE = 64 * 1024
+
+"""Maximum number of header fields."""
+DEFAULT_MAX_HEADERS = 100
+
+"""Protocol versions the parser accepts."""
+SUPPORTED_VERSIONS = frozenset(["HTTP/1.0", "HTTP/1.1"])
+
+_STATE_REQUEST_LINE = 0
+_STATE_HEADERS = 1
+_STATE_BODY = 2
+_STATE_CHUNK_SIZE = 3
+_STATE_CHUNK_DATA = 4
+_STATE_CHUNK_END = 5
+_STATE_TRAILERS = 6
+_STATE_ERROR = 7
+
+_TOKEN = re.compile(rb"[!#$%&'*+\-.^_`|~0-9A-Za-z]+\Z")
+_VERSION = re.compile(rb"HTTP/[0-9]\.[0-9]\Z")
+_CHUNK_SIZE = re.compile(rb"[0-9A-Fa-f]+\Z")
+_DIGITS = re.compile(r"[0-9]+\Z")
+_CONTROL = re.compile(rb"[\x00-\x08\x0A-\x1F\x7F]")
+
+
+class RequestLine(t.NamedTuple):
+    """Request line of a message."""
+
+    method: str
+    target: str
+    version: str
+
+
+class HeadersComplete(t.NamedTuple):
+    """Header section of a message, the request body follows."""
+
+    request: WSGIRequest
+    keep_alive: bool
+
+
+class BodyChunk(t.NamedTuple):
+    """Part of the decoded request body."""
+
+    data: bytes
+
+
+class MessageComplete(t.NamedTuple):
+    """End of a message, the request body was fully received."""
+
+    request: WSGIRequest
+
+
+ParserEvent = t.Union[RequestLine, HeadersComplete, BodyChunk, MessageComplete]
+
+
+class RequestParser:
+    """Sans-IO HTTP/1.1 request parser accepting bytes in chunks of any size.
+
+    Data of a connection is appended to a single bytearray and parsed in place,
+    consumed bytes are dropped once per feed() call. Keep-alive and pipelined
+    requests are parsed one after another from the same buffer. Each message
+    becomes a WSGIRequest which wsgi.input is a RequestBody filled with the
+    decoded body.
+    """
+
+    def __init__(
+        self,
+        environ: t.Optional[t.Mapping[str, t.Any]] = None,
+        max_request_line_size: int = DEFAULT_MAX_REQUEST_LINE_SIZE,
+        max_header_size: int = DEFAULT_MAX_HEADER_SIZE,
+        max_headers: int = DEFAULT_MAX_HEADERS,
+        max_body_size: t.Optional[int] = None,
+        max_memory_size: int = DEFAULT_MAX_MEMORY_SIZE,
+    ):
+        """Class constructor.
+
+        :param None or dict environ:       Server variables shared by all requests.
+        :param int max_request_line_size:  Maximum size of the request line.
+        :param int max_header_size:        Maximum size of the header section.
+        :param int max_headers:            Maximum number of header fields.
+        :param None or int max_body_size:  Maximum size of the decoded body.
+        :param int max_memory_size:        Body size kept in memory before spooling.
+        """
+        self._environ = dict(environ or {})
+        self._max_request_line_size = max_request_line_size
+        self._max_header_size = max_header_size
+        self._max_headers = max_headers
+        self._max_body_size = max_body_size
+        self._max_memory_size = max_memory_size
+
+        self._buffer = bytearray()
+        self._state = _STATE_REQUEST_LINE
+        self._line: t.Optional[RequestLine] = None
+        self._request: t.Optional[WSGIRequest] = None
+        self._body: t.Optional[RequestBody] = None
+        self._body_size = 0
+        self._remaining = 0
+
+    @property
+    def buffer_size(self) -> int:
+        """Return number of received bytes not parsed yet."""
+        return len(self._buffer)
+
+    @property
+    def is_idle(self) -> bool:
+        """Is the parser between two messages?"""
+        return self._state == _STATE_REQUEST_LINE and not self._buffer
+
+    def feed(self, data: bytes) -> t.List[ParserEvent]:
+        """Parse received bytes and return the events they complete.
+
+        :raises ProtocolException: On malformed messages or exceeded limits, the
+            exception code is the status code to answer with before closing.
+        """
+        if self._state == _STATE_ERROR:
+            raise ProtocolException("Parser is in an error state.")
+
+        buffer = self._buffer
+        buffer += data
+        events: t.List[ParserEvent] = []
+        pos = 0
+
+        try:
+            while pos < len(buffer):
+                consumed = self._step(buffer, pos, events)
+                if consumed < 0:
+                    break
+
+                pos = consumed
+        except ProtocolException:
+            self._state = _STATE_ERROR
+            raise
+        finally:
+            del buffer[:pos]
+
+        return events
+
+    def _step(self, buffer: bytearray, pos: int, events: t.List[ParserEvent]) -> int:
+        """Parse one element of the message, return new position or -1 for more."""
+        state = self._state
+
+        if state == _STATE_BODY or state == _STATE_CHUNK_DATA:
+            stop = pos + min(self._remaining, len(buffer) - pos)
+            self._write_body(bytes(buffer[pos:stop]), events)
+            self._remaining -= stop - pos
+
+            if not self._remaining:
+                if state == _STATE_BODY:
+                    self._complete(events)
+                else:
+                    self._state = _STATE_CHUNK_END
+
+            return stop
+
+        if state == _STATE_HEADERS:
+            return self._parse_headers(buffer, pos, events)
+
+        end = buffer.find(b"\r\n", pos)
+        if state == _STATE_REQUEST_LINE:
+            limit, code = self._max_request_line_size, HTTP_CODE_REQUEST_URI_TOO_LONG
+        else:
+            limit, code = (
+                self._max_header_size,
+                HTTP_CODE_REQUEST_HEADER_FIELDS_TOO_LARGE,
+            )
+
+        if (end < 0 and len(buffer) - pos > limit) or end - pos > limit:
+            raise ProtocolException("Request line or chunk header is too long.", code)
+
+        if end < 0:
+            return -1
+
+        line = bytes(buffer[pos:end])
+
+        if state == _STATE_REQUEST_LINE:
+            # Empty lines received before a request line are ignored (RFC 7230).
+            if line:
+                self._line = _parse_request_line(line)
+                self._state = _STATE_HEADERS
+                events.append(self._line)
+        elif state == _STATE_CHUNK_SIZE:
+            self._remaining = _parse_chunk_size(line)
+            self._state = _STATE_CHUNK_DATA if self._remaining else _STATE_TRAILERS
+        elif state == _STATE_CHUNK_END:
+            if line:
+                raise ProtocolException("Chunk data is not followed by CRLF.")
+
+            self._state = _STATE_CHUNK_SIZE
+        elif not line:
+            self._complete(events)
+
+        return end + 2
+
+    def _parse_headers(
+        self, buffer: bytearray, pos: int, events: t.List[ParserEvent]
+    ) -> int:
+        """Parse the header section and start the body."""
+        if buffer.startswith(b"\r\n", pos):
+            end, lines = pos, []
+        else:
+            end = buffer.find(b"\r\n\r\n", pos)
+            if end < 0:
+                if len(buffer) - pos > self._max_header_size:
+                    raise ProtocolException(
+                        "Header section is too large.",
+                        HTTP_CODE_REQUEST_HEADER_FIELDS_TOO_LARGE,
+                    )
+
+                return -1
+
+            end += 2
+            lines = bytes(buffer[pos:end]).split(b"\r\n")[:-1]
+
+        if end - pos > self._max_header_size or len(lines) > self._max_headers:
+            raise ProtocolException(
+                "Header section is too large.",
+                HTTP_CODE_REQUEST_HEADER_FIELDS_TOO_LARGE,
+            )
+
+        self._start_message([_parse_header_line(line) for line in lines], events)
+
+        return end + 2
+
+    def _start_message(
+        self, fields: t.List[t.Tuple[bytes, bytes]], events: t.List[ParserEvent]
+    ) -> None:
+        """Build the request and select body framing from the header fields."""
+        line = t.cast(RequestLine, self._line)
+        environ = self._build_environ(line, fields)
+
+        transfer_encoding = environ.get("HTTP_TRANSFER_ENCODING")
+        content_length = environ.get("CONTENT_LENGTH")
+
+        if transfer_encoding is not None:
+            if content_length is not None:
+                raise ProtocolException("Both Transfer-Encoding and Content-Length.")
+
+            codings = [c.strip().lower() for c in transfer_encoding.split(",")]
+            if codings[-1] != "chunked" or codings.count("chunked") > 1:
+                raise ProtocolException(
+                    "Unsupported transfer coding.", HTTP_CODE_NOT_IMPLEMENTED
+                )
+
+            self._state = _STATE_CHUNK_SIZE
+        elif content_length is not None:
+            self._remaining = _parse_content_length(content_length)
+            self._check_body_size(self._remaining)
+            environ["CONTENT_LENGTH"] = str(self._remaining)
+            self._state = _STATE_BODY if self._remaining else _STATE_HEADERS
+        else:
+            self._remaining = 0
+
+        host = environ.get("HTTP_HOST")
+        if (host is None and line.version == "HTTP/1.1") or (host and "," in host):
+            raise ProtocolException("Missing or repeated Host header field.")
+
+        self._request = WSGIRequest(environ)
+        events.append(HeadersComplete(self._request, _keep_alive(line, environ)))
+
+        if self._state == _STATE_HEADERS:
+            self._complete(events)
+
+    def _build_environ(
+        self, line: RequestLine, fields: t.List[t.Tuple[bytes, bytes]]
+    ) -> t.Dict[str, t.Any]:
+        """Return WSGI environ (PEP 3333) of the request."""
+        target = line.target
+        if target.startswith(("http://", "https://")):
+            parts = urlsplit(target)
+            path, query = parts.path or "/", parts.query
+        else:
+            path, _, query = target.partition("?")
+
+        self._body = RequestBody(max_memory_size=self._max_memory_size)
+        self._body_size = 0
+
+        environ: t.Dict[str, t.Any] = {
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": "http",
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": False,
+            "wsgi.multiprocess": False,
+            "wsgi.run_once": False,
+            "SERVER_NAME": "localhost",
+            "SERVER_PORT": "80",
+        }
+        environ.update(self._environ)
+        environ.update(
+            {
+                "REQUEST_METHOD": line.method,
+                "REQUEST_URI": target,
+                "SCRIPT_NAME": "",
+                "PATH_INFO": unquote_to_bytes(path).decode(HEADER_CHARSET),
+                "QUERY_STRING": query,
+                "SERVER_PROTOCOL": line.version,
+                "wsgi.input": self._body,
+            }
+        )
+
+        for name, value in fields:
+            # Underscores would make the field indistinguishable from a dash
+            # spelled one in the environ, such fields are dropped like nginx does.
+            if b"_" in name:
+                continue
+
+            key = name.decode(HEADER_CHARSET).upper().replace("-", "_")
+            if key not in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+                key = "HTTP_" + key
+
+            decoded = value.decode(HEADER_CHARSET)
+            if key == "CONTENT_LENGTH" and key in environ and environ[key] != decoded:
+                raise ProtocolException("Conflicting Content-Length fields.")
+
+            if key in environ and key != "CONTENT_LENGTH":
+                environ[key] += ("; " if key == "HTTP_COOKIE" else ",") + decoded
+            else:
+                environ[key] = decoded
+
+        return environ
+
+    def _write_body(self, data: bytes, events: t.List[ParserEvent]) -> None:
+        """Store body data and report it."""
+        if not data:
+            return
+
+        self._body_size += len(data)
+        self._check_body_size(self._body_size)
+
+        t.cast(RequestBody, self._body).write(data)
+        events.append(BodyChunk(data))
+
+    def _check_body_size(self, size: int) -> None:
+        """Enforce the body size limit."""
+        if self._max_body_size is not None and size > self._max_body_size:
+            raise ProtocolException(
+                "Request body is too large.", HTTP_CODE_REQUEST_ENTITY_TOO_LARGE
+            )
+
+    def _complete(self, events: t.List[ParserEvent]) -> None:
+        """Finish the current message and wait for the next one."""
+        request = t.cast(WSGIRequest, self._request)
+        body = t.cast(RequestBody, self._body)
+        body.seek(0)
+
+        # Dechunked bodies are framed for WSGI applications by their size.
+        request.server["CONTENT_LENGTH"] = str(self._body_size)
+
+        events.append(MessageComplete(request))
+
+        self._state = _STATE_REQUEST_LINE
+        self._line = self._request = self._body = None
+        self._remaining = 0
+
+
+def _parse_request_line(line: bytes) -> RequestLine:
+    """Split request line into method, target and version."""
+    parts = line.split(b" ")
+    if len(parts) != 3 or not _TOKEN.match(parts[0]) or not parts[1]:
+        raise ProtocolException("Malformed request line.")
+
+    method, target, version = parts
+    if not _VERSION.match(version):
+        raise ProtocolException("Malformed protocol version.")
+
+    decoded = version.decode("ascii")
+    if decoded not in SUPPORTED_VERSIONS:
+        raise ProtocolException(
+            "Unsupported protocol version.", HTTP_CODE_VERSION_NOT_SUPPORTED
+        )
+
+    return RequestLine(method.decode("ascii"), target.decode(HEADER_CHARSET), decoded)
+
+
+def _parse_header_line(line: bytes) -> t.Tuple[bytes, bytes]:
+    """Split header field line into name and value."""
+    name, sep, value = line.partition(b":")
+    if not sep or not _TOKEN.match(name):
+        # Also rejects obsolete line folding and whitespace before the colon.
+        raise ProtocolException("Malformed header field.")
+
+    value = value.strip(b" \t")
+    # A bare LF taken for a line end by another hop would smuggle a field in.
+    if _CONTROL.search(value):
+        raise ProtocolException("Invalid character in header field value.")
+
+    return name, value
+
+
+def _parse_content_length(value: str) -> int:
+    """Return Content-Length field value."""
+    if not _DIGITS.match(value):
+        raise ProtocolException("Malformed Content-Length.")
+
+    return int(value)
+
+
+def _parse_chunk_size(line: bytes) -> int:
+    """Return chunk size from a chunk header, extensions are ignored."""
+    size = line.split(b";", 1)[0].strip(b" \t")
+    if not _CHUNK_SIZE.match(size) or len(size) > 16:
+        raise ProtocolException("Malformed chunk size.")
+
+    return int(size, 16)
+
+
+def _keep_alive(line: RequestLine, environ: t.Mapping[str, t.Any]) -> bool:
+    """Can the connection be reused once the request is answered?"""
+    tokens = {
+        token.strip().lower()
+        for token in environ.get("HTTP_CONNECTION", "").split(",")
+        if token.strip()
+    }
+
+    if line.version == "HTTP/1.0":
+        return "keep-alive" in tokens
+
+    return "close" not in tokens
@@ -0,0 +1,76 @@
+# Copyright (c) 2021-2021 Mediapills HttpFoundation.
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import threading
+import typing as t
+
+from mediapills.http_foundation.requests import BaseRequest
+from mediapills.http_foundation.responses import BaseHTTPResponse
+
+"""Number of released objects kept by a pool by default."""
+DEFAULT_POOL_SIZE = 128
+
+
+T = t.TypeVar("T", BaseRequest, BaseHTTPResponse)
+
+
+class ObjectPool(t.Generic[T]):
+    """Opt-in pool of request or response objects recycled between requests.
+
+    Released objects are reset() and kept up to maxsize, acquire() brings one
+    back into use by running the class constructor on it again, so pooled
+    objects behave exactly like new ones. An object must not be used after it
+    is released.
+    """
+
+    def __init__(self, cls: t.Type[T], maxsize: int = DEFAULT_POOL_SIZE):
+        """Class constructor.
+
+        :param type cls:     Class of pooled objects, with a reset() method.
+        :param int maxsize:  Number of released objects kept for reuse.
+        """
+        self._cls: t.Type[T] = cls
+        self._maxsize = maxsize
+        self._free: t.List[T] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Return number of objects available for reuse."""
+        return len(self._free)
+
+    def acquire(self, *args: t.Any, **kwargs: t.Any) -> T:
+        """Return initialised object, reusing a released one if available."""
+        with self._lock:
+            obj = self._free.pop() if self._free else None
+
+        if obj is None:
+            return self._cls(*args, **kwargs)
+
+        self._cls.__init__(obj, *args, **kwargs)
+
+        return obj
+
+    def release(self, obj: T) -> None:
+        """Reset the object and keep it for reuse if the pool is not full."""
+        obj.reset()
+
+        with self._lock:
+            if len(self._free) < self._maxsize:
+                self._free.append(obj)
@@ -0,0 +1,213 @@
+# Copyright (c) 2021-2021 Mediapills HttpFoundation.
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import functools
+import ipaddress
+import re
+import typing as t
+from bisect import bisect_right
+
+"""Number of distinct addresses kept parsed."""
+ADDRESS_CACHE_SIZE = 4096
+
+HEADER_FORWARDED = "Forwarded"
+
+HEADER_X_FORWARDED_FOR = "X-Forwarded-For"
+
+HEADER_X_FORWARDED_PROTO = "X-Forwarded-Proto"
+
+HEADER_X_FORWARDED_HOST = "X-Forwarded-Host"
+
+Network = t.Union[str, ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+_FORWARDED_PAIR = re.compile(
+    r'\s*([!#$%&\'*+.^_`|~0-9A-Za-z-]+)=("(?:[^"\\]|\\.)*"|[^;,\s]*)\s*'
+)
+
+
+class ForwardedHop(t.NamedTuple):
+    """Client of a proxy as recorded in forwarding headers."""
+
+    address: str
+    proto: t.Optional[str] = None
+    host: t.Optional[str] = None
+
+
+class TrustedProxies:
+    """Set of trusted proxy networks searchable with bisect.
+
+    Networks are compiled once into sorted, merged integer ranges per IP
+    version. Looking an address up costs one bisection however many networks
+    are trusted.
+    """
+
+    def __init__(self, networks: t.Iterable[Network]):
+        """Class constructor.
+
+        :param iterable networks: Trusted networks like 10.0.0.0/8 or addresses.
+        :raises ValueError: Malformed network.
+        """
+        ranges: t.Dict[int, t.List[t.Tuple[int, int]]] = {4: [], 6: []}
+
+        for network in networks:
+            parsed = ipaddress.ip_network(network, strict=False)
+            ranges[parsed.version].append(
+                (int(parsed.network_address), int(parsed.broadcast_address))
+            )
+
+        self._starts: t.Dict[int, t.List[int]] = {}
+        self._ends: t.Dict[int, t.List[int]] = {}
+
+        for version, items in ranges.items():
+            starts: t.List[int] = []
+            ends: t.List[int] = []
+
+            for start, end in sorted(items):
+                if ends and start <= ends[-1] + 1:
+                    ends[-1] = max(ends[-1], end)
+                else:
+                    starts.append(start)
+                    ends.append(end)
+
+            self._starts[version], self._ends[version] = starts, ends
+
+    def __contains__(self, address: object) -> bool:
+        """Check that the address belongs to a trusted network."""
+        key = _address_key(address) if isinstance(address, str) else None
+        if key is None:
+            return False
+
+        version, value = key
+        i = bisect_right(self._starts[version], value) - 1
+
+        return i >= 0 and value <= self._ends[version][i]
+
+    def resolve(self, remote_addr: str, hops: t.Sequence[ForwardedHop]) -> ForwardedHop:
+        """Return the client hop, the nearest one not sent by a trusted proxy.
+
+        :param str remote_addr: Address of the peer connected to the server.
+        :param sequence hops:   Forwarded hops, the client first.
+        """
+        if remote_addr not in self:
+            return ForwardedHop(remote_addr)
+
+        for hop in reversed(hops):
+            if hop.address not in self:
+                return hop
+
+        return hops[0] if hops else ForwardedHop(remote_addr)
+
+
+def parse_forwarded(value: str) -> t.List[ForwardedHop]:
+    """Return hops of a Forwarded header (RFC 7239)."""
+    hops = []
+
+    for element in _split_elements(value):
+        params: t.Dict[str, str] = {}
+        for pair in element.split(";"):
+            match = _FORWARDED_PAIR.fullmatch(pair)
+            if match is not None:
+                name, param = match.group(1).lower(), match.group(2)
+                if param.startswith('"'):
+                    param = re.sub(r"\\(.)", r"\1", param[1:-1])
+                params[name] = param
+
+        if "for" in params:
+            hops.append(
+                ForwardedHop(
+                    _strip_port(params["for"]), params.get("proto"), params.get("host")
+                )
+            )
+
+    return hops
+
+
+def parse_x_forwarded(
+    addresses: str, protos: t.Optional[str] = None, hosts: t.Optional[str] = None
+) -> t.List[ForwardedHop]:
+    """Return hops of X-Forwarded-For, X-Forwarded-Proto and X-Forwarded-Host.
+
+    Proto and host lists as long as the address list describe every hop. For
+    other lists only the last value, set by the nearest proxy, is trusted and
+    applies to all hops, earlier ones may come from the client.
+    """
+    items = [_strip_port(a.strip()) for a in addresses.split(",") if a.strip()]
+    proto_items = _align(_split_list(protos), len(items))
+    host_items = _align(_split_list(hosts), len(items))
+
+    return [ForwardedHop(*hop) for hop in zip(items, proto_items, host_items)]
+
+
+@functools.lru_cache(maxsize=ADDRESS_CACHE_SIZE)
+def _address_key(address: str) -> t.Optional[t.Tuple[int, int]]:
+    """Return IP version and integer value of the address, None if malformed."""
+    try:
+        parsed = ipaddress.ip_address(address)
+    except ValueError:
+        return None
+
+    if isinstance(parsed, ipaddress.IPv6Address) and parsed.ipv4_mapped is not None:
+        parsed = parsed.ipv4_mapped
+
+    return parsed.version, int(parsed)
+
+
+def _strip_port(node: str) -> str:
+    """Return address of a node identifier without brackets and port."""
+    if node.startswith("["):
+        return node[1:].partition("]")[0]
+
+    if node.count(":") == 1:
+        return node.partition(":")[0]
+
+    return node
+
+
+def _align(values: t.List[str], size: int) -> t.List[t.Optional[str]]:
+    """Return one value per hop."""
+    if len(values) == size:
+        return list(values)
+
+    return [values[-1] if values else None] * size
+
+
+def _split_list(value: t.Optional[str]) -> t.List[str]:
+    """Split comma separated header value."""
+    return [item.strip() for item in value.split(",")] if value else []
+
+
+def _split_elements(value: str) -> t.List[str]:
+    """Split Forwarded header into elements, ignoring commas in quoted strings."""
+    elements, start, quoted, escaped = [], 0, False, False
+
+    for i, char in enumerate(value):
+        if escaped:
+            escaped = False
+        elif char == "\\" and quoted:
+            escaped = True
+        elif char == '"':
+            quoted = not quoted
+        elif char == "," and not quoted:
+            elements.append(value[start:i])
+            start = i + 1
+
+    elements.append(value[start:])
+
+    return elements
@@ -19,8 +19,39 @@
 # OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
 # WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 import abc
+import functools
+import posixpath
 import typing as t
 from enum import Enum
+from urllib.parse import quote
+from urllib.parse import unquote
+
+from mediapills.http_foundation.bodies import DEFAULT_MAX_MEMORY_SIZE
+from mediapills.http_foundation.bodies import RequestBody
+from mediapills.http_foundation.cookies import parse_cookie_header
+from mediapills.http_foundation.headers import BaseHeaders
+from mediapills.http_foundation.headers import EnvironHeaders
+from mediapills.http_foundation.headers import HEADER_CHARSET
+from mediapills.http_foundation.headers import parse_content_type
+from mediapills.http_foundation.multipart import MEDIA_TYPE_MULTIPART_FORM_DATA
+from mediapills.http_foundation.multipart import MultipartParser
+from mediapills.http_foundation.multipart import MultipartPart
+from mediapills.http_foundation.negotiation import accepted_values
+from mediapills.http_foundation.negotiation import HEADER_ACCEPT
+from mediapills.http_foundation.negotiation import HEADER_ACCEPT_CHARSET
+from mediapills.http_foundation.negotiation import HEADER_ACCEPT_ENCODING
+from mediapills.http_foundation.negotiation import HEADER_ACCEPT_LANGUAGE
+from mediapills.http_foundation.negotiation import negotiate
+from mediapills.http_foundation.parameters import MultiDict
+from mediapills.http_foundation.proxies import ForwardedHop
+from mediapills.http_foundation.proxies import HEADER_FORWARDED
+from mediapills.http_foundation.proxies import HEADER_X_FORWARDED_FOR
+from mediapills.http_foundation.proxies import HEADER_X_FORWARDED_HOST
+from mediapills.http_foundation.proxies import HEADER_X_FORWARDED_PROTO
+from mediapills.http_foundation.proxies import Network
+from mediapills.http_foundation.proxies import parse_forwarded
+from mediapills.http_foundation.proxies import parse_x_forwarded
+from mediapills.http_foundation.proxies import TrustedProxies
 
 METHOD_GET = "GET"
 
@@ -58,6 +89,12 @@
     ]
 )
 
+"""Media type of HTML form data which is parsed into POST request parameters."""
+MEDIA_TYPE_FORM_URLENCODED = "application/x-www-form-urlencoded"
+
+"""Charset used to decode the request body when Content-Type does not declare one."""
+DEFAULT_CHARSET = "UTF-8"
+
 
 class HTTPRequestMethod(Enum):  # dead: disable
     """Enumerated HTTP method constants."""
@@ -81,14 +118,41 @@ class BaseRequest(metaclass=abc.ABCMeta):  # dead: disable
     concept of request, an HTTP state management mechanism.
     """
 
+    __slots__ = (
+        "_query",
+        "_request",
+        "_attributes",
+        "_cookies",
+        "_server",
+        "_content",
+        "_payload",
+        "_headers",
+        "_files",
+        "_languages",
+        "_charsets",
+        "_encodings",
+        "_acceptable_content_types",
+        "_path_info",
+        "_request_uri",
+        "_base_url",
+        "_base_path",
+        "_method",
+        "_format",
+        "_max_memory_size",
+        "_client",
+    )
+
+    """Proxies allowed to forward client address, scheme and host."""
+    trusted_proxies: t.Optional[TrustedProxies] = None
+
     def __init__(
         self,
-        query: t.Optional[t.Dict[str, str]] = None,
-        request: t.Optional[t.Dict[str, str]] = None,
+        query: t.Optional[t.Mapping[str, str]] = None,
+        request: t.Optional[t.Mapping[str, str]] = None,
         attributes: t.Optional[t.Dict[str, str]] = None,
         cookies: t.Optional[t.Dict[str, str]] = None,
         server: t.Optional[t.Dict[str, str]] = None,
-        content: str = "",
+        content: t.Optional[str] = None,
     ):
         """Class constructor.
 
@@ -97,49 +161,84 @@ def __init__(
         :param None or dict attributes: Arguments to be interpreted by the CGI script.
         :param None or dict cookies:    Passed to the current script via HTTP Cookies.
         :param None or dict server:     Contain headers, paths, and script locations.
-        :param str content:             Raw HTTP body data.
+        :param None or str content:     Raw HTTP body data.
         """
-        self._query = query or dict()
-        self._request = request or dict()
-        self._attributes = attributes or dict()
-        self._cookies = cookies or dict()
-        self._server = server or dict()
+        self._query = query
+        self._request = request
+        self._attributes = attributes
+        self._cookies = cookies
+        self._server = server
         self._content = content
-
-        self._languages = None
-        self._charsets = None
-        self._encodings = None
-        self._acceptable_content_types = None
-        self._path_info = None
-        self._request_uri = None
-        self._base_url = None
-        self._base_path = None
-        self._method = None
+        self._payload: t.Optional[RequestBody] = None
+        self._headers: t.Optional[BaseHeaders] = None
+        self._files: t.Optional[t.Dict[str, t.List[MultipartPart]]] = None
+
+        self._languages: t.Optional[t.List[str]] = None
+        self._charsets: t.Optional[t.List[str]] = None
+        self._encodings: t.Optional[t.List[str]] = None
+        self._acceptable_content_types: t.Optional[t.List[str]] = None
+        self._path_info: t.Optional[str] = None
+        self._request_uri: t.Optional[str] = None
+        self._base_url: t.Optional[str] = None
+        self._base_path: t.Optional[str] = None
+        self._method: t.Optional[str] = None
         self._format = None
+        self._max_memory_size = DEFAULT_MAX_MEMORY_SIZE
+        self._client: t.Optional[ForwardedHop] = None
 
     @property
-    def query(self) -> t.Dict[str, str]:
+    def query(self) -> t.Mapping[str, str]:
         """GET request parameters getter."""
+        if self._query is None:
+            self._query = self._load_query()
+
         return self._query
 
     @query.setter
-    def query(self, query: t.Dict[str, str]) -> None:
+    def query(self, query: t.Mapping[str, str]) -> None:
         """GET request parameters setter."""
         self._query = query
 
     @property
-    def request(self) -> t.Dict[str, str]:
+    def request(self) -> t.Mapping[str, str]:
         """POST request parameters getter."""
+        if self._request is None:
+            self._request = self._load_request()
+
         return self._request
 
     @request.setter
-    def request(self, request: t.Dict[str, str]) -> None:
+    def request(self, request: t.Mapping[str, str]) -> None:
         """POST request parameters setter."""
         self._request = request
 
+    @property
+    def files(self) -> t.Dict[str, t.List[MultipartPart]]:
+        """Return uploaded files of a multipart/form-data request by field name."""
+        if self._files is None:
+            self._files = dict()
+
+            if self._request is None:
+                self._request = self._load_request()
+
+        return self._files
+
+    @property
+    def max_memory_size(self) -> int:
+        """Request body size in bytes kept in memory before spilling to disk."""
+        return self._max_memory_size
+
+    @max_memory_size.setter
+    def max_memory_size(self, max_memory_size: int) -> None:
+        """Property max_memory_size setter."""
+        self._max_memory_size = max_memory_size
+
     @property
     def attributes(self) -> t.Dict[str, str]:
         """HTTP request attributes getter."""
+        if self._attributes is None:
+            self._attributes = dict()
+
         return self._attributes
 
     @attributes.setter
@@ -150,6 +249,9 @@ def attributes(self, attributes: t.Dict[str, str]) -> None:
     @property
     def cookies(self) -> t.Dict[str, str]:
         """Property cookies getter."""
+        if self._cookies is None:
+            self._cookies = self._load_cookies()
+
         return self._cookies
 
     @cookies.setter
@@ -160,22 +262,171 @@ def cookies(self, cookies: t.Dict[str, str]) -> None:
     @property
     def server(self) -> t.Dict[str, str]:
         """Property server getter."""
+        if self._server is None:
+            self._server = self._load_server()
+
         return self._server
 
     @server.setter
     def server(self, server: t.Dict[str, str]) -> None:
         """Property server setter."""
         self._server = server
+        self._headers = None
+        self._request_uri = self._base_url = self._base_path = self._path_info = None
+        self._client = None
+
+    @property
+    def headers(self) -> BaseHeaders:
+        """Return case-insensitive request headers."""
+        if self._headers is None:
+            self._headers = self._load_headers()
+
+        return self._headers
 
     @property
     def content(self) -> str:
-        """Property content getter."""
+        """Return raw HTTP body data decoded with the request charset."""
+        if self._content is None:
+            self._content = self._load_content()
+
         return self._content
 
     @content.setter
     def content(self, content: str) -> None:
         """Property content setter."""
         self._content = content
+        self._payload = None
+
+    @property
+    def payload(self) -> RequestBody:
+        """Return raw HTTP body data as bytes stored in memory or on disk."""
+        if self._payload is None:
+            self._payload = self._load_payload()
+
+        return self._payload
+
+    @property
+    def charset(self) -> str:
+        """Return the charset declared by CONTENT_TYPE or the default one."""
+        _, params = parse_content_type(self.server.get("CONTENT_TYPE", ""))
+
+        return params.get("charset", DEFAULT_CHARSET)
+
+    @property
+    def content_length(self) -> int:
+        """Return CONTENT_LENGTH server variable, zero if missing or malformed."""
+        try:
+            return max(int(self.server.get("CONTENT_LENGTH") or 0), 0)
+        except ValueError:
+            return 0
+
+    @property
+    def method(self) -> str:
+        """Return the request method taken from the REQUEST_METHOD server variable."""
+        if self._method is None:
+            self._method = self.server.get("REQUEST_METHOD", METHOD_GET).upper()
+
+        return self._method
+
+    @method.setter
+    def method(self, method: str) -> None:
+        """Property method setter."""
+        self._method = method.upper()
+
+    @property
+    def acceptable_content_types(self) -> t.List[str]:
+        """Return media ranges of the Accept header ordered by quality."""
+        if self._acceptable_content_types is None:
+            self._acceptable_content_types = accepted_values(
+                self.headers.get(HEADER_ACCEPT)
+            )
+
+        return self._acceptable_content_types
+
+    @property
+    def languages(self) -> t.List[str]:
+        """Return language ranges of the Accept-Language header ordered by quality."""
+        if self._languages is None:
+            self._languages = accepted_values(self.headers.get(HEADER_ACCEPT_LANGUAGE))
+
+        return self._languages
+
+    @property
+    def charsets(self) -> t.List[str]:
+        """Return charsets of the Accept-Charset header ordered by quality."""
+        if self._charsets is None:
+            self._charsets = accepted_values(self.headers.get(HEADER_ACCEPT_CHARSET))
+
+        return self._charsets
+
+    @property
+    def encodings(self) -> t.List[str]:
+        """Return content codings of the Accept-Encoding header ordered by quality."""
+        if self._encodings is None:
+            self._encodings = accepted_values(self.headers.get(HEADER_ACCEPT_ENCODING))
+
+        return self._encodings
+
+    def negotiate(
+        self, available: t.Iterable[str], header: str = HEADER_ACCEPT
+    ) -> t.Optional[str]:
+        """Return the available value the client prefers, None if none acceptable.
+
+        :param iterable available: Media types, languages, charsets or codings.
+        :param str header:         Accept-* header to negotiate with.
+        """
+        return negotiate(self.headers.get(header), available, header)
+
+    @property
+    def request_uri(self) -> str:
+        """Return the requested URI (path and query string) as sent by the client.
+
+        The URI is raw, percent-encoded. Without REQUEST_URI server variable it
+        is rebuilt from SCRIPT_NAME, PATH_INFO and QUERY_STRING.
+        """
+        if self._request_uri is None:
+            self._request_uri = _request_uri(self.server)
+
+        return self._request_uri
+
+    @property
+    def base_url(self) -> str:
+        """Return the root URL from which this request is executed.
+
+        The base URL never ends with a /. It is the part of the request URI
+        matching SCRIPT_NAME, or its directory for rewritten URLs.
+
+        * http://localhost/index.php         returns '/index.php'
+        * http://localhost/index.php/page    returns '/index.php'
+        * http://localhost/web/index.php     returns '/web/index.php'
+        * http://localhost/web/page          returns '/web' (rewritten to index.php)
+        """
+        if self._base_url is None:
+            path = self.request_uri.partition("?")[0]
+            self._base_url = _base_url(self.server.get("SCRIPT_NAME", ""), path)
+
+        return self._base_url
+
+    @property
+    def base_path(self) -> str:
+        """Return the root path from which this request is executed.
+
+        Same as the base URL without the script file name.
+
+        * http://localhost/index.php         returns an empty string
+        * http://localhost/index.php/page    returns an empty string
+        * http://localhost/web/index.php     returns '/web'
+        """
+        if self._base_path is None:
+            base_url = self.base_url
+            filename = posixpath.basename(self.server.get("SCRIPT_FILENAME", ""))
+
+            if filename and posixpath.basename(base_url) == filename:
+                base_url = posixpath.dirname(base_url)
+
+            self._base_path = base_url.rstrip("/")
+
+        return self._base_path
 
     @property
     def path_info(self) -> str:
@@ -185,14 +436,236 @@ def path_info(self) -> str:
 
         Suppose this request is instantiated from /mysite on localhost:
 
-        * http://localhost/mysite              returns an empty string
+        * http://localhost/mysite              returns '/'
         * http://localhost/mysite/about        returns '/about'
         * http://localhost/mysite/enco%20ded   returns '/enco%20ded'
         * http://localhost/mysite/about?var=1  returns '/about'
         """
-        return self._path_info or ""
+        if self._path_info is None:
+            path = self.request_uri.partition("?")[0]
+            offset = len(self.base_url) if path.startswith(self.base_url) else 0
+            path_info = path[offset:]
+
+            self._path_info = (
+                path_info if path_info.startswith("/") else "/" + path_info
+            )
+
+        return self._path_info
 
     @path_info.setter
     def path_info(self, path_info: str) -> None:
         """Property path_info setter."""
-        self.path_info = path_info
+        self._path_info = path_info
+
+    @classmethod
+    def set_trusted_proxies(cls, networks: t.Optional[t.Iterable[Network]]) -> None:
+        """Trust forwarding headers sent by peers from the given networks.
+
+        :param None or iterable networks: Proxy networks, None trusts no proxy.
+        """
+        cls.trusted_proxies = TrustedProxies(networks) if networks is not None else None
+
+    @property
+    def client_ip(self) -> str:
+        """Return address of the client, forwarded by trusted proxies if any."""
+        return self._resolve_client().address
+
+    @property
+    def scheme(self) -> str:
+        """Return URI scheme the client used, http or https."""
+        proto = self._resolve_client().proto
+        if proto:
+            return proto.lower()
+
+        server = self.server
+        if "wsgi.url_scheme" in server:
+            return server["wsgi.url_scheme"]
+
+        return (
+            "https" if server.get("HTTPS", "off").lower() not in ("", "off") else "http"
+        )
+
+    @property
+    def host(self) -> str:
+        """Return host the client requested, with the port if one was sent."""
+        host = self._resolve_client().host or self.headers.get("Host")
+        if not host:
+            host = self.server.get("SERVER_NAME", "")
+            port = self.server.get("SERVER_PORT")
+            if port and port != ("443" if self.scheme == "https" else "80"):
+                host += ":" + port
+
+        return host.lower()
+
+    def _resolve_client(self) -> ForwardedHop:
+        """Return the client hop, resolved once per request."""
+        if self._client is not None:
+            return self._client
+
+        remote_addr = self.server.get("REMOTE_ADDR", "")
+        proxies = self.trusted_proxies
+
+        if proxies is None or remote_addr not in proxies:
+            self._client = ForwardedHop(remote_addr)
+            return self._client
+
+        # Repeated fields are joined, a client sent field must not hide the
+        # values appended by the proxies in fields of their own.
+        fields = {
+            name: ", ".join(self.headers.get_all(name)) or None
+            for name in (
+                HEADER_FORWARDED,
+                HEADER_X_FORWARDED_FOR,
+                HEADER_X_FORWARDED_PROTO,
+                HEADER_X_FORWARDED_HOST,
+            )
+        }
+
+        forwarded = fields[HEADER_FORWARDED]
+        if forwarded is not None:
+            hops = parse_forwarded(forwarded)
+        else:
+            hops = parse_x_forwarded(
+                fields[HEADER_X_FORWARDED_FOR] or "",
+                fields[HEADER_X_FORWARDED_PROTO],
+                fields[HEADER_X_FORWARDED_HOST],
+            )
+
+        self._client = proxies.resolve(remote_addr, hops)
+
+        return self._client
+
+    def reset(self) -> None:
+        """Release per-request state so the object can be pooled and reused.
+
+        The request body is closed and every parsed value is dropped, the object
+        is brought back into use by calling its constructor again.
+        """
+        if self._payload is not None:
+            self._payload.close()
+
+        for parts in (self._files or {}).values():
+            for part in parts:
+                part.close()
+
+        for name in BaseRequest.__slots__:
+            setattr(self, name, None)
+
+    def _load_server(self) -> t.Dict[str, str]:
+        """Build server variables on first access."""
+        return dict()
+
+    def _load_headers(self) -> BaseHeaders:
+        """Build request headers view over server variables on first access."""
+        return EnvironHeaders(self.server)
+
+    def _load_query(self) -> t.Mapping[str, str]:
+        """Parse QUERY_STRING server variable on first access."""
+        return MultiDict.from_query_string(self.server.get("QUERY_STRING", ""))
+
+    def _load_request(self) -> t.Mapping[str, str]:
+        """Parse URL encoded or multipart form body on first access."""
+        media_type, params = parse_content_type(self.server.get("CONTENT_TYPE", ""))
+
+        if media_type == MEDIA_TYPE_MULTIPART_FORM_DATA:
+            parser = self._create_multipart_parser(params.get("boundary", ""))
+            for chunk in self._iter_payload():
+                parser.feed(chunk)
+
+            parser.close()
+            self._files = parser.files()
+
+            return parser.fields()
+
+        if media_type != MEDIA_TYPE_FORM_URLENCODED:
+            return dict()
+
+        return MultiDict.from_query_string(self.content, self.charset, cache=False)
+
+    def _create_multipart_parser(self, boundary: str) -> MultipartParser:
+        """Create multipart/form-data parser, override to change its limits."""
+        return MultipartParser(
+            boundary, self.charset, max_memory_size=self.max_memory_size
+        )
+
+    def _iter_payload(self) -> t.Iterator[bytes]:
+        """Iterate over raw body chunks for the form parser."""
+        return self.payload.iter_chunks()
+
+    def _load_cookies(self) -> t.Dict[str, str]:
+        """Parse Cookie header fields on first access."""
+        return parse_cookie_header("; ".join(self.headers.get_all("Cookie")))
+
+    def _load_payload(self) -> RequestBody:
+        """Build raw HTTP body data on first access."""
+        data = self._content.encode(self.charset) if self._content else b""
+
+        return RequestBody(data, self.max_memory_size)
+
+    def _load_content(self) -> str:
+        """Decode raw HTTP body data on first access."""
+        return self.payload.decode(self.charset)
+
+
+"""Number of (SCRIPT_NAME, request URI prefix) pairs kept resolved."""
+BASE_URL_CACHE_SIZE = 256
+
+
+def _request_uri(server: t.Mapping[str, t.Any]) -> str:
+    """Return raw request URI from CGI server variables."""
+    uri = server.get("REQUEST_URI")
+
+    if uri is None:
+        path = server.get("SCRIPT_NAME", "") + server.get("PATH_INFO", "")
+        uri = quote(path, safe="/;=,:@!$&'()*+~", encoding=HEADER_CHARSET)
+        query = server.get("QUERY_STRING")
+        if query:
+            uri += "?" + query
+    elif not uri.startswith("/") and "://" in uri:
+        # Absolute form of the request target, the authority is dropped.
+        rest = uri.partition("://")[2]
+        uri = "/" + rest.partition("/")[2]
+
+    return t.cast(str, uri) or "/"
+
+
+def _base_url(script_name: str, path: str) -> str:
+    """Return prefix of the raw request path that matches the script."""
+    if not script_name:
+        return ""
+
+    base_dir = posixpath.dirname(script_name).rstrip("/")
+
+    for prefix in (script_name, base_dir):
+        if prefix and _is_path_prefix(path, prefix):
+            return prefix
+
+    if "%" not in path:
+        return ""
+
+    # Percent-encoded paths are matched once per mount point and URI prefix.
+    return _encoded_base_url(script_name, path[: 3 * len(script_name) + 1])
+
+
+@functools.lru_cache(maxsize=BASE_URL_CACHE_SIZE)
+def _encoded_base_url(script_name: str, head: str) -> str:
+    """Return raw prefix of the request path head that decodes to the script."""
+    base_dir = posixpath.dirname(script_name).rstrip("/")
+
+    for prefix in (script_name, base_dir):
+        if not prefix:
+            continue
+
+        for end in range(len(prefix), len(head) + 1):
+            raw = head[:end]
+            if _is_path_prefix(head, raw) and unquote(raw, HEADER_CHARSET) == prefix:
+                return raw
+
+    return ""
+
+
+def _is_path_prefix(path: str, prefix: str) -> bool:
+    """Check that the path starts with the prefix at a segment boundary."""
+    end = len(prefix)
+
+    return path.startswith(prefix) and (len(path) == end or path[end] == "/")
@@ -19,9 +19,24 @@
 # OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
 # WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 import abc
+import datetime
 import typing as t
+from array import array
+from email.utils import parsedate_to_datetime
 from enum import Enum
 
+from mediapills.http_foundation.cookies import build_set_cookie
+from mediapills.http_foundation.etags import ETagHasher
+from mediapills.http_foundation.etags import generate_etag
+from mediapills.http_foundation.etags import parse_etags
+from mediapills.http_foundation.etags import strong_match
+from mediapills.http_foundation.etags import weak_match
+from mediapills.http_foundation.exceptions import ResponseException
+from mediapills.http_foundation.headers import Headers
+from mediapills.http_foundation.requests import BaseRequest
+from mediapills.http_foundation.requests import METHOD_GET
+from mediapills.http_foundation.requests import METHOD_HEAD
+
 # 1XX Information response codes constants
 
 """This interim response indicates that the client should continue the request or ignore
@@ -521,6 +536,28 @@ class HTTPStatusMessage(Enum):  # dead: disable
 )
 
 
+"""Response codes which responses never carry a body, along with 1XX ones."""
+HTTP_CODES_WITHOUT_BODY: t.FrozenSet[int] = frozenset(
+    [
+        HTTPStatusCode.NO_CONTENT.value,
+        HTTPStatusCode.NOT_MODIFIED.value,
+    ]
+)
+
+
+"""Representation headers dropped when the body of a response is dropped."""
+REPRESENTATION_HEADERS = (
+    "Allow",
+    "Content-Encoding",
+    "Content-Language",
+    "Content-Length",
+    "Content-MD5",
+    "Content-Range",
+    "Content-Type",
+    "Transfer-Encoding",
+)
+
+
 """Documents transmitted with HTTP that are of type text, such as text/html, text/plain,
 etc., can send a charset parameter in the HTTP header to specify the character encoding
 of the document. """
@@ -530,33 +567,174 @@ class HTTPStatusMessage(Enum):  # dead: disable
 line)."""
 DEFAULT_VERSION = "1.0"
 
+"""Protocol versions which status lines are precomputed."""
+PROTOCOL_VERSIONS = ("1.0", "1.1")
+
+"""Exclusive upper bound of the status code tables."""
+HTTP_CODE_LIMIT = 600
+
+"""Reason phrases indexed by status code, empty for unregistered codes."""
+REASON_PHRASES: t.Tuple[str, ...] = tuple(
+    HTTPStatusMessage[HTTPStatusCode(code).name].value
+    if code in HTTP_STATUS_CODES
+    else ""
+    for code in range(HTTP_CODE_LIMIT)
+)
+
+
+def _encode_status_line(code: int, version: str, reason: str) -> bytes:
+    """Encode HTTP response status line terminated with CRLF."""
+    return ("HTTP/%s %03d %s\r\n" % (version, code, reason)).encode("latin-1")
+
+
+"""Status lines indexed by protocol version and status code."""
+_STATUS_LINES: t.Dict[str, t.Tuple[bytes, ...]] = {
+    version: tuple(
+        _encode_status_line(code, version, REASON_PHRASES[code])
+        for code in range(HTTP_CODE_LIMIT)
+    )
+    for version in PROTOCOL_VERSIONS
+}
+
+
+def reason_phrase(code: int) -> str:
+    """Return reason phrase of the status code, empty for unregistered codes."""
+    return REASON_PHRASES[code] if 0 <= code < HTTP_CODE_LIMIT else ""
+
+
+def status_line(code: int, version: str = DEFAULT_VERSION) -> bytes:
+    """Return encoded status line terminated with CRLF, e.g. HTTP/1.1 200 OK.
+
+    Lines of supported protocol versions come from a precomputed table, custom
+    versions and out of range codes are encoded on the fly.
+    """
+    lines = _STATUS_LINES.get(version)
+    if lines is not None and 0 <= code < HTTP_CODE_LIMIT:
+        return lines[code]
+
+    return _encode_status_line(code, version, reason_phrase(code))
+
+
+"""Class tag of codes outside of the 100-599 range."""
+STATUS_CLASS_UNKNOWN = 0
+
+"""Class tag of 1XX information response codes."""
+STATUS_CLASS_INFORMATIONAL = 1
+
+"""Class tag of 2XX successful response codes."""
+STATUS_CLASS_SUCCESSFUL = 2
+
+"""Class tag of 3XX redirection messages response codes."""
+STATUS_CLASS_REDIRECTION = 3
+
+"""Class tag of 4XX client error response codes."""
+STATUS_CLASS_CLIENT_ERROR = 4
+
+"""Class tag of 5XX server error response codes."""
+STATUS_CLASS_SERVER_ERROR = 5
+
+"""Status class tags indexed by status code, registered or not."""
+STATUS_CLASSES = bytes(
+    code // 100 if code >= HTTP_CODE_CONTINUE else STATUS_CLASS_UNKNOWN
+    for code in range(HTTP_CODE_LIMIT)
+)
+
+
+def status_class(code: int) -> int:
+    """Return class tag of the status code."""
+    return STATUS_CLASSES[code] if 0 <= code < HTTP_CODE_LIMIT else STATUS_CLASS_UNKNOWN
+
+
+def classify_status_codes(codes: t.Sequence[int]) -> bytes:
+    """Return class tags of a sequence or array('H') of status codes.
+
+    Tags are looked up in C through the STATUS_CLASSES index, the per code range
+    check is only done when the sequence holds out of range codes.
+    """
+    unsigned = isinstance(codes, array) and codes.typecode in "BHILQ"
+    if codes and (unsigned or min(codes) >= 0):
+        try:
+            return bytes(map(STATUS_CLASSES.__getitem__, codes))
+        except IndexError:
+            pass
+
+    return bytes(map(status_class, codes))
+
+
+def count_status_classes(codes: t.Sequence[int]) -> t.Tuple[int, ...]:
+    """Return number of codes per class tag, indexed by the tag."""
+    tags = classify_status_codes(codes)
+
+    return tuple(tags.count(tag) for tag in range(STATUS_CLASS_SERVER_ERROR + 1))
+
 
 class BaseHTTPResponse(metaclass=abc.ABCMeta):  # dead: disable
     """Response content made by a named host, to a client."""
 
+    __slots__ = ("_content", "_body", "_code", "_headers", "_charset", "_version")
+
     def __init__(
         self,
         content: str = "",
         code: int = HTTP_CODE_OK,
-        headers: t.Optional[t.Dict[str, str]] = None,
+        headers: t.Optional[t.Mapping[str, str]] = None,
     ):
         """Class constructor."""
-        self._content = content
+        self._content: t.Optional[str] = content
+        self._body: t.Optional[bytes] = None
         self._code = code
-        self._headers = headers or dict()
+        self._headers = Headers(headers)
 
         self._charset = DEFAULT_CHARSET
         self._version = DEFAULT_VERSION
 
+    def reset(self) -> None:
+        """Release the body and headers so the object can be pooled and reused.
+
+        The object is brought back into use by calling its constructor again.
+        """
+        self._content = ""
+        self._body = None
+        self._code = HTTP_CODE_OK
+        self._headers.clear()
+
     @property
     def content(self) -> str:
         """Property content getter."""
+        if self._content is None:
+            self._content = self.body.decode(self._charset, "replace")
+
         return self._content
 
     @content.setter
     def content(self, content: str) -> None:
         """Property content setter."""
         self._content = content
+        self._body = None
+
+    @property
+    def body(self) -> bytes:
+        """Return response content encoded with the response charset."""
+        if self._body is None:
+            self._body = (self._content or "").encode(self._charset)
+
+        return self._body
+
+    @body.setter
+    def body(self, body: bytes) -> None:
+        """Set raw response content bytes, content is decoded from them on demand."""
+        self._body = body
+        self._content = None
+
+    @property
+    def content_length(self) -> t.Optional[int]:
+        """Return body size in bytes or None when it is not known in advance."""
+        return len(self.body)
+
+    def iter_body(self) -> t.Iterator[bytes]:
+        """Iterate over raw body chunks."""
+        if self.body:
+            yield self.body
 
     @property
     def code(self) -> int:
@@ -569,14 +747,14 @@ def code(self, code: int) -> None:
         self._code = code
 
     @property
-    def headers(self) -> t.Dict[str, str]:
+    def headers(self) -> Headers:
         """Property headers getter."""
         return self._headers
 
     @headers.setter
-    def headers(self, headers: t.Dict[str, str]) -> None:
+    def headers(self, headers: t.Mapping[str, str]) -> None:
         """Property headers setter."""
-        self._headers = headers
+        self._headers = headers if isinstance(headers, Headers) else Headers(headers)
 
     @property
     def charset(self) -> str:
@@ -586,6 +764,9 @@ def charset(self) -> str:
     @charset.setter
     def charset(self, charset: str) -> None:
         """Property charset setter."""
+        if self._content is not None:
+            self._body = None
+
         self._charset = charset
 
     @property
@@ -598,22 +779,390 @@ def protocol_version(self, version: str) -> None:
         """Property version setter."""
         self._version = version
 
+    @property
+    def reason_phrase(self) -> str:
+        """Return reason phrase of the response status code."""
+        return reason_phrase(self._code)
+
+    @property
+    def status_line(self) -> bytes:
+        """Return encoded status line of the response."""
+        return status_line(self._code, self._version)
+
+    @property
+    def is_informational(self) -> bool:  # dead: disable
+        """Is response informative?"""
+        return status_class(self._code) == STATUS_CLASS_INFORMATIONAL
+
     @property
     def is_successful(self) -> bool:  # dead: disable
         """Is response successful?"""
-        return self.code in HTTP_CODES_SUCCESSFUL
+        return status_class(self._code) == STATUS_CLASS_SUCCESSFUL
 
     @property
     def is_redirection(self) -> bool:  # dead: disable
         """Is the response a redirect?"""
-        return self.code in HTTP_CODES_REDIRECTIONS
+        return status_class(self._code) == STATUS_CLASS_REDIRECTION
 
     @property
     def is_client_error(self) -> bool:  # dead: disable
         """Is there a client error?"""
-        return self.code in HTTP_CODES_CLIENT_ERRORS
+        return status_class(self._code) == STATUS_CLASS_CLIENT_ERROR
 
     @property
     def is_server_error(self) -> bool:  # dead: disable
         """Is there a server error?"""
-        return self.code in HTTP_CODES_SERVER_ERRORS
+        return status_class(self._code) == STATUS_CLASS_SERVER_ERROR
+
+    def set_cookie(
+        self,
+        name: str,
+        value: str = "",
+        max_age: t.Optional[int] = None,
+        expires: t.Optional[t.Union[int, float, datetime.datetime]] = None,
+        path: t.Optional[str] = "/",
+        domain: t.Optional[str] = None,
+        secure: bool = False,
+        httponly: bool = False,
+        samesite: t.Optional[str] = None,
+    ) -> None:
+        """Add Set-Cookie header, other cookies set on the response are kept."""
+        self._headers.add(
+            "Set-Cookie",
+            build_set_cookie(
+                name, value, max_age, expires, path, domain, secure, httponly, samesite
+            ),
+        )
+
+    def delete_cookie(
+        self,
+        name: str,
+        path: t.Optional[str] = "/",
+        domain: t.Optional[str] = None,
+        secure: bool = False,
+        httponly: bool = False,
+        samesite: t.Optional[str] = None,
+    ) -> None:
+        """Add Set-Cookie header which expires the cookie in the user agent."""
+        self.set_cookie(name, "", 0, 0, path, domain, secure, httponly, samesite)
+
+    def set_etag(self, etag: t.Optional[str] = None, weak: bool = False) -> None:
+        """Set ETag header, generated from the body when etag is not given."""
+        if etag is None:
+            etag = generate_etag(self.body, weak)
+        elif not etag.endswith('"'):
+            etag = ("W/" if weak else "") + '"%s"' % etag
+
+        self._headers["ETag"] = etag
+
+    def is_not_modified(self, request: BaseRequest) -> bool:
+        """Evaluate request preconditions against ETag and Last-Modified headers.
+
+        Failed If-None-Match or If-Modified-Since of a GET or HEAD request turns
+        the response into 304 Not Modified, failed If-Match or If-Unmodified-Since
+        into 412 Precondition Failed. The body is dropped in both cases.
+
+        :return: True when the response was turned into 304 or 412.
+        """
+        if not self.is_successful:
+            return False
+
+        code = self._evaluate_preconditions(request)
+        if code is None:
+            return False
+
+        self._code = code
+        self.body = b""
+        for name in REPRESENTATION_HEADERS:
+            self._headers.pop(name, None)
+
+        return True
+
+    def _evaluate_preconditions(self, request: BaseRequest) -> t.Optional[int]:
+        """Return status code of a failed precondition in RFC 7232 order."""
+        headers = request.headers
+        etag = self._headers.get("ETag")
+        last_modified = _parse_http_date(self._headers.get("Last-Modified"))
+        safe = request.method in (METHOD_GET, METHOD_HEAD)
+
+        if_match = headers.get("If-Match")
+        if if_match is not None:
+            if if_match.strip() != "*" and not (
+                etag and any(strong_match(etag, tag) for tag in parse_etags(if_match))
+            ):
+                return HTTP_CODE_PRECONDITION_FAILED
+        else:
+            since = _parse_http_date(headers.get("If-Unmodified-Since"))
+            if (
+                since is not None
+                and last_modified is not None
+                and last_modified > since
+            ):
+                return HTTP_CODE_PRECONDITION_FAILED
+
+        if_none_match = headers.get("If-None-Match")
+        if if_none_match is not None:
+            if if_none_match.strip() == "*" or (
+                etag
+                and any(weak_match(etag, tag) for tag in parse_etags(if_none_match))
+            ):
+                return HTTP_CODE_NOT_MODIFIED if safe else HTTP_CODE_PRECONDITION_FAILED
+        elif safe:
+            since = _parse_http_date(headers.get("If-Modified-Since"))
+            if (
+                since is not None
+                and last_modified is not None
+                and last_modified <= since
+            ):
+                return HTTP_CODE_NOT_MODIFIED
+
+        return None
+
+    @property
+    def has_body(self) -> bool:
+        """Can the response status code carry a body?"""
+        return not (self.is_informational or self._code in HTTP_CODES_WITHOUT_BODY)
+
+    def prepare(self, request: t.Optional[BaseRequest] = None) -> None:
+        """Set message framing headers, must be called before headers are sent."""
+        length = self.content_length
+
+        if self.has_body and length is not None:
+            self._headers["Content-Length"] = str(length)
+        elif self._code != HTTP_CODE_NOT_MODIFIED:
+            self._headers.pop("Content-Length", None)
+
+    def serialize(self, request: t.Optional[BaseRequest] = None) -> t.List[bytes]:
+        """Return status line, header block and body in a single pass.
+
+        The list can be passed as is to socket.sendmsg() or transport.writelines().
+        The body is left out for HEAD requests and bodiless status codes.
+        """
+        self.prepare(request)
+
+        chunks = [self.status_line, self._headers.encode()]
+        if self._sends_body(request):
+            chunks.extend(self.iter_body())
+
+        return chunks
+
+    def iter_wire_chunks(
+        self, request: t.Optional[BaseRequest] = None
+    ) -> t.Iterator[bytes]:
+        """Iterate over the serialized response."""
+        return iter(self.serialize(request))
+
+    async def aiter_wire_chunks(
+        self, request: t.Optional[BaseRequest] = None
+    ) -> t.AsyncIterator[bytes]:
+        """Iterate over the serialized response from a coroutine."""
+        for chunk in self.serialize(request):
+            yield chunk
+
+    def _sends_body(self, request: t.Optional[BaseRequest]) -> bool:
+        """Check that the body goes on the wire in reply to the request."""
+        return self.has_body and (request is None or request.method != METHOD_HEAD)
+
+
+def _parse_http_date(value: t.Optional[str]) -> t.Optional[int]:
+    """Return HTTP date header value as a timestamp, None if missing or malformed."""
+    if not value:
+        return None
+
+    try:
+        return int(parsedate_to_datetime(value).timestamp())
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+"""Terminating chunk of a message sent with chunked transfer coding."""
+LAST_CHUNK = b"0\r\n\r\n"
+
+"""Body stream of a StreamedResponse."""
+BodyStream = t.Union[t.Iterable[bytes], t.AsyncIterable[bytes]]
+
+
+class StreamedResponse(BaseHTTPResponse):
+    """Response which body is produced by a sync or async iterable of bytes.
+
+    The body is never buffered. When the size is not known in advance, HTTP/1.1
+    responses are framed with chunked transfer coding and HTTP/1.0 responses are
+    delimited by closing the connection.
+    """
+
+    __slots__ = ("_stream", "_content_length")
+
+    def __init__(
+        self,
+        stream: BodyStream,
+        code: int = HTTP_CODE_OK,
+        headers: t.Optional[t.Mapping[str, str]] = None,
+        content_length: t.Optional[int] = None,
+    ):
+        """Class constructor.
+
+        :param iterable stream:            Sync or async iterable of body chunks.
+        :param int code:                   Response status code.
+        :param None or dict headers:       Response headers.
+        :param None or int content_length: Body size in bytes if known in advance.
+        """
+        super().__init__(code=code, headers=headers)
+
+        if content_length is None and isinstance(stream, (list, tuple)):
+            content_length = sum(map(len, stream))
+
+        self._stream = stream
+        self._content_length = content_length
+
+    def reset(self) -> None:
+        """Release the body stream."""
+        super().reset()
+
+        self._stream = ()
+        self._content_length = None
+
+    @property
+    def body(self) -> bytes:
+        """Streamed body can not be buffered.
+
+        :raises ResponseException: Always.
+        """
+        raise ResponseException("Streamed response body can not be buffered.")
+
+    @body.setter
+    def body(self, body: bytes) -> None:
+        """Replace the body stream with the given bytes."""
+        self._stream = [body]
+        self._content_length = len(body)
+
+    @property
+    def stream(self) -> BodyStream:
+        """Property stream getter."""
+        return self._stream
+
+    @stream.setter
+    def stream(self, stream: BodyStream) -> None:
+        """Replace the body stream, its size becomes unknown."""
+        self._stream = stream
+        self._content_length = None
+
+    def hash_body(self, weak: bool = False) -> ETagHasher:
+        """Hash body chunks with BLAKE2b while they are streamed.
+
+        The entity tag of the returned hasher is complete once the body is sent,
+        e.g. to store it along with a cached copy of the response.
+        """
+        hasher = ETagHasher(weak)
+
+        if self.is_async:
+            self._stream = hasher.awrap(t.cast(t.AsyncIterable[bytes], self._stream))
+        else:
+            self._stream = hasher.wrap(t.cast(t.Iterable[bytes], self._stream))
+
+        return hasher
+
+    @property
+    def is_async(self) -> bool:
+        """Is body stream an async iterable?"""
+        return hasattr(self._stream, "__aiter__")
+
+    @property
+    def content_length(self) -> t.Optional[int]:
+        """Return body size in bytes or None when it is not known in advance."""
+        return self._content_length
+
+    @property
+    def is_chunked(self) -> bool:
+        """Is body sent with chunked transfer coding?"""
+        return self._content_length is None and self.protocol_version == "1.1"
+
+    def prepare(self, request: t.Optional[BaseRequest] = None) -> None:
+        """Set message framing headers, must be called before headers are sent."""
+        if not self.has_body:
+            super().prepare(request)
+        elif self._content_length is not None:
+            self.headers.pop("Transfer-Encoding", None)
+            self.headers["Content-Length"] = str(self._content_length)
+        elif self.is_chunked:
+            self.headers.pop("Content-Length", None)
+            self.headers["Transfer-Encoding"] = "chunked"
+
+    def serialize(self, request: t.Optional[BaseRequest] = None) -> t.List[bytes]:
+        """Return serialized response, buffering the whole body stream.
+
+        Prefer iter_wire_chunks() or aiter_wire_chunks() to keep the body streamed.
+        """
+        return list(self.iter_wire_chunks(request))
+
+    def iter_wire_chunks(
+        self, request: t.Optional[BaseRequest] = None
+    ) -> t.Iterator[bytes]:
+        """Iterate over status line, header block and framed body chunks."""
+        self.prepare(request)
+
+        yield self.status_line
+        yield self._headers.encode()
+
+        if self._sends_body(request):
+            yield from self.iter_chunks()
+
+    async def aiter_wire_chunks(
+        self, request: t.Optional[BaseRequest] = None
+    ) -> t.AsyncIterator[bytes]:
+        """Iterate over status line, header block and framed body chunks."""
+        self.prepare(request)
+
+        yield self.status_line
+        yield self._headers.encode()
+
+        if self._sends_body(request):
+            async for chunk in self.aiter_chunks():
+                yield chunk
+
+    def iter_body(self) -> t.Iterator[bytes]:
+        """Iterate over raw body chunks of a sync body stream.
+
+        :raises ResponseException: Body stream is async.
+        """
+        if self.is_async:
+            raise ResponseException("Async body stream requires aiter_chunks().")
+
+        return iter(t.cast(t.Iterable[bytes], self._stream))
+
+    def iter_chunks(self) -> t.Iterator[bytes]:
+        """Iterate over body chunks framed for the wire.
+
+        Chunked payload data is yielded as is between the size line and CRLF, so
+        it is never copied.
+        """
+        chunked = self.is_chunked
+
+        for data in self.iter_body():
+            if data:
+                yield from encode_chunk(data) if chunked else (data,)
+
+        if chunked:
+            yield LAST_CHUNK
+
+    async def aiter_chunks(self) -> t.AsyncIterator[bytes]:
+        """Iterate over body chunks framed for the wire from any body stream."""
+        if not self.is_async:
+            for data in self.iter_chunks():
+                yield data
+
+            return
+
+        chunked = self.is_chunked
+
+        async for data in t.cast(t.AsyncIterable[bytes], self._stream):
+            if data:
+                for part in encode_chunk(data) if chunked else (data,):
+                    yield part
+
+        if chunked:
+            yield LAST_CHUNK
+
+
+def encode_chunk(data: bytes) -> t.Tuple[bytes, bytes, bytes]:
+    """Frame data as a single chunk of chunked transfer coding."""
+    return b"%X\r\n" % len(data), data, b"\r\n"
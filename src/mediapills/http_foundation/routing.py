@@ -0,0 +1,295 @@
+# Copyright (c) 2021-2021 Mediapills HttpFoundation.
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import re
+import typing as t
+import uuid
+from urllib.parse import unquote
+
+from mediapills.http_foundation.requests import BaseRequest
+from mediapills.http_foundation.requests import HTTPRequestMethod
+from mediapills.http_foundation.requests import METHOD_GET
+from mediapills.http_foundation.requests import METHOD_HEAD
+from mediapills.http_foundation.responses import BaseHTTPResponse
+from mediapills.http_foundation.responses import HTTP_CODE_METHOD_NOT_ALLOWED
+from mediapills.http_foundation.responses import HTTP_CODE_NOT_FOUND
+from mediapills.http_foundation.responses import HTTP_CODE_OK
+
+Handler = t.Callable[
+    [BaseRequest], t.Union[BaseHTTPResponse, t.Awaitable[BaseHTTPResponse]]
+]
+
+"""Function turning a path segment into a parameter value, ValueError if invalid."""
+Converter = t.Callable[[str], t.Any]
+
+_PARAMETER = re.compile(r"\{([A-Za-z_][A-Za-z0-9_]*)(?::([A-Za-z_][A-Za-z0-9_]*))?\}\Z")
+_DIGITS = re.compile(r"[0-9]+\Z")
+
+
+def _convert_str(value: str) -> str:
+    """Accept any non-empty segment."""
+    if not value:
+        raise ValueError("Empty path segment.")
+
+    return value
+
+
+def _convert_int(value: str) -> int:
+    """Accept a segment of ASCII digits."""
+    if not _DIGITS.match(value):
+        raise ValueError("Not an integer path segment.")
+
+    return int(value)
+
+
+"""Name of the converter matching the rest of the path, slashes included."""
+CONVERTER_PATH = "path"
+
+"""Converters available in route patterns as {name:converter}."""
+CONVERTERS: t.Dict[str, Converter] = {
+    "str": _convert_str,
+    "int": _convert_int,
+    "uuid": uuid.UUID,
+    CONVERTER_PATH: _convert_str,
+}
+
+
+class RouteMatch(t.NamedTuple):
+    """Result of matching a request method and path."""
+
+    code: int
+    handler: t.Optional[Handler]
+    attributes: t.Dict[str, t.Any]
+    allowed: t.Tuple[str, ...]
+
+
+class _Node:
+    """Path segment node of the routing tree."""
+
+    __slots__ = ("static", "parameters", "rest", "handlers")
+
+    def __init__(self) -> None:
+        """Class constructor."""
+        self.static: t.Dict[str, _Node] = {}
+        self.parameters: t.List[t.Tuple[str, str, Converter, _Node]] = []
+        self.rest: t.Optional[t.Tuple[str, _Node]] = None
+        self.handlers: t.Dict[str, Handler] = {}
+
+
+class Router:
+    """Dispatch requests to handlers by method and path info.
+
+    Route patterns are split into segments stored in a tree, static segments
+    are looked up in a dict, so matching costs grow with the path length and
+    not with the number of routes. Static segments win over {parameter} ones,
+    which win over a trailing {name:path}. A router is itself a handler.
+    """
+
+    def __init__(self, converters: t.Optional[t.Mapping[str, Converter]] = None):
+        """Class constructor.
+
+        :param None or dict converters: Converters added to CONVERTERS.
+        """
+        self._converters = dict(CONVERTERS)
+        self._converters.update(converters or {})
+        self._root = _Node()
+
+    def add(
+        self,
+        pattern: str,
+        handler: Handler,
+        methods: t.Iterable[t.Union[str, HTTPRequestMethod]] = (METHOD_GET,),
+    ) -> None:
+        """Register handler of the route pattern.
+
+        :param str pattern:       Path like /users/{id:int}/files/{name:path}.
+        :param callable handler:  Sync or async request handler.
+        :param iterable methods:  Request methods served by the handler.
+        :raises ValueError: Malformed pattern or duplicate route.
+        """
+        node = self._root
+        segments = pattern.split("/")
+
+        for i, segment in enumerate(segments):
+            match = _PARAMETER.match(segment)
+            if match is None:
+                if "{" in segment or "}" in segment:
+                    raise ValueError("Malformed route segment: %s" % segment)
+
+                node = node.static.setdefault(segment, _Node())
+                continue
+
+            name, converter = match.group(1), match.group(2) or "str"
+            if converter not in self._converters:
+                raise ValueError("Unknown route converter: %s" % converter)
+
+            if converter == CONVERTER_PATH:
+                if i != len(segments) - 1:
+                    raise ValueError("Path parameter must end the route pattern.")
+
+                if node.rest is None:
+                    node.rest = (name, _Node())
+                node = node.rest[1]
+                continue
+
+            for parameter in node.parameters:
+                if parameter[:2] == (name, converter):
+                    node = parameter[3]
+                    break
+            else:
+                child = _Node()
+                node.parameters.append(
+                    (name, converter, self._converters[converter], child)
+                )
+                node = child
+
+        for method in methods:
+            name = method.value if isinstance(method, HTTPRequestMethod) else method
+            if name in node.handlers:
+                raise ValueError("Duplicate route: %s %s" % (name, pattern))
+
+            node.handlers[name] = handler
+
+    def route(
+        self,
+        pattern: str,
+        methods: t.Iterable[t.Union[str, HTTPRequestMethod]] = (METHOD_GET,),
+    ) -> t.Callable[[Handler], Handler]:
+        """Register the decorated handler of the route pattern."""
+
+        def decorator(handler: Handler) -> Handler:
+            self.add(pattern, handler, methods)
+            return handler
+
+        return decorator
+
+    def match(self, method: str, path: str) -> RouteMatch:
+        """Find handler of the method and path.
+
+        :return: Match with code 200, 404 or 405 and the allowed methods.
+        """
+        segments = path.split("/")
+        if "%" in path:
+            # Splitting first keeps encoded slashes inside their segment.
+            segments = [unquote(segment) for segment in segments]
+
+        attributes: t.Dict[str, t.Any] = {}
+        allowed: t.List[str] = []
+        node = _lookup(self._root, segments, 0, method, attributes, allowed)
+        if node is None:
+            if allowed:
+                return RouteMatch(
+                    HTTP_CODE_METHOD_NOT_ALLOWED, None, {}, tuple(allowed)
+                )
+
+            return RouteMatch(HTTP_CODE_NOT_FOUND, None, {}, ())
+
+        handlers = node.handlers
+        handler = handlers.get(method)
+        if handler is None:
+            handler = handlers[METHOD_GET]
+
+        return RouteMatch(HTTP_CODE_OK, handler, attributes, _allowed_methods(handlers))
+
+    def __call__(
+        self, request: BaseRequest
+    ) -> t.Union[BaseHTTPResponse, t.Awaitable[BaseHTTPResponse]]:
+        """Call handler of the request with route parameters in its attributes.
+
+        Unmatched requests get a 404 response, or a 405 response with an Allow
+        header when the path matches routes of other methods only.
+        """
+        match = self.match(request.method, request.path_info)
+
+        if match.handler is not None:
+            request.attributes.update(match.attributes)
+            return match.handler(request)
+
+        response = BaseHTTPResponse(code=match.code)
+        if match.code == HTTP_CODE_METHOD_NOT_ALLOWED:
+            response.headers["Allow"] = ", ".join(match.allowed)
+
+        return response
+
+
+def _lookup(
+    node: _Node,
+    segments: t.List[str],
+    i: int,
+    method: str,
+    attributes: t.Dict[str, t.Any],
+    allowed: t.List[str],
+) -> t.Optional[_Node]:
+    """Return node of the path segments serving the method, collecting parameters.
+
+    Branches matching the path with other methods only are backtracked from,
+    their methods are collected in allowed for a 405 response.
+    """
+    if i == len(segments):
+        return node if _serves(node, method, allowed) else None
+
+    segment = segments[i]
+
+    child = node.static.get(segment)
+    if child is not None:
+        found = _lookup(child, segments, i + 1, method, attributes, allowed)
+        if found is not None:
+            return found
+
+    for name, _, convert, child in node.parameters:
+        try:
+            attributes[name] = convert(segment)
+        except ValueError:
+            continue
+
+        found = _lookup(child, segments, i + 1, method, attributes, allowed)
+        if found is not None:
+            return found
+
+        del attributes[name]
+
+    if node.rest is not None and segment and _serves(node.rest[1], method, allowed):
+        name, child = node.rest
+        attributes[name] = "/".join(segments[i:])
+        return child
+
+    return None
+
+
+def _serves(node: _Node, method: str, allowed: t.List[str]) -> bool:
+    """Check that the node has a handler of the method, HEAD falling back to GET.
+
+    Methods of a node that does not serve the method are added to allowed.
+    """
+    handlers = node.handlers
+    if method in handlers or (method == METHOD_HEAD and METHOD_GET in handlers):
+        return True
+
+    allowed.extend(m for m in _allowed_methods(handlers) if m not in allowed)
+    return False
+
+
+def _allowed_methods(handlers: t.Mapping[str, t.Any]) -> t.Tuple[str, ...]:
+    """Return methods of the handlers, with HEAD when GET is handled."""
+    allowed = tuple(handlers)
+    if METHOD_GET in handlers and METHOD_HEAD not in handlers:
+        allowed += (METHOD_HEAD,)
+
+    return allowed
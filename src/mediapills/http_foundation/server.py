@@ -0,0 +1,608 @@
+# Copyright (c) 2021-2021 Mediapills HttpFoundation.
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import asyncio
+import collections
+import os
+import signal
+import typing as t
+
+from mediapills.http_foundation.exceptions import ProtocolException
+from mediapills.http_foundation.file_responses import FileResponse
+from mediapills.http_foundation.metrics import now_ns
+from mediapills.http_foundation.metrics import RequestMetrics
+from mediapills.http_foundation.metrics import STAGE_BODY
+from mediapills.http_foundation.metrics import STAGE_HANDLER
+from mediapills.http_foundation.metrics import STAGE_REQUEST
+from mediapills.http_foundation.metrics import STAGE_WRITE
+from mediapills.http_foundation.parser import HeadersComplete
+from mediapills.http_foundation.parser import MessageComplete
+from mediapills.http_foundation.parser import RequestLine
+from mediapills.http_foundation.parser import RequestParser
+from mediapills.http_foundation.requests import BaseRequest
+from mediapills.http_foundation.requests import METHOD_HEAD
+from mediapills.http_foundation.responses import BaseHTTPResponse
+from mediapills.http_foundation.responses import HTTP_CODE_INTERNAL_SERVER_ERROR
+from mediapills.http_foundation.responses import StreamedResponse
+
+"""Number of received requests waiting for a response before reading pauses."""
+DEFAULT_MAX_PIPELINE = 16
+
+"""Seconds an idle keep-alive connection stays open."""
+DEFAULT_KEEP_ALIVE_TIMEOUT = 5.0
+
+"""Seconds a client has to send a request head or the next piece of a body."""
+DEFAULT_READ_TIMEOUT = 30.0
+
+"""Seconds graceful shutdown waits for in-flight responses."""
+DEFAULT_SHUTDOWN_TIMEOUT = 30.0
+
+Handler = t.Callable[
+    [BaseRequest], t.Union[BaseHTTPResponse, t.Awaitable[BaseHTTPResponse]]
+]
+
+"""Interim response asking a client that sent Expect: 100-continue for the body."""
+CONTINUE_RESPONSE = b"HTTP/1.1 100 Continue\r\n\r\n"
+
+"""Clock readings of request line, header section and body receipt."""
+_Received = t.Tuple[int, int, int]
+
+
+def new_event_loop() -> asyncio.AbstractEventLoop:
+    """Return uvloop event loop when it is installed, the default one otherwise."""
+    try:
+        import uvloop
+    except ImportError:
+        return asyncio.new_event_loop()
+
+    return t.cast(asyncio.AbstractEventLoop, uvloop.new_event_loop())
+
+
+class HTTPProtocol(asyncio.Protocol):
+    """HTTP/1.1 connection serving requests with a handler.
+
+    Requests of a connection are answered one at a time in the order they were
+    received, so pipelined responses never interleave. Reading is paused while
+    max_pipeline requests wait for a response and writing waits for the transport
+    buffer to drain, so a slow client can not make the server buffer without limit.
+    File bodies are sent with loop.sendfile() where the event loop provides it.
+    A request head has to arrive within read_timeout seconds, body pieces no more
+    than read_timeout seconds apart, so a client can not hold the connection by
+    trickling a partial message.
+    """
+
+    def __init__(
+        self,
+        handler: Handler,
+        max_pipeline: int = DEFAULT_MAX_PIPELINE,
+        keep_alive_timeout: float = DEFAULT_KEEP_ALIVE_TIMEOUT,
+        on_connection_lost: t.Optional[t.Callable[["HTTPProtocol"], None]] = None,
+        metrics: t.Optional[RequestMetrics] = None,
+        read_timeout: float = DEFAULT_READ_TIMEOUT,
+        **parser_options: t.Any
+    ):
+        """Class constructor.
+
+        :param callable handler:                    Sync or async request handler.
+        :param int max_pipeline:                    Queued requests before pausing.
+        :param float keep_alive_timeout:            Idle connection lifetime in seconds.
+        :param None or callable on_connection_lost: Called with the closed protocol.
+        :param None or RequestMetrics metrics:      Stage timings recorder.
+        :param float read_timeout:                  Partial message timeout in seconds.
+        :param parser_options:                      Limits passed to RequestParser.
+        """
+        self._handler = handler
+        self._on_connection_lost = on_connection_lost
+        self._metrics = metrics
+        self._max_pipeline = max_pipeline
+        self._keep_alive_timeout = keep_alive_timeout
+        self._read_timeout = read_timeout
+        self._parser_options = parser_options
+
+        self._transport: t.Optional[asyncio.Transport] = None
+        self._parser: t.Optional[RequestParser] = None
+        self._queue: t.Deque[
+            t.Tuple[BaseRequest, bool, _Received]
+        ] = collections.deque()
+        self._error: t.Optional[ProtocolException] = None
+        self._keep_alive = False
+        self._reading_body = False
+        self._expects_continue = False
+        self._received: t.List[int] = [0, 0]
+        self._worker: t.Optional["asyncio.Future[None]"] = None
+        self._idle_timer: t.Optional[asyncio.TimerHandle] = None
+        self._read_timer: t.Optional[asyncio.TimerHandle] = None
+        self._writable = asyncio.Event()
+        self._writable.set()
+        self._reading_paused = False
+        self._closing = False
+        self._head_written = False
+
+    @property
+    def is_idle(self) -> bool:
+        """Is the connection waiting for a new request?"""
+        return (
+            self._worker is None
+            and not self._queue
+            and (self._parser is None or self._parser.is_idle)
+        )
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        """Start parsing requests of the connection."""
+        self._transport = t.cast(asyncio.Transport, transport)
+
+        environ: t.Dict[str, t.Any] = {}
+        sockname = transport.get_extra_info("sockname")
+        if isinstance(sockname, tuple):
+            environ["SERVER_NAME"], environ["SERVER_PORT"] = sockname[0], str(
+                sockname[1]
+            )
+
+        peername = transport.get_extra_info("peername")
+        if isinstance(peername, tuple):
+            environ["REMOTE_ADDR"], environ["REMOTE_PORT"] = peername[0], str(
+                peername[1]
+            )
+
+        if transport.get_extra_info("sslcontext") is not None:
+            environ["wsgi.url_scheme"] = "https"
+            environ["HTTPS"] = "on"
+
+        self._parser = RequestParser(environ, **self._parser_options)
+        self._start_idle_timer()
+
+    def data_received(self, data: bytes) -> None:
+        """Parse received bytes and queue complete requests."""
+        if self._parser is None or self._error is not None:
+            return
+
+        self._cancel_idle_timer()
+
+        # A request line is timed from the arrival of its data, so parsing and
+        # building the request object count towards the request stage.
+        arrived = now_ns() if self._metrics is not None else 0
+        try:
+            events = self._parser.feed(data)
+        except ProtocolException as e:
+            events, self._error = [], e
+
+        now = now_ns() if self._metrics is not None else 0
+        restart = self._reading_body
+        for event in events:
+            if isinstance(event, RequestLine):
+                self._received[0] = arrived
+            elif isinstance(event, HeadersComplete):
+                self._keep_alive = event.keep_alive
+                self._received[1] = now
+                self._reading_body = restart = True
+                self._expects_continue = _expects_continue(event.request)
+            elif isinstance(event, MessageComplete):
+                received = (self._received[0], self._received[1], now)
+                self._queue.append((event.request, self._keep_alive, received))
+                self._reading_body, restart = False, True
+                self._expects_continue = False
+
+        # Pipelined responses are written first, the worker sends it after them.
+        if self._expects_continue and self._worker is None and not self._queue:
+            self._write_continue()
+
+        # The head deadline is not moved by trickled bytes, body pieces restart it.
+        if self._error is not None or self._parser.is_idle:
+            self._cancel_read_timer()
+        elif restart or self._read_timer is None:
+            self._start_read_timer()
+
+        if self._error is not None or len(self._queue) >= self._max_pipeline:
+            self._pause_reading()
+
+        if self._worker is None and (self._queue or self._error is not None):
+            self._worker = asyncio.ensure_future(self._respond())
+
+    def eof_received(self) -> t.Optional[bool]:
+        """Close the connection once queued requests are answered."""
+        self._closing = True
+        if self._worker is None:
+            self._close()
+
+        return True
+
+    def connection_lost(self, exc: t.Optional[Exception]) -> None:
+        """Abandon queued requests of a closed connection."""
+        self._cancel_idle_timer()
+        self._cancel_read_timer()
+        self._queue.clear()
+        self._writable.set()
+        self._transport = None
+
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+
+        if self._on_connection_lost is not None:
+            self._on_connection_lost(self)
+
+    def pause_writing(self) -> None:
+        """Stop writing response bodies until the transport buffer drains."""
+        self._writable.clear()
+
+    def resume_writing(self) -> None:
+        """Continue writing response bodies."""
+        self._writable.set()
+
+    def shutdown(self) -> None:
+        """Close the connection once the queued requests are answered."""
+        self._closing = True
+        if self.is_idle:
+            self._close()
+
+    def abort(self) -> None:
+        """Close the connection immediately, dropping buffered data."""
+        if self._transport is not None:
+            self._transport.abort()
+
+    async def _respond(self) -> None:
+        """Answer queued requests one by one."""
+        try:
+            while self._queue and self._transport is not None:
+                request, keep_alive, received = self._queue.popleft()
+                if len(self._queue) < self._max_pipeline:
+                    self._resume_reading()
+
+                started = now_ns() if self._metrics is not None else 0
+                response = await self._handle(request)
+                handled = now_ns() if self._metrics is not None else 0
+
+                keep_alive = self._prepare(request, response, keep_alive)
+                if not await self._send(request, response):
+                    return
+
+                if self._metrics is not None:
+                    self._observe(request, response.code, received, started, handled)
+
+                if not keep_alive:
+                    self._close()
+                    return
+
+                if self._expects_continue and not self._queue:
+                    self._write_continue()
+
+            if self._error is not None:
+                response = BaseHTTPResponse(str(self._error), self._error.code)
+                response.headers["Connection"] = "close"
+                await self._write(None, response)
+                self._close()
+                return
+        finally:
+            self._worker = None
+
+        if self._closing:
+            self._close()
+        else:
+            self._start_idle_timer()
+
+    async def _handle(self, request: BaseRequest) -> BaseHTTPResponse:
+        """Call the handler, turning its errors into 500 responses."""
+        try:
+            result = self._handler(request)
+            if isinstance(result, BaseHTTPResponse):
+                return result
+
+            return await result
+        except Exception as e:
+            asyncio.get_event_loop().call_exception_handler(
+                {"message": "Unhandled exception in request handler.", "exception": e}
+            )
+
+        response = BaseHTTPResponse(code=HTTP_CODE_INTERNAL_SERVER_ERROR)
+        response.headers["Connection"] = "close"
+
+        return response
+
+    async def _send(self, request: BaseRequest, response: BaseHTTPResponse) -> bool:
+        """Write the response, closing the connection when writing fails.
+
+        :return: True when the response was written.
+        """
+        self._head_written = False
+        try:
+            await self._write(request, response)
+            return True
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            asyncio.get_event_loop().call_exception_handler(
+                {"message": "Unhandled exception in response body.", "exception": e}
+            )
+
+        if self._head_written:
+            # The client can only tell a truncated body by the connection drop.
+            self.abort()
+            return False
+
+        response = BaseHTTPResponse(code=HTTP_CODE_INTERNAL_SERVER_ERROR)
+        self._prepare(request, response, False)
+        await self._write(request, response)
+        self._close()
+
+        return False
+
+    def _prepare(
+        self, request: BaseRequest, response: BaseHTTPResponse, keep_alive: bool
+    ) -> bool:
+        """Set protocol version and Connection header, return keep-alive flag."""
+        version = request.server.get("SERVER_PROTOCOL", "HTTP/1.0")
+        response.protocol_version = "1.1" if version == "HTTP/1.1" else "1.0"
+
+        connection = response.headers.get("Connection", "").lower()
+        if self._closing or "close" in connection:
+            keep_alive = False
+
+        # Without chunked coding the end of a body of unknown size is marked
+        # by closing the connection.
+        if (
+            isinstance(response, StreamedResponse)
+            and response.content_length is None
+            and not response.is_chunked
+        ):
+            keep_alive = False
+
+        if not keep_alive:
+            response.headers["Connection"] = "close"
+        elif response.protocol_version == "1.0":
+            response.headers["Connection"] = "keep-alive"
+
+        return keep_alive
+
+    async def _write(
+        self, request: t.Optional[BaseRequest], response: BaseHTTPResponse
+    ) -> None:
+        """Write serialized response to the transport."""
+        try:
+            if not isinstance(response, StreamedResponse):
+                await self._writable.wait()
+                if self._transport is not None:
+                    self._transport.writelines(response.serialize(request))
+                    self._head_written = True
+                return
+
+            # Loops that do not derive from BaseEventLoop, like uvloop, inherit
+            # AbstractEventLoop.sendfile() which raises NotImplementedError.
+            loop = asyncio.get_event_loop()
+            if (
+                isinstance(response, FileResponse)
+                and response.sends_file
+                and isinstance(loop, asyncio.BaseEventLoop)
+                and hasattr(loop, "sendfile")
+            ):
+                await self._sendfile(loop, request, response)
+                return
+
+            await self._write_chunks(response.aiter_wire_chunks(request))
+        finally:
+            if isinstance(response, FileResponse):
+                response.close()
+
+    async def _sendfile(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        request: t.Optional[BaseRequest],
+        response: FileResponse,
+    ) -> None:
+        """Write response head and let the event loop send the file body."""
+        response.prepare(request)
+
+        await self._writable.wait()
+        if self._transport is None:
+            return
+
+        self._transport.writelines([response.status_line, response.headers.encode()])
+        self._head_written = True
+
+        count = response.content_length
+        if (
+            not count
+            or not response.has_body
+            or (request is not None and request.method == METHOD_HEAD)
+        ):
+            return
+
+        with os.fdopen(response.fileno, "rb", closefd=False) as file:
+            try:
+                await loop.sendfile(self._transport, file, response.offset, count)
+            except NotImplementedError:
+                # Nothing of the body was sent yet, it is streamed after the head.
+                await self._write_chunks(response.aiter_chunks())
+
+    async def _write_chunks(self, chunks: t.AsyncIterator[bytes]) -> None:
+        """Write chunks to the transport, waiting for its buffer to drain."""
+        async for chunk in chunks:
+            await self._writable.wait()
+            if self._transport is None:
+                return
+
+            self._transport.write(chunk)
+            self._head_written = True
+
+    def _write_continue(self) -> None:
+        """Ask the client for the body of the request being received."""
+        self._expects_continue = False
+        if self._transport is not None and self._error is None:
+            self._transport.write(CONTINUE_RESPONSE)
+
+    def _observe(
+        self,
+        request: BaseRequest,
+        code: int,
+        received: _Received,
+        started: int,
+        handled: int,
+    ) -> None:
+        """Record timings of the answered request."""
+        metrics = t.cast(RequestMetrics, self._metrics)
+        method = request.method
+        line, head, body = received
+
+        metrics.observe(STAGE_REQUEST, method, code, head - line)
+        metrics.observe(STAGE_BODY, method, code, body - head)
+        metrics.observe(STAGE_HANDLER, method, code, handled - started)
+        metrics.observe(STAGE_WRITE, method, code, now_ns() - handled)
+
+    def _pause_reading(self) -> None:
+        """Stop receiving data from the client."""
+        if not self._reading_paused and self._transport is not None:
+            self._transport.pause_reading()
+            self._reading_paused = True
+            self._cancel_read_timer()
+
+    def _resume_reading(self) -> None:
+        """Continue receiving data from the client."""
+        if self._reading_paused and self._transport is not None and not self._error:
+            self._transport.resume_reading()
+            self._reading_paused = False
+            if self._parser is not None and not self._parser.is_idle:
+                self._start_read_timer()
+
+    def _start_idle_timer(self) -> None:
+        """Close the connection when no request arrives in time."""
+        self._cancel_idle_timer()
+        self._idle_timer = asyncio.get_event_loop().call_later(
+            self._keep_alive_timeout, self._close
+        )
+
+    def _cancel_idle_timer(self) -> None:
+        """Stop the idle connection timer."""
+        if self._idle_timer is not None:
+            self._idle_timer.cancel()
+            self._idle_timer = None
+
+    def _start_read_timer(self) -> None:
+        """Close the connection when the rest of a message does not arrive in time."""
+        self._cancel_read_timer()
+        self._read_timer = asyncio.get_event_loop().call_later(
+            self._read_timeout, self._close
+        )
+
+    def _cancel_read_timer(self) -> None:
+        """Stop the partial message timer."""
+        if self._read_timer is not None:
+            self._read_timer.cancel()
+            self._read_timer = None
+
+    def _close(self) -> None:
+        """Close the transport once buffered data is sent."""
+        self._cancel_idle_timer()
+        self._cancel_read_timer()
+        if self._transport is not None:
+            self._transport.close()
+
+
+def _expects_continue(request: BaseRequest) -> bool:
+    """Check that the client waits for 100 Continue before sending the body."""
+    server = request.server
+    return (
+        server.get("SERVER_PROTOCOL") == "HTTP/1.1"
+        and server.get("HTTP_EXPECT", "").lower() == "100-continue"
+    )
+
+
+class HTTPServer:
+    """asyncio HTTP/1.1 server answering requests with a handler.
+
+    shutdown() stops accepting connections, closes idle ones and gives in-flight
+    requests time to be answered before the remaining connections are aborted.
+    """
+
+    def __init__(
+        self,
+        handler: Handler,
+        host: str = "127.0.0.1",
+        port: int = 8000,
+        **protocol_options: t.Any
+    ):
+        """Class constructor.
+
+        :param callable handler:  Function or coroutine returning a response.
+        :param str host:          Interface to listen on.
+        :param int port:          Port to listen on.
+        :param protocol_options:  Options passed to HTTPProtocol.
+        """
+        self._handler = handler
+        self._host = host
+        self._port = port
+        self._protocol_options = protocol_options
+        self._server: t.Optional[asyncio.AbstractServer] = None
+        self._connections: t.Set[HTTPProtocol] = set()
+
+    @property
+    def sockets(self) -> t.List[t.Any]:
+        """Return listening sockets."""
+        return list(getattr(self._server, "sockets", None) or [])
+
+    async def start(self) -> None:
+        """Start accepting connections."""
+        loop = asyncio.get_event_loop()
+        self._server = await loop.create_server(
+            self._create_protocol, self._host, self._port
+        )
+
+    async def shutdown(self, timeout: float = DEFAULT_SHUTDOWN_TIMEOUT) -> None:
+        """Stop the server, waiting up to timeout seconds for in-flight requests."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+        for connection in list(self._connections):
+            connection.shutdown()
+
+        loop = asyncio.get_event_loop()
+        deadline = loop.time() + timeout
+        while self._connections and loop.time() < deadline:
+            await asyncio.sleep(0.05)
+
+        for connection in list(self._connections):
+            connection.abort()
+
+    def run(self) -> None:
+        """Serve until SIGINT or SIGTERM, then shut down gracefully."""
+        loop = new_event_loop()
+        asyncio.set_event_loop(loop)
+        stopped = asyncio.Event()
+
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, stopped.set)
+
+        try:
+            loop.run_until_complete(self.start())
+            loop.run_until_complete(stopped.wait())
+            loop.run_until_complete(self.shutdown())
+        finally:
+            loop.close()
+
+    def _create_protocol(self) -> HTTPProtocol:
+        """Create protocol of a new connection."""
+        protocol = HTTPProtocol(
+            self._handler,
+            on_connection_lost=self._connections.discard,
+            **self._protocol_options
+        )
+        self._connections.add(protocol)
+
+        return protocol
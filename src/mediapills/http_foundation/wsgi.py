@@ -0,0 +1,85 @@
+# Copyright (c) 2021-2021 Mediapills HttpFoundation.
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import typing as t
+
+from mediapills.http_foundation.bodies import DEFAULT_CHUNK_SIZE
+from mediapills.http_foundation.bodies import RequestBody
+from mediapills.http_foundation.requests import BaseRequest
+
+
+class WSGIRequest(BaseRequest):
+    """Request built from a WSGI environ dictionary (PEP 3333).
+
+    The environ is used as the server dictionary by reference. GET and POST
+    parameters, cookies and the body are parsed only the first time the matching
+    property is read, so handlers pay only for the parts of the request they use.
+    """
+
+    __slots__ = ()
+
+    def __init__(
+        self,
+        environ: t.Dict[str, t.Any],
+        attributes: t.Optional[t.Dict[str, str]] = None,
+    ):
+        """Class constructor.
+
+        :param dict environ:            WSGI environment of the current request.
+        :param None or dict attributes: Arguments to be interpreted by the CGI script.
+        """
+        super().__init__(attributes=attributes, server=environ)
+
+    def _load_payload(self) -> RequestBody:
+        """Copy CONTENT_LENGTH bytes from the wsgi.input stream in chunks."""
+        payload = RequestBody(max_memory_size=self.max_memory_size)
+
+        for chunk in self._read_input():
+            payload.write(chunk)
+
+        return payload
+
+    def _iter_payload(self) -> t.Iterator[bytes]:
+        """Stream the form body straight from wsgi.input unless already read.
+
+        Like PHP does for multipart bodies, the raw payload is left empty once
+        the stream is consumed by the form parser.
+        """
+        if self._payload is not None:
+            return self._payload.iter_chunks()
+
+        self._payload = RequestBody(max_memory_size=self.max_memory_size)
+
+        return self._read_input()
+
+    def _read_input(self) -> t.Iterator[bytes]:
+        """Read CONTENT_LENGTH bytes from the wsgi.input stream in chunks."""
+        stream = t.cast(t.Optional[t.BinaryIO], self.server.get("wsgi.input"))
+        if stream is None:
+            return
+
+        remaining = self.content_length
+        while remaining > 0:
+            chunk = stream.read(min(remaining, DEFAULT_CHUNK_SIZE))
+            if not chunk:
+                break
+
+            yield chunk
+            remaining -= len(chunk)
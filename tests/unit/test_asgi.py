@@ -0,0 +1,116 @@
+# Copyright (c) 2021-2021 Mediapills HttpFoundation.
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import asyncio
+import typing as t
+import unittest
+
+from mediapills.http_foundation import asgi
+from mediapills.http_foundation import exceptions
+
+
+def run(coroutine: t.Awaitable[t.Any]) -> t.Any:
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+class TestASGIRequest(unittest.TestCase):
+    def request(self, *messages: t.Dict[str, t.Any]) -> asgi.ASGIRequest:
+        queue = list(messages)
+
+        async def receive() -> t.Dict[str, t.Any]:
+            return queue.pop(0)
+
+        scope = {
+            "type": "http",
+            "method": "POST",
+            "http_version": "1.1",
+            "path": "/upload",
+            "root_path": "/app",
+            "query_string": b"a=1&b=2",
+            "server": ("localhost", 8000),
+            "headers": [
+                (b"Content-Type", b"application/x-www-form-urlencoded"),
+                (b"cookie", b"session=abc"),
+                (b"Cookie", b"theme=dark"),
+                (b"X-Tag", b"one"),
+                (b"x-tag", b"two"),
+            ],
+        }
+
+        return asgi.ASGIRequest(scope, receive)
+
+    def test_headers_and_server(self) -> None:
+        obj = self.request()
+
+        self.assertEqual(obj.method, "POST")
+        self.assertEqual(obj.headers["X-TAG"], "one")
+        self.assertEqual(obj.headers.get_all("x-tag"), ["one", "two"])
+        self.assertEqual(obj.query, {"a": "1", "b": "2"})
+        self.assertEqual(obj.cookies, {"session": "abc", "theme": "dark"})
+        self.assertEqual(obj.server["PATH_INFO"], "/upload")
+        self.assertEqual(obj.request_uri, "/app/upload?a=1&b=2")
+        self.assertEqual((obj.base_url, obj.path_info), ("/app", "/upload"))
+        self.assertEqual(obj.server["SERVER_PORT"], "8000")
+        self.assertEqual(obj.server["HTTP_X_TAG"], "one, two")
+        self.assertEqual(obj.server["HTTP_COOKIE"], "session=abc; theme=dark")
+        self.assertEqual(
+            obj.server["CONTENT_TYPE"], "application/x-www-form-urlencoded"
+        )
+
+    def test_stream(self) -> None:
+        obj = self.request(
+            {"type": "http.request", "body": b"x=1", "more_body": True},
+            {"type": "http.request", "body": b"&y=2"},
+        )
+
+        async def consume() -> t.List[bytes]:
+            return [chunk async for chunk in obj.stream()]
+
+        self.assertEqual(run(consume()), [b"x=1", b"&y=2"])
+        self.assertRaises(exceptions.RequestBodyException, run, obj.body())
+
+    def test_body(self) -> None:
+        obj = self.request(
+            {"type": "http.request", "body": b"x=1", "more_body": True},
+            {"type": "http.request", "body": b"&y=2"},
+        )
+
+        self.assertRaises(exceptions.RequestBodyException, lambda: obj.content)
+        self.assertEqual(run(obj.body()), b"x=1&y=2")
+        self.assertEqual(obj.content, "x=1&y=2")
+        self.assertEqual(obj.request, {"x": "1", "y": "2"})
+
+    def test_disconnect(self) -> None:
+        obj = self.request({"type": "http.disconnect"})
+
+        self.assertRaises(exceptions.ClientDisconnectedException, run, obj.body())
+
+    def test_form(self) -> None:
+        obj = self.request(
+            {"type": "http.request", "body": b"x=1&", "more_body": True},
+            {"type": "http.request", "body": b"y=2"},
+        )
+
+        self.assertEqual(run(obj.form()), {"x": "1", "y": "2"})
+        self.assertEqual(obj.files, {})
@@ -0,0 +1,57 @@
+# Copyright (c) 2021-2021 Mediapills HttpFoundation.
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import unittest
+
+from mediapills.http_foundation import bodies
+
+
+class TestRequestBody(unittest.TestCase):
+    def test_in_memory(self) -> None:
+        body = bodies.RequestBody(b"hello ", max_memory_size=16)
+        body.write(b"world")
+
+        self.assertFalse(body.is_spooled)
+        self.assertEqual(len(body), 11)
+        self.assertEqual(body.read(5), b"hello")
+        self.assertEqual(body.read(), b" world")
+        self.assertEqual(body.read(), b"")
+        self.assertEqual(body.getbuffer(), b"hello world")
+        self.assertEqual(list(body.iter_chunks(4)), [b"hell", b"o wo", b"rld"])
+        self.assertEqual(body.decode("utf-8"), "hello world")
+
+        chunks = body.iter_chunks(4)
+        self.assertIsInstance(next(chunks), bytes)
+        body.write(b"!")
+        self.assertEqual(list(chunks), [b"o wo", b"rld!"])
+
+    def test_spooled(self) -> None:
+        with bodies.RequestBody(max_memory_size=4) as body:
+            body.write(b"abc")
+            body.write(b"defgh")
+
+            self.assertTrue(body.is_spooled)
+            self.assertEqual(body.read(2), b"ab")
+            self.assertEqual(body.seek(6), 6)
+            self.assertEqual(body.read(10), b"gh")
+            self.assertEqual(list(body.iter_chunks(5)), [b"abcde", b"fgh"])
+            self.assertEqual(body.getvalue(), b"abcdefgh")
+
+        self.assertEqual(len(body), 0)
@@ -0,0 +1,173 @@
+# Copyright (c) 2021-2021 Mediapills HttpFoundation.
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import threading
+import typing as t
+import unittest
+
+from mediapills.http_foundation import caching
+from mediapills.http_foundation import requests
+from mediapills.http_foundation import responses
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def request(method: str = "GET", **server: str) -> requests.BaseRequest:
+    server.setdefault("REQUEST_URI", "/items")
+    server["REQUEST_METHOD"] = method
+
+    return requests.BaseRequest(server=server)
+
+
+def handler(
+    cache_control: str, **headers: str
+) -> t.Callable[[requests.BaseRequest], responses.BaseHTTPResponse]:
+    calls = []
+
+    def handle(req: requests.BaseRequest) -> responses.BaseHTTPResponse:
+        calls.append(req)
+        headers["Cache-Control"] = cache_control
+        return responses.BaseHTTPResponse("v%d" % len(calls), headers=headers)
+
+    return handle
+
+
+class TestResponseCache(unittest.TestCase):
+    def test_parse_cache_control(self) -> None:
+        self.assertEqual(
+            caching.parse_cache_control('Max-Age=60, private, foo="bar"'),
+            {"max-age": "60", "private": None, "foo": "bar"},
+        )
+
+    def test_fetch(self) -> None:
+        clock = Clock()
+        cache = caching.ResponseCache(clock=clock)
+        handle = handler("max-age=60")
+
+        self.assertEqual(cache.fetch(request(), handle).content, "v1")
+        clock.now += 30
+        hit = cache.fetch(request("HEAD"), handle)
+        self.assertEqual((hit.content, hit.headers["Age"]), ("v1", "30"))
+
+        clock.now += 31
+        self.assertEqual(cache.fetch(request(), handle).content, "v2")
+        self.assertEqual(
+            cache.fetch(request(HTTP_CACHE_CONTROL="no-cache"), handle).content, "v3"
+        )
+        self.assertEqual(cache.fetch(request("POST"), handle).content, "v4")
+
+    def test_not_stored(self) -> None:
+        cache = caching.ResponseCache()
+        cases = [
+            handler("no-store"),
+            handler("private, max-age=60"),
+            handler("max-age=60", Vary="*"),
+            handler("max-age=60", **{"Set-Cookie": "a=b"}),
+            handler(""),
+        ]
+
+        for handle in cases:
+            self.assertFalse(cache.store(request(), handle(request())))
+
+        self.assertTrue(
+            caching.ResponseCache(shared=False).store(
+                request(), handler("private, max-age=60")(request())
+            )
+        )
+        self.assertFalse(
+            cache.store(
+                request(HTTP_AUTHORIZATION="x"), handler("max-age=60")(request())
+            )
+        )
+        self.assertTrue(
+            cache.store(
+                request(HTTP_AUTHORIZATION="x"), handler("s-maxage=60")(request())
+            )
+        )
+
+    def test_vary_and_eviction(self) -> None:
+        cache = caching.ResponseCache(max_size=120)
+        handle = handler("max-age=60", Vary="Accept-Language")
+
+        cache.fetch(request(HTTP_ACCEPT_LANGUAGE="en"), handle)
+        cache.fetch(request(HTTP_ACCEPT_LANGUAGE="de"), handle)
+        self.assertEqual(len(cache), 2)
+        hit = cache.get(request(HTTP_ACCEPT_LANGUAGE="en"))
+        self.assertEqual(hit.content if hit else None, "v1")
+        self.assertIsNone(cache.get(request(HTTP_ACCEPT_LANGUAGE="fr")))
+
+        cache.fetch(request(REQUEST_URI="/other"), handler("max-age=60"))
+        self.assertLessEqual(cache.size, 120)
+        self.assertIsNone(cache.get(request(HTTP_ACCEPT_LANGUAGE="de")))
+
+    def test_vary_change(self) -> None:
+        cache = caching.ResponseCache()
+        handle = handler("max-age=60", Vary="Accept-Language")
+
+        cache.fetch(request(HTTP_ACCEPT_LANGUAGE="en"), handle)
+        cache.fetch(request(HTTP_ACCEPT_LANGUAGE="de"), handle)
+        cache.store(request(), handler("max-age=60")(request()))
+
+        fresh = caching.ResponseCache()
+        fresh.store(request(), handler("max-age=60")(request()))
+
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.size, fresh.size)
+
+    def test_stale_while_revalidate(self) -> None:
+        clock = Clock()
+        cache = caching.ResponseCache(clock=clock)
+        started = threading.Event()
+        release = threading.Event()
+        handle = handler("max-age=10, stale-while-revalidate=30")
+
+        refreshed: t.List[requests.BaseRequest] = []
+
+        def slow(req: requests.BaseRequest) -> responses.BaseHTTPResponse:
+            refreshed.append(req)
+            started.set()
+            release.wait(5)
+            return handle(req)
+
+        cache.fetch(request(), handle)
+        clock.now += 20
+
+        live = request()
+        self.assertEqual(cache.fetch(live, slow).content, "v1")
+        live.server.clear()
+        self.assertTrue(started.wait(5))
+        self.assertIsNot(refreshed[0], live)
+        self.assertEqual(refreshed[0].server["REQUEST_URI"], "/items")
+        self.assertEqual(cache.fetch(request(), slow).content, "v1")
+        release.set()
+
+        for _ in range(100):
+            response = cache.get(request())
+            if response is not None:
+                break
+            threading.Event().wait(0.01)
+
+        self.assertEqual(response.content if response else None, "v2")
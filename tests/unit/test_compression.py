@@ -0,0 +1,149 @@
+# Copyright (c) 2021-2021 Mediapills HttpFoundation.
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import asyncio
+import gzip
+import os
+import tempfile
+import typing as t
+import unittest
+import zlib
+
+from mediapills.http_foundation import compression
+from mediapills.http_foundation import file_responses
+from mediapills.http_foundation import requests
+from mediapills.http_foundation import responses
+
+BODY = "lorem ipsum dolor sit amet " * 100
+
+
+def request(accept_encoding: str = "gzip, deflate") -> requests.BaseRequest:
+    return requests.BaseRequest(server={"HTTP_ACCEPT_ENCODING": accept_encoding})
+
+
+class TestResponseCompressor(unittest.TestCase):
+    def test_compress_body(self) -> None:
+        obj = responses.BaseHTTPResponse(BODY, headers={"Content-Type": "text/html"})
+        obj.set_etag("v1")
+
+        self.assertTrue(compression.ResponseCompressor().compress(obj, request()))
+        self.assertEqual(gzip.decompress(obj.body), BODY.encode())
+        self.assertEqual(obj.headers["Content-Encoding"], "gzip")
+        self.assertEqual(obj.headers["Vary"], "Accept-Encoding")
+        self.assertTrue(obj.headers["ETag"].startswith("W/"))
+
+        obj = responses.BaseHTTPResponse(BODY)
+        compression.ResponseCompressor().compress(obj, request("deflate"))
+        self.assertEqual(zlib.decompress(obj.body), BODY.encode())
+
+    def test_skip(self) -> None:
+        compressor = compression.ResponseCompressor()
+        cases = [
+            (responses.BaseHTTPResponse("small"), request()),
+            (responses.BaseHTTPResponse(BODY), request("br")),
+            (responses.BaseHTTPResponse(BODY), requests.BaseRequest()),
+            (
+                responses.BaseHTTPResponse(BODY, headers={"Content-Type": "image/png"}),
+                request(),
+            ),
+            (
+                responses.BaseHTTPResponse(BODY, headers={"Content-Encoding": "br"}),
+                request(),
+            ),
+        ]
+
+        for obj, req in cases:
+            self.assertFalse(compressor.compress(obj, req))
+            self.assertEqual(obj.body, BODY.encode() if len(obj.body) > 5 else b"small")
+
+    def test_skip_range(self) -> None:
+        fd, path = tempfile.mkstemp(suffix=".txt")
+        os.write(fd, BODY.encode())
+        os.close(fd)
+        self.addCleanup(os.unlink, path)
+
+        obj = file_responses.FileResponse(path)
+        self.addCleanup(obj.close)
+        req = requests.BaseRequest(
+            server={"HTTP_ACCEPT_ENCODING": "gzip", "HTTP_RANGE": "bytes=0-9"}
+        )
+
+        self.assertFalse(compression.ResponseCompressor().compress(obj, req))
+        obj.prepare(req)
+        self.assertEqual(obj.code, responses.HTTP_CODE_PARTIAL_CONTENT)
+        self.assertEqual(b"".join(obj.iter_body()), BODY.encode()[:10])
+
+    def test_file_response(self) -> None:
+        fd, path = tempfile.mkstemp(suffix=".css")
+        os.write(fd, BODY.encode())
+        os.close(fd)
+        self.addCleanup(os.unlink, path)
+
+        obj = file_responses.FileResponse(path)
+        self.addCleanup(obj.close)
+        req = request()
+
+        self.assertTrue(compression.ResponseCompressor().compress(obj, req))
+        obj.prepare(req)
+        self.assertIsNone(obj.content_length)
+        self.assertEqual(gzip.decompress(b"".join(obj.iter_body())), BODY.encode())
+
+    def test_stream(self) -> None:
+        chunks = [BODY.encode()] * 3
+        obj = responses.StreamedResponse(iter(chunks))
+        compression.ResponseCompressor().compress(obj, request())
+
+        self.assertIsNone(obj.content_length)
+        self.assertEqual(gzip.decompress(b"".join(obj.iter_body())), b"".join(chunks))
+
+        async def agen() -> t.AsyncIterator[bytes]:
+            for chunk in chunks:
+                yield chunk
+
+        async def collect() -> bytes:
+            return b"".join([chunk async for chunk in obj.aiter_chunks()])
+
+        obj = responses.StreamedResponse(agen())
+        compression.ResponseCompressor().compress(obj, request())
+        loop = asyncio.new_event_loop()
+        try:
+            data = loop.run_until_complete(collect())
+        finally:
+            loop.close()
+
+        self.assertEqual(gzip.decompress(data), b"".join(chunks))
+
+    def test_cache(self) -> None:
+        cache = compression.CompressionCache(max_size=4096)
+        compressor = compression.ResponseCompressor(cache=cache)
+
+        obj = responses.StreamedResponse(iter([BODY.encode()]), headers={"ETag": '"a"'})
+        compressor.compress(obj, request())
+        expected = b"".join(obj.iter_body())
+        self.assertEqual(len(cache), 1)
+
+        obj = responses.StreamedResponse(iter([b"unused"]), headers={"ETag": '"a"'})
+        compressor.compress(obj, request())
+        self.assertEqual(obj.content_length, len(expected))
+        self.assertEqual(b"".join(obj.iter_body()), expected)
+
+        cache.put(("b", "gzip"), b"x" * 4096)
+        self.assertEqual(len(cache), 1)
+        self.assertIsNone(cache.get(('"a"', "gzip")))
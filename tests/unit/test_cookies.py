@@ -0,0 +1,84 @@
+# Copyright (c) 2021-2021 Mediapills HttpFoundation.
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import datetime
+import unittest
+
+from mediapills.http_foundation import cookies
+from mediapills.http_foundation import requests
+from mediapills.http_foundation import responses
+
+
+class TestCookies(unittest.TestCase):
+    def test_parse_cookie_header(self) -> None:
+        self.assertEqual(
+            cookies.parse_cookie_header(
+                'sid=abc; theme="dark"; sid=shadowed; flag; =x; _ga=GA1.2.3=4'
+            ),
+            {"sid": "abc", "theme": "dark", "_ga": "GA1.2.3=4"},
+        )
+        self.assertEqual(cookies.parse_cookie_header(""), {})
+
+    def test_build_set_cookie(self) -> None:
+        self.assertEqual(
+            cookies.build_set_cookie(
+                "sid",
+                "abc",
+                max_age=60,
+                expires=datetime.datetime(2030, 1, 1, tzinfo=datetime.timezone.utc),
+                domain="example.com",
+                httponly=True,
+                samesite="lax",
+            ),
+            "sid=abc; Expires=Tue, 01 Jan 2030 00:00:00 GMT; Max-Age=60; Path=/; "
+            "Domain=example.com; SameSite=Lax; HttpOnly",
+        )
+        self.assertEqual(
+            cookies.build_set_cookie("a", "1", path=None, samesite="None"),
+            "a=1; SameSite=None; Secure",
+        )
+        self.assertIs(
+            cookies.cookie_attributes("/app", None, True),
+            cookies.cookie_attributes("/app", None, True),
+        )
+
+    def test_invalid(self) -> None:
+        self.assertRaises(ValueError, cookies.build_set_cookie, "a b", "1")
+        self.assertRaises(ValueError, cookies.build_set_cookie, "a", "1;2")
+        self.assertRaises(ValueError, cookies.build_set_cookie, "a", "1", path="/;x")
+        self.assertRaises(ValueError, cookies.build_set_cookie, "a", "1", samesite="x")
+
+    def test_request_cookies(self) -> None:
+        obj = requests.BaseRequest(server={"HTTP_COOKIE": "a=1; b=2"})
+
+        self.assertEqual(obj.cookies, {"a": "1", "b": "2"})
+
+    def test_response_cookies(self) -> None:
+        obj = responses.BaseHTTPResponse()
+        obj.set_cookie("a", "1", secure=True)
+        obj.delete_cookie("b")
+
+        self.assertEqual(
+            obj.headers.get_all("Set-Cookie"),
+            [
+                "a=1; Path=/; Secure",
+                "b=; Expires=Thu, 01 Jan 1970 00:00:00 GMT; Max-Age=0; Path=/",
+            ],
+        )
@@ -0,0 +1,106 @@
+# Copyright (c) 2021-2021 Mediapills HttpFoundation.
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import unittest
+
+from mediapills.http_foundation import etags
+from mediapills.http_foundation import requests
+from mediapills.http_foundation import responses
+
+
+class TestETags(unittest.TestCase):
+    def test_hasher(self) -> None:
+        hasher = etags.ETagHasher()
+        chunks = list(hasher.wrap(iter([b"hello ", b"world"])))
+
+        self.assertEqual(chunks, [b"hello ", b"world"])
+        self.assertEqual(hasher.etag, etags.generate_etag(b"hello world"))
+        self.assertTrue(etags.generate_etag(b"", weak=True).startswith('W/"'))
+
+    def test_match(self) -> None:
+        self.assertEqual(
+            etags.parse_etags('"a", W/"b",  "c,d"'), ['"a"', 'W/"b"', '"c,d"']
+        )
+        self.assertTrue(etags.strong_match('"a"', '"a"'))
+        self.assertFalse(etags.strong_match('W/"a"', 'W/"a"'))
+        self.assertTrue(etags.weak_match('W/"a"', '"a"'))
+        self.assertFalse(etags.weak_match('"a"', '"b"'))
+
+
+class TestConditionalRequests(unittest.TestCase):
+    def evaluate(
+        self, method: str = "GET", **server: str
+    ) -> responses.BaseHTTPResponse:
+        obj = responses.BaseHTTPResponse(
+            "payload",
+            headers={
+                "Content-Type": "text/plain",
+                "Last-Modified": "Wed, 21 Oct 2015 07:28:00 GMT",
+            },
+        )
+        obj.set_etag("v1")
+        server["REQUEST_METHOD"] = method
+        obj.is_not_modified(requests.BaseRequest(server=server))
+
+        return obj
+
+    def test_if_none_match(self) -> None:
+        obj = self.evaluate(HTTP_IF_NONE_MATCH='"v0", W/"v1"')
+
+        self.assertEqual(obj.code, responses.HTTP_CODE_NOT_MODIFIED)
+        self.assertEqual(obj.body, b"")
+        self.assertNotIn("Content-Type", obj.headers)
+        self.assertEqual(obj.headers["ETag"], '"v1"')
+
+        obj = self.evaluate("PUT", HTTP_IF_NONE_MATCH="*")
+        self.assertEqual(obj.code, responses.HTTP_CODE_PRECONDITION_FAILED)
+
+        obj = self.evaluate(HTTP_IF_NONE_MATCH='"v2"')
+        self.assertEqual(obj.code, responses.HTTP_CODE_OK)
+        self.assertEqual(obj.body, b"payload")
+
+    def test_if_modified_since(self) -> None:
+        obj = self.evaluate(HTTP_IF_MODIFIED_SINCE="Wed, 21 Oct 2015 07:28:00 GMT")
+        self.assertEqual(obj.code, responses.HTTP_CODE_NOT_MODIFIED)
+
+        obj = self.evaluate(HTTP_IF_MODIFIED_SINCE="Tue, 20 Oct 2015 07:28:00 GMT")
+        self.assertEqual(obj.code, responses.HTTP_CODE_OK)
+
+        obj = self.evaluate(HTTP_IF_MODIFIED_SINCE="garbage")
+        self.assertEqual(obj.code, responses.HTTP_CODE_OK)
+
+    def test_if_match(self) -> None:
+        obj = self.evaluate("PUT", HTTP_IF_MATCH='"v2"')
+        self.assertEqual(obj.code, responses.HTTP_CODE_PRECONDITION_FAILED)
+
+        obj = self.evaluate("PUT", HTTP_IF_MATCH='"v1"')
+        self.assertEqual(obj.code, responses.HTTP_CODE_OK)
+
+        obj = self.evaluate(
+            "PUT", HTTP_IF_UNMODIFIED_SINCE="Tue, 20 Oct 2015 07:28:00 GMT"
+        )
+        self.assertEqual(obj.code, responses.HTTP_CODE_PRECONDITION_FAILED)
+
+    def test_streamed_hash(self) -> None:
+        obj = responses.StreamedResponse(iter([b"a", b"b"]))
+        hasher = obj.hash_body()
+
+        self.assertEqual(b"".join(obj.iter_chunks()), b"ab")
+        self.assertEqual(hasher.etag, etags.generate_etag(b"ab"))
@@ -0,0 +1,78 @@
+# Copyright (c) 2021-2021 Mediapills HttpFoundation.
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import asyncio
+import typing as t
+import unittest
+
+from mediapills.http_foundation import event_stream_responses as sse
+
+
+def run(coroutine: t.Awaitable[t.Any]) -> t.Any:
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+class TestEventStreamResponse(unittest.TestCase):
+    def test_encode(self) -> None:
+        self.assertEqual(
+            sse.encode_event("a\nb", event="update", id="7", retry=100),
+            b"event: update\nid: 7\nretry: 100\ndata: a\ndata: b\n\n",
+        )
+        event = sse.ServerSentEvent("x")
+        self.assertIs(event.encode(), event.encode())
+
+        with self.assertRaises(ValueError):
+            sse.encode_event("x", event="a\rb")
+
+    def test_stream(self) -> None:
+        async def events() -> t.AsyncIterator[sse.Event]:
+            yield "one"
+            await asyncio.sleep(0.05)
+            yield sse.ServerSentEvent("two", id="2")
+            yield b"data: raw\n\n"
+
+        async def collect() -> t.List[bytes]:
+            obj = sse.EventStreamResponse(events(), heartbeat_interval=0.01, retry=5)
+            self.assertEqual(obj.headers["Content-Type"], "text/event-stream")
+            return [chunk async for chunk in obj.aiter_chunks()]
+
+        chunks = run(collect())
+
+        self.assertEqual(chunks[:2], [b"retry: 5\n\n", b"data: one\n\n"])
+        self.assertIn(sse.HEARTBEAT, chunks)
+        self.assertEqual(chunks[-2:], [b"id: 2\ndata: two\n\n", b"data: raw\n\n"])
+
+    def test_channel(self) -> None:
+        async def exchange() -> t.List[bytes]:
+            channel = sse.EventChannel(maxsize=2)
+            self.assertTrue(channel.send_nowait("a"))
+            await channel.send("b")
+            self.assertFalse(channel.send_nowait("c"))
+            channel.close()
+            self.assertFalse(channel.send_nowait("d"))
+
+            obj = sse.EventStreamResponse(channel, heartbeat_interval=None)
+            return [chunk async for chunk in obj.aiter_chunks()]
+
+        self.assertEqual(run(exchange()), [b"data: a\n\n", b"data: b\n\n"])
@@ -0,0 +1,127 @@
+# Copyright (c) 2021-2021 Mediapills HttpFoundation.
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import os
+import socket
+import tempfile
+import unittest
+
+from mediapills.http_foundation import file_responses
+from mediapills.http_foundation import requests
+from mediapills.http_foundation import responses
+
+
+class TestFileResponse(unittest.TestCase):
+    def setUp(self) -> None:
+        fd, self.path = tempfile.mkstemp(suffix=".txt")
+        os.write(fd, b"0123456789")
+        os.close(fd)
+
+    def tearDown(self) -> None:
+        os.unlink(self.path)
+
+    def response(self, **server: str) -> file_responses.FileResponse:
+        obj = file_responses.FileResponse(self.path)
+        obj.prepare(requests.BaseRequest(server=server))
+        self.addCleanup(obj.close)
+
+        return obj
+
+    def test_full(self) -> None:
+        obj = self.response()
+
+        self.assertEqual(obj.code, responses.HTTP_CODE_OK)
+        self.assertEqual(obj.headers["Content-Type"], "text/plain")
+        self.assertEqual(obj.headers["Content-Length"], "10")
+        self.assertEqual(list(obj.iter_chunks()), [b"0123456789"])
+
+    def test_range(self) -> None:
+        obj = self.response(HTTP_RANGE="bytes=2-4")
+
+        self.assertEqual(obj.code, responses.HTTP_CODE_PARTIAL_CONTENT)
+        self.assertEqual(obj.headers["Content-Range"], "bytes 2-4/10")
+        self.assertEqual(b"".join(obj.iter_chunks()), b"234")
+
+    def test_range_not_satisfiable(self) -> None:
+        obj = self.response(HTTP_RANGE="bytes=20-")
+
+        self.assertEqual(obj.code, responses.HTTP_CODE_REQUESTED_RANGE_NOT_SATISFIABLE)
+        self.assertEqual(obj.headers["Content-Range"], "bytes */10")
+        self.assertEqual(b"".join(obj.iter_chunks()), b"")
+
+    def test_ignored_range(self) -> None:
+        for value in ("bytes=0-1,3-4", "items=0-3", "bytes=abc", "bytes=4-2"):
+            with self.subTest(value=value):
+                obj = self.response(HTTP_RANGE=value)
+
+                self.assertEqual(obj.code, responses.HTTP_CODE_OK)
+                self.assertNotIn("Content-Range", obj.headers)
+                self.assertEqual(b"".join(obj.iter_chunks()), b"0123456789")
+
+    def test_weak_if_range(self) -> None:
+        obj = file_responses.FileResponse(self.path, headers={"ETag": 'W/"v1"'})
+        self.addCleanup(obj.close)
+        obj.prepare(
+            requests.BaseRequest(
+                server={"HTTP_RANGE": "bytes=-3", "HTTP_IF_RANGE": 'W/"v1"'}
+            )
+        )
+
+        self.assertEqual(obj.code, responses.HTTP_CODE_OK)
+        self.assertEqual(obj.content_length, 10)
+
+    def test_strong_if_range(self) -> None:
+        obj = file_responses.FileResponse(self.path, headers={"ETag": '"v1"'})
+        self.addCleanup(obj.close)
+        obj.prepare(
+            requests.BaseRequest(
+                server={"HTTP_RANGE": "bytes=-3", "HTTP_IF_RANGE": '"v1"'}
+            )
+        )
+
+        self.assertEqual(obj.code, responses.HTTP_CODE_PARTIAL_CONTENT)
+        self.assertEqual(obj.content_length, 3)
+
+    def test_stale_if_range(self) -> None:
+        obj = self.response(HTTP_RANGE="bytes=-3", HTTP_IF_RANGE='"stale"')
+
+        self.assertEqual(obj.code, responses.HTTP_CODE_OK)
+        self.assertEqual(obj.content_length, 10)
+
+    def test_sendfile(self) -> None:
+        obj = self.response(HTTP_RANGE="bytes=-3")
+        left, right = socket.socketpair()
+
+        with left, right:
+            self.assertEqual(obj.sendfile(left), 3)
+            self.assertEqual(right.recv(16), b"789")
+
+    def test_parse_range(self) -> None:
+        self.assertEqual(file_responses.parse_range("bytes=0-", 5), (0, 5))
+        self.assertEqual(file_responses.parse_range("bytes=3-99", 5), (3, 2))
+        self.assertEqual(file_responses.parse_range("bytes=-9", 5), (0, 5))
+        self.assertIsNone(file_responses.parse_range("bytes=0-1,3-4", 5))
+        self.assertIsNone(file_responses.parse_range("items=0-1", 5))
+        self.assertIsNone(file_responses.parse_range("bytes=abc", 5))
+        self.assertIsNone(file_responses.parse_range("bytes=4-2", 5))
+
+        not_satisfiable = file_responses.RANGE_NOT_SATISFIABLE
+        self.assertEqual(file_responses.parse_range("bytes=5-", 5), not_satisfiable)
+        self.assertEqual(file_responses.parse_range("bytes=-0", 5), not_satisfiable)
@@ -0,0 +1,91 @@
+# Copyright (c) 2021-2021 Mediapills HttpFoundation.
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import unittest
+
+from mediapills.http_foundation import headers
+
+
+class TestHeaders(unittest.TestCase):
+    def test_parse_content_type(self) -> None:
+        self.assertEqual(
+            headers.parse_content_type('Text/HTML; Charset="latin-1"; q'),
+            ("text/html", {"charset": "latin-1"}),
+        )
+        self.assertEqual(
+            headers.parse_content_type(
+                'form-data; name="a;b \\"c\\""; filename="x.txt"; '
+                "filename*=UTF-8''%C3%A9.txt"
+            ),
+            ("form-data", {"name": 'a;b "c"', "filename": "\u00e9.txt"}),
+        )
+
+    def test_multi_value(self) -> None:
+        obj = headers.Headers({"Content-Type": "text/html"})
+        obj.add("Set-Cookie", "a=1")
+        obj.add(b"set-cookie", b"b=2")
+
+        self.assertEqual(obj["content-type"], "text/html")
+        self.assertEqual(obj.get_all("SET-COOKIE"), ["a=1", "b=2"])
+        self.assertEqual(list(obj), ["Content-Type", "Set-Cookie"])
+        self.assertEqual(len(obj), 2)
+        self.assertEqual(
+            obj.raw(),
+            [
+                (b"Content-Type", b"text/html"),
+                (b"Set-Cookie", b"a=1"),
+                (b"set-cookie", b"b=2"),
+            ],
+        )
+
+    def test_mutation(self) -> None:
+        obj = headers.Headers([(b"X-A", b"1"), (b"x-a", b"2"), (b"X-B", b"3")])
+
+        obj["x-a"] = "4"
+        self.assertEqual(obj.multi_items(), [("X-B", "3"), ("x-a", "4")])
+
+        obj["X-B"] = "5"
+        del obj["X-A"]
+        self.assertEqual(obj, {"X-B": "5"})
+        self.assertNotIn("X-A", obj)
+        self.assertRaises(KeyError, obj.__delitem__, "X-A")
+        self.assertEqual(obj.pop("x-b"), "5")
+        self.assertEqual(len(obj), 0)
+
+    def test_line_break(self) -> None:
+        obj = headers.Headers()
+
+        self.assertRaises(ValueError, obj.__setitem__, "Location", "/\r\nX-Evil: 1")
+
+    def test_environ_headers(self) -> None:
+        obj = headers.EnvironHeaders(
+            {
+                "HTTP_ACCEPT_LANGUAGE": "en",
+                "CONTENT_TYPE": "text/plain",
+                "PATH_INFO": "/",
+            }
+        )
+
+        self.assertEqual(obj["Accept-Language"], "en")
+        self.assertEqual(obj.get("content-type"), "text/plain")
+        self.assertEqual(obj.get_all("X-Missing"), [])
+        self.assertIn("ACCEPT-LANGUAGE", obj)
+        self.assertEqual(sorted(obj), ["Accept-Language", "Content-Type"])
+        self.assertEqual(len(obj), 2)
@@ -0,0 +1,67 @@
+# Copyright (c) 2021-2021 Mediapills HttpFoundation.
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import asyncio
+import json
+import typing as t
+import unittest
+
+from mediapills.http_foundation import json_responses
+
+
+class TestJSONResponse(unittest.TestCase):
+    def test_body(self) -> None:
+        obj = json_responses.JSONResponse({"name": "café", "items": [1, 2]}, code=201)
+
+        self.assertEqual(json.loads(obj.body), {"name": "café", "items": [1, 2]})
+        self.assertEqual(obj.headers["Content-Type"], "application/json")
+        self.assertEqual(obj.code, 201)
+
+        obj = json_responses.JSONResponse([1], encoder=json_responses._json_dumps)
+        self.assertEqual(obj.body, b"[1]")
+
+    def test_stream(self) -> None:
+        obj = json_responses.StreamedJSONResponse(
+            iter([{"a": 1}, 2, "x"]), chunk_size=4
+        )
+        chunks = list(obj.iter_body())
+
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(json.loads(b"".join(chunks)), [{"a": 1}, 2, "x"])
+        self.assertIsNone(obj.content_length)
+
+        obj = json_responses.StreamedJSONResponse([], ndjson=True)
+        self.assertEqual(list(obj.iter_body()), [])
+        self.assertEqual(obj.headers["Content-Type"], "application/x-ndjson")
+
+    def test_async_stream(self) -> None:
+        async def items() -> t.AsyncIterator[int]:
+            for i in range(3):
+                yield i
+
+        async def collect() -> bytes:
+            obj = json_responses.StreamedJSONResponse(items(), ndjson=True)
+            return b"".join([chunk async for chunk in obj.aiter_chunks()])
+
+        loop = asyncio.new_event_loop()
+        try:
+            self.assertEqual(loop.run_until_complete(collect()), b"0\n1\n2\n")
+        finally:
+            loop.close()
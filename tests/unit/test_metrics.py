@@ -0,0 +1,55 @@
+# Copyright (c) 2021-2021 Mediapills HttpFoundation.
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import unittest
+
+from mediapills.http_foundation import metrics
+
+
+class TestRequestMetrics(unittest.TestCase):
+    def test_observe(self) -> None:
+        obj = metrics.RequestMetrics(buckets=(0.001, 0.01))
+        obj.observe(metrics.STAGE_HANDLER, "GET", 200, 500_000)
+        obj.observe(metrics.STAGE_HANDLER, "GET", 204, 5_000_000)
+        obj.observe(metrics.STAGE_HANDLER, "BREW", 503, 50_000_000)
+
+        self.assertEqual(obj.count(metrics.STAGE_HANDLER, "GET", 299), 2)
+        self.assertEqual(obj.count(metrics.STAGE_HANDLER, "POST", 200), 0)
+
+        text = obj.render()
+        prefix = 'http_request_stage_duration_seconds_bucket{stage="handler"'
+        self.assertIn(prefix + ',method="GET",status_class="2xx",le="0.001"} 1', text)
+        self.assertIn(prefix + ',method="GET",status_class="2xx",le="+Inf"} 2', text)
+        self.assertIn(prefix + ',method="OTHER",status_class="5xx",le="0.01"} 0', text)
+        self.assertIn(
+            'http_request_stage_duration_seconds_sum{stage="handler",method="GET",'
+            'status_class="2xx"} 0.0055',
+            text,
+        )
+
+        obj.reset()
+        self.assertEqual(obj.count(metrics.STAGE_HANDLER, "GET", 200), 0)
+
+    def test_disabled(self) -> None:
+        obj = metrics.RequestMetrics(enabled=False)
+        obj.observe(metrics.STAGE_BODY, "GET", 200, 1)
+
+        self.assertEqual(obj.count(metrics.STAGE_BODY, "GET", 200), 0)
+        self.assertEqual(obj.render().count("\n"), 2)
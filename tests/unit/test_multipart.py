@@ -0,0 +1,140 @@
+# Copyright (c) 2021-2021 Mediapills HttpFoundation.
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import io
+import unittest
+
+from mediapills.http_foundation import exceptions
+from mediapills.http_foundation import multipart
+from mediapills.http_foundation import wsgi
+
+BODY = (
+    b"preamble\r\n"
+    b"--XyZ\r\n"
+    b'Content-Disposition: form-data; name="title"\r\n'
+    b"\r\n"
+    b"Hello\r\n--not a boundary\r\n"
+    b"--XyZ\r\n"
+    b'Content-Disposition: form-data; name="tag"\r\n'
+    b"\r\n"
+    b"a\r\n"
+    b"--XyZ\r\n"
+    b'Content-Disposition: form-data; name="tag"\r\n'
+    b"\r\n"
+    b"b\r\n"
+    b"--XyZ\r\n"
+    b'Content-Disposition: form-data; name="upload"; filename="data.bin"\r\n'
+    b"Content-Type: application/octet-stream\r\n"
+    b"\r\n" + b"\x00\x01" * 64 + b"\r\n"
+    b"--XyZ--\r\n"
+    b"epilogue"
+)
+
+
+class TestMultipartParser(unittest.TestCase):
+    def assertParsed(self, parser: multipart.MultipartParser) -> None:
+        files = parser.files()
+
+        self.assertTrue(parser.is_complete)
+        self.assertEqual(
+            parser.fields().multi_items(),
+            [
+                ("title", "Hello\r\n--not a boundary"),
+                ("tag", "a"),
+                ("tag", "b"),
+            ],
+        )
+        self.assertEqual(list(files), ["upload"])
+        self.assertEqual(files["upload"][0].filename, "data.bin")
+        self.assertEqual(files["upload"][0].content_type, "application/octet-stream")
+        self.assertEqual(files["upload"][0].body.getvalue(), b"\x00\x01" * 64)
+
+        for part in parser.parts:
+            part.close()
+
+    def test_single_chunk(self) -> None:
+        parser = multipart.MultipartParser("XyZ")
+        parser.feed(BODY)
+        parser.close()
+
+        self.assertParsed(parser)
+
+    def test_byte_by_byte(self) -> None:
+        parser = multipart.MultipartParser(b"XyZ", max_memory_size=16)
+        completed = [parser.feed(bytes([byte])) for byte in BODY]
+        parser.close()
+
+        self.assertEqual(sum(map(len, completed)), 4)
+        self.assertTrue(parser.files()["upload"][0].body.is_spooled)
+        self.assertParsed(parser)
+
+    def test_part_names(self) -> None:
+        parser = multipart.MultipartParser("XyZ")
+        parser.feed(
+            b"--XyZ\r\n"
+            b'Content-Disposition: form-data; name="pr\xc3\xa9nom"\r\n'
+            b"\r\n"
+            b"Zo\xc3\xab\r\n"
+            b"--XyZ\r\n"
+            b'Content-Disposition: form-data; name="doc"; filename="a;b.txt"\r\n'
+            b"\r\n"
+            b"x\r\n"
+            b"--XyZ--\r\n"
+        )
+        parser.close()
+
+        self.assertEqual(parser.fields().multi_items(), [("pr\u00e9nom", "Zo\u00eb")])
+        self.assertEqual(parser.files()["doc"][0].filename, "a;b.txt")
+
+    def test_limits(self) -> None:
+        self.assertRaises(
+            exceptions.MultipartException,
+            multipart.MultipartParser("XyZ", max_parts=2).feed,
+            BODY,
+        )
+        self.assertRaises(
+            exceptions.MultipartException,
+            multipart.MultipartParser("XyZ", max_field_size=4).feed,
+            BODY,
+        )
+        self.assertRaises(
+            exceptions.MultipartException,
+            multipart.MultipartParser("XyZ", max_total_size=100).feed,
+            BODY,
+        )
+
+    def test_truncated(self) -> None:
+        parser = multipart.MultipartParser("XyZ")
+        parser.feed(BODY[:100])
+
+        self.assertRaises(exceptions.MultipartException, parser.close)
+
+    def test_request(self) -> None:
+        obj = wsgi.WSGIRequest(
+            {
+                "CONTENT_TYPE": "multipart/form-data; boundary=XyZ",
+                "CONTENT_LENGTH": str(len(BODY)),
+                "wsgi.input": io.BytesIO(BODY),
+            }
+        )
+
+        self.assertEqual(obj.files["upload"][0].filename, "data.bin")
+        self.assertEqual(obj.request["tag"], "b")
+        self.assertEqual(obj.content, "")
@@ -0,0 +1,104 @@
+# Copyright (c) 2021-2021 Mediapills HttpFoundation.
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import unittest
+
+from mediapills.http_foundation import negotiation
+from mediapills.http_foundation import requests
+
+
+class TestNegotiation(unittest.TestCase):
+    def test_parse_accept_header(self) -> None:
+        items = negotiation.parse_accept_header(
+            "text/html;level=1, application/json;q=0.9, */*;q=0.1, image/png;q=x"
+        )
+
+        self.assertEqual(
+            [(item.value, item.quality) for item in items],
+            [
+                ("text/html", 1.0),
+                ("application/json", 0.9),
+                ("*/*", 0.1),
+                ("image/png", 0.0),
+            ],
+        )
+        self.assertEqual(items[0].params, (("level", "1"),))
+
+    def test_cache(self) -> None:
+        header = "text/html, application/xml;q=0.9"
+
+        self.assertIs(
+            negotiation.parse_accept_header(header),
+            negotiation.parse_accept_header(header),
+        )
+
+    def test_media_type(self) -> None:
+        header = "text/*;q=0.5, application/json, */*;q=0.1, text/csv;q=0"
+
+        self.assertEqual(
+            negotiation.negotiate(header, ["text/plain", "application/json"]),
+            "application/json",
+        )
+        self.assertEqual(
+            negotiation.negotiate(header, ["text/csv", "image/png"]), "image/png"
+        )
+        self.assertIsNone(negotiation.negotiate("text/csv;q=0", ["text/csv"]))
+        self.assertEqual(negotiation.negotiate(None, ["a/b", "c/d"]), "a/b")
+
+    def test_language(self) -> None:
+        self.assertEqual(
+            negotiation.negotiate(
+                "fr;q=0.8, en", ["fr-FR", "en-US"], negotiation.HEADER_ACCEPT_LANGUAGE
+            ),
+            "en-US",
+        )
+
+    def test_encoding(self) -> None:
+        name = negotiation.HEADER_ACCEPT_ENCODING
+
+        self.assertEqual(
+            negotiation.negotiate("gzip", ["br", "identity"], name), "identity"
+        )
+        self.assertIsNone(negotiation.negotiate("gzip, *;q=0", ["identity"], name))
+        self.assertEqual(
+            negotiation.negotiate("br;q=0.5, gzip", ["br", "gzip"], name), "gzip"
+        )
+
+
+class TestRequestNegotiation(unittest.TestCase):
+    def test_request(self) -> None:
+        obj = requests.BaseRequest(
+            server={
+                "HTTP_ACCEPT": "application/json;q=0.5, text/html",
+                "HTTP_ACCEPT_LANGUAGE": "uk, en;q=0.7, *;q=0",
+                "HTTP_ACCEPT_ENCODING": "gzip, deflate",
+            }
+        )
+
+        self.assertEqual(
+            obj.acceptable_content_types, ["text/html", "application/json"]
+        )
+        self.assertEqual(obj.languages, ["uk", "en"])
+        self.assertEqual(obj.encodings, ["gzip", "deflate"])
+        self.assertEqual(obj.charsets, [])
+        self.assertEqual(obj.negotiate(["application/json", "text/html"]), "text/html")
+        self.assertEqual(
+            obj.negotiate(["de", "en-GB"], negotiation.HEADER_ACCEPT_LANGUAGE), "en-GB"
+        )
@@ -0,0 +1,66 @@
+# Copyright (c) 2021-2021 Mediapills HttpFoundation.
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import unittest
+
+from mediapills.http_foundation import parameters
+from mediapills.http_foundation import requests
+
+
+class TestMultiDict(unittest.TestCase):
+    def test_repeated_keys(self) -> None:
+        obj = parameters.MultiDict([("id", "1"), ("name", "x"), ("id", "2")])
+
+        self.assertEqual(obj["id"], "2")
+        self.assertEqual(obj.getlist("id"), ["1", "2"])
+        self.assertEqual(obj.getlist("missing"), [])
+        self.assertEqual(list(obj), ["id", "name"])
+        self.assertEqual(len(obj), 2)
+        self.assertIn("name", obj)
+        self.assertRaises(KeyError, obj.__getitem__, "missing")
+        self.assertEqual(obj.to_dict(), {"id": "2", "name": "x"})
+        self.assertEqual(obj, {"id": "2", "name": "x"})
+        self.assertEqual(obj.multi_items(), [("id", "1"), ("name", "x"), ("id", "2")])
+
+    def test_empty(self) -> None:
+        obj = parameters.MultiDict()
+
+        self.assertEqual(len(obj), 0)
+        self.assertEqual(parameters.MultiDict({"a": "1"}).getlist("a"), ["1"])
+
+    def test_from_query_string(self) -> None:
+        obj = parameters.MultiDict.from_query_string("id=1&id=2&q=a+b&e=")
+
+        self.assertEqual(obj.getlist("id"), ["1", "2"])
+        self.assertEqual(obj["q"], "a b")
+        self.assertEqual(obj["e"], "")
+        self.assertIs(obj, parameters.MultiDict.from_query_string("id=1&id=2&q=a+b&e="))
+        self.assertIsNot(
+            parameters.MultiDict.from_query_string("a=1", cache=False),
+            parameters.MultiDict.from_query_string("a=1", cache=False),
+        )
+
+    def test_request_query(self) -> None:
+        obj = requests.BaseRequest(server={"QUERY_STRING": "id=1&id=2"})
+
+        query = obj.query
+
+        assert isinstance(query, parameters.MultiDict)
+        self.assertEqual(query.getlist("id"), ["1", "2"])
@@ -0,0 +1,101 @@
+# Copyright (c) 2021-2021 Mediapills HttpFoundation.
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import typing as t
+import unittest
+
+from mediapills.http_foundation import parser
+from mediapills.http_foundation.exceptions import ProtocolException
+
+PIPELINED = (
+    b"POST /items?a=1 HTTP/1.1\r\nHost: example.com\r\n"
+    b"Content-Type: application/x-www-form-urlencoded\r\nContent-Length: 8\r\n\r\n"
+    b"name=%41"
+    b"\r\nGET /b%20c HTTP/1.0\r\nConnection: keep-alive\r\n\r\n"
+)
+
+
+def completed(events: t.List[parser.ParserEvent]) -> t.List[parser.MessageComplete]:
+    return [e for e in events if isinstance(e, parser.MessageComplete)]
+
+
+class TestRequestParser(unittest.TestCase):
+    def test_pipelined(self) -> None:
+        for size in (1, 5, len(PIPELINED)):
+            obj = parser.RequestParser()
+            events: t.List[parser.ParserEvent] = []
+            for pos in range(0, len(PIPELINED), size):
+                stop = pos + size
+                events.extend(obj.feed(PIPELINED[pos:stop]))
+
+            first, second = [e.request for e in completed(events)]
+            self.assertEqual(first.method, "POST")
+            self.assertEqual(first.query["a"], "1")
+            self.assertEqual(first.request["name"], "A")
+            self.assertEqual(first.headers["Host"], "example.com")
+            self.assertEqual(second.server["PATH_INFO"], "/b c")
+            self.assertEqual(
+                [e.keep_alive for e in events if isinstance(e, parser.HeadersComplete)],
+                [True, True],
+            )
+            self.assertTrue(obj.is_idle)
+
+    def test_chunked(self) -> None:
+        obj = parser.RequestParser()
+        events = obj.feed(
+            b"PUT / HTTP/1.1\r\nHost: x\r\nTransfer-Encoding: chunked\r\n\r\n"
+            b"5;ext=1\r\nhello\r\n6\r\n world\r\n0\r\nX-Trailer: 1\r\n\r\n"
+        )
+
+        self.assertEqual(
+            [e.data for e in events if isinstance(e, parser.BodyChunk)],
+            [b"hello", b" world"],
+        )
+        request = completed(events)[0].request
+        self.assertEqual(request.payload.getvalue(), b"hello world")
+        self.assertEqual(request.content_length, 11)
+
+    def test_errors(self) -> None:
+        cases = [
+            (b"GET /" + b"a" * 100 + b" HTTP/1.1\r\n", 414),
+            (b"GET / HTTP/1.1\r\nX: " + b"a" * 100, 431),
+            (b"GET / HTTP/2.0\r\n\r\n", 505),
+            (b"GET / HTTP/1.1\r\nTransfer-Encoding: gzip\r\n\r\n", 501),
+            (
+                b"GET / HTTP/1.1\r\nContent-Length: 1\r\n"
+                b"Transfer-Encoding: chunked\r\n\r\n",
+                400,
+            ),
+            (b"GET / HTTP/1.1\r\n folded\r\n\r\n", 400),
+            (b"POST / HTTP/1.1\r\nContent-Length: 99\r\n\r\n", 413),
+            (b"GET / HTTP/1.1\r\nX: a\nContent-Length: 3\r\n\r\n", 400),
+            (b"GET / HTTP/1.1\r\nX: a\x7fb\r\n\r\n", 400),
+            (b"GET / HTTP/1.1\r\n\r\n", 400),
+            (b"GET / HTTP/1.1\r\nHost: a\r\nHost: b\r\n\r\n", 400),
+        ]
+
+        for data, code in cases:
+            obj = parser.RequestParser(
+                max_request_line_size=64, max_header_size=64, max_body_size=10
+            )
+            with self.assertRaises(ProtocolException) as context:
+                obj.feed(data)
+
+            self.assertEqual(context.exception.code, code)
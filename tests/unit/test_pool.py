@@ -0,0 +1,65 @@
+# Copyright (c) 2021-2021 Mediapills HttpFoundation.
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import unittest
+
+from mediapills.http_foundation import pool
+from mediapills.http_foundation import requests
+from mediapills.http_foundation import responses
+from mediapills.http_foundation import wsgi
+
+
+class TestObjectPool(unittest.TestCase):
+    def test_slots(self) -> None:
+        for obj in (
+            requests.BaseRequest(),
+            wsgi.WSGIRequest({}),
+            responses.BaseHTTPResponse(),
+            responses.StreamedResponse([]),
+        ):
+            self.assertFalse(hasattr(obj, "__dict__"))
+
+    def test_reuse_request(self) -> None:
+        requests_pool = pool.ObjectPool(wsgi.WSGIRequest, maxsize=1)
+        obj = requests_pool.acquire({"QUERY_STRING": "a=1"})
+        self.assertEqual(obj.query["a"], "1")
+        obj.attributes["id"] = "1"
+
+        requests_pool.release(obj)
+        self.assertEqual(len(requests_pool), 1)
+
+        reused = requests_pool.acquire({"QUERY_STRING": "a=2"})
+        self.assertIs(reused, obj)
+        self.assertEqual(reused.query["a"], "2")
+        self.assertEqual(reused.attributes, {})
+
+        requests_pool.release(reused)
+        requests_pool.release(wsgi.WSGIRequest({}))
+        self.assertEqual(len(requests_pool), 1)
+
+    def test_reuse_response(self) -> None:
+        responses_pool = pool.ObjectPool(responses.BaseHTTPResponse)
+        obj = responses_pool.acquire("first", headers={"X-A": "1"})
+        responses_pool.release(obj)
+
+        reused = responses_pool.acquire("second", code=404)
+        self.assertIs(reused, obj)
+        self.assertEqual((reused.body, reused.code), (b"second", 404))
+        self.assertNotIn("X-A", reused.headers)
@@ -0,0 +1,125 @@
+# Copyright (c) 2021-2021 Mediapills HttpFoundation.
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import typing as t
+import unittest
+
+from mediapills.http_foundation import asgi
+from mediapills.http_foundation import proxies
+from mediapills.http_foundation import requests
+
+
+class TestTrustedProxies(unittest.TestCase):
+    def test_contains(self) -> None:
+        obj = proxies.TrustedProxies(
+            ["10.0.0.0/8", "10.1.0.0/16", "192.168.1.1", "2001:db8::/32"]
+        )
+
+        self.assertIn("10.200.3.4", obj)
+        self.assertIn("192.168.1.1", obj)
+        self.assertIn("::ffff:10.0.0.1", obj)
+        self.assertIn("2001:db8::1", obj)
+        self.assertNotIn("192.168.1.2", obj)
+        self.assertNotIn("11.0.0.0", obj)
+        self.assertNotIn("unknown", obj)
+
+    def test_parse(self) -> None:
+        self.assertEqual(
+            proxies.parse_forwarded(
+                'for=192.0.2.60;proto=https;host="a,b", For="[2001:db8::1]:4711"'
+            ),
+            [
+                proxies.ForwardedHop("192.0.2.60", "https", "a,b"),
+                proxies.ForwardedHop("2001:db8::1"),
+            ],
+        )
+        self.assertEqual(
+            proxies.parse_x_forwarded("1.1.1.1, 2.2.2.2:80", "https", "a, b"),
+            [
+                proxies.ForwardedHop("1.1.1.1", "https", "a"),
+                proxies.ForwardedHop("2.2.2.2", "https", "b"),
+            ],
+        )
+        self.assertEqual(
+            [hop.proto for hop in proxies.parse_x_forwarded("1.1.1.1", "https, http")],
+            ["http"],
+        )
+
+
+class TestRequestClient(unittest.TestCase):
+    def tearDown(self) -> None:
+        requests.BaseRequest.set_trusted_proxies(None)
+
+    def request(self, **server: str) -> requests.BaseRequest:
+        server.setdefault("REMOTE_ADDR", "10.0.0.1")
+        server.setdefault("SERVER_NAME", "internal")
+        server.setdefault("SERVER_PORT", "8080")
+
+        return requests.BaseRequest(server=server)
+
+    def test_untrusted(self) -> None:
+        obj = self.request(HTTP_X_FORWARDED_FOR="6.6.6.6")
+
+        self.assertEqual(obj.client_ip, "10.0.0.1")
+        self.assertEqual(obj.scheme, "http")
+        self.assertEqual(obj.host, "internal:8080")
+
+    def test_trusted(self) -> None:
+        requests.BaseRequest.set_trusted_proxies(["10.0.0.0/8"])
+
+        obj = self.request(
+            HTTP_X_FORWARDED_FOR="6.6.6.6, 203.0.113.7, 10.0.0.2",
+            HTTP_X_FORWARDED_PROTO="https",
+            HTTP_X_FORWARDED_HOST="Example.com",
+        )
+        self.assertEqual(obj.client_ip, "203.0.113.7")
+        self.assertEqual(obj.scheme, "https")
+        self.assertEqual(obj.host, "example.com")
+
+        obj = self.request(
+            HTTP_FORWARDED="for=203.0.113.7;proto=https;host=example.com",
+            HTTP_X_FORWARDED_FOR="6.6.6.6",
+        )
+        self.assertEqual(obj.client_ip, "203.0.113.7")
+        self.assertEqual(obj.scheme, "https")
+        self.assertEqual(obj.host, "example.com")
+
+    def test_repeated_fields(self) -> None:
+        requests.BaseRequest.set_trusted_proxies(["10.0.0.0/8"])
+
+        async def receive() -> t.Dict[str, t.Any]:
+            return {"type": "http.request", "body": b""}
+
+        obj = asgi.ASGIRequest(
+            {
+                "type": "http",
+                "client": ("10.0.0.1", 5000),
+                "headers": [
+                    (b"x-forwarded-for", b"6.6.6.6"),
+                    (b"x-forwarded-for", b"203.0.113.9"),
+                    (b"x-forwarded-proto", b"https"),
+                    (b"x-forwarded-proto", b"http"),
+                ],
+            },
+            receive,
+        )
+
+        self.assertEqual(obj.client_ip, "203.0.113.9")
+        self.assertEqual(obj.scheme, "http")
@@ -45,3 +45,67 @@ def __init__(self, *args: t.Any, **kwargs: t.Any) -> None:
         self.assertEqual(obj.cookies, cookies)
         self.assertEqual(obj.server, server)
         self.assertEqual(obj.content, content)
+
+    def test_headers(self) -> None:
+        obj = requests.BaseRequest(server={"HTTP_USER_AGENT": "curl"})
+
+        self.assertEqual(obj.headers["User-Agent"], "curl")
+
+        obj.server = {"HTTP_USER_AGENT": "wget"}
+        self.assertEqual(obj.headers["user-agent"], "wget")
+
+    def test_uri_resolution(self) -> None:
+        cases = [
+            ({"REQUEST_URI": "/"}, "", "", "/"),
+            (
+                {"REQUEST_URI": "/mysite", "SCRIPT_NAME": "/mysite"},
+                "/mysite",
+                "/mysite",
+                "/",
+            ),
+            (
+                {"REQUEST_URI": "/mysite/enco%20ded?var=1", "SCRIPT_NAME": "/mysite"},
+                "/mysite",
+                "/mysite",
+                "/enco%20ded",
+            ),
+            (
+                {
+                    "REQUEST_URI": "/web/index.php/about",
+                    "SCRIPT_NAME": "/web/index.php",
+                    "SCRIPT_FILENAME": "/srv/web/index.php",
+                },
+                "/web/index.php",
+                "/web",
+                "/about",
+            ),
+            (
+                {"REQUEST_URI": "/web/about", "SCRIPT_NAME": "/web/index.php"},
+                "/web",
+                "/web",
+                "/about",
+            ),
+            (
+                {"REQUEST_URI": "/my%20site/a", "SCRIPT_NAME": "/my site"},
+                "/my%20site",
+                "/my%20site",
+                "/a",
+            ),
+            (
+                {"SCRIPT_NAME": "/app", "PATH_INFO": "/a b", "QUERY_STRING": "x=1"},
+                "/app",
+                "/app",
+                "/a%20b",
+            ),
+        ]
+
+        for server, base_url, base_path, path_info in cases:
+            obj = requests.BaseRequest(server=server)
+            self.assertEqual(obj.base_url, base_url, server)
+            self.assertEqual(obj.base_path, base_path, server)
+            self.assertEqual(obj.path_info, path_info, server)
+
+        self.assertEqual(obj.request_uri, "/app/a%20b?x=1")
+
+        obj.path_info = "/other"
+        self.assertEqual(obj.path_info, "/other")
@@ -18,8 +18,13 @@
 # LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
 # OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
 # WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import asyncio
+import typing as t
 import unittest
+from array import array
 
+from mediapills.http_foundation import exceptions
+from mediapills.http_foundation import requests
 from mediapills.http_foundation import responses
 
 
@@ -29,3 +34,176 @@ def test_enums_coverage(self) -> None:
             list(map(lambda c: c.name, responses.HTTPStatusMessage)),
             list(map(lambda c: c.name, responses.HTTPStatusCode)),
         )
+
+    def test_body(self) -> None:
+        obj = responses.BaseHTTPResponse("Grüße")
+
+        self.assertEqual(obj.body, "Grüße".encode())
+        self.assertEqual(obj.content_length, 7)
+
+        obj.body = b"raw"
+        self.assertEqual(obj.content, "raw")
+        self.assertEqual(list(obj.iter_body()), [b"raw"])
+
+
+class TestStreamedResponse(unittest.TestCase):
+    def test_known_length(self) -> None:
+        obj = responses.StreamedResponse([b"ab", b"cde"])
+        obj.protocol_version = "1.1"
+        obj.prepare()
+
+        self.assertEqual(obj.headers, {"Content-Length": "5"})
+        self.assertEqual(list(obj.iter_chunks()), [b"ab", b"cde"])
+
+    def test_chunked(self) -> None:
+        obj = responses.StreamedResponse(iter([b"hello", b"", b"world!"]))
+        obj.protocol_version = "1.1"
+        obj.prepare()
+
+        self.assertTrue(obj.is_chunked)
+        self.assertEqual(obj.headers, {"Transfer-Encoding": "chunked"})
+        self.assertEqual(
+            b"".join(obj.iter_chunks()), b"5\r\nhello\r\n6\r\nworld!\r\n0\r\n\r\n"
+        )
+        self.assertRaises(exceptions.ResponseException, lambda: obj.body)
+
+    def test_close_delimited(self) -> None:
+        obj = responses.StreamedResponse(iter([b"hello"]))
+        obj.prepare()
+
+        self.assertFalse(obj.is_chunked)
+        self.assertEqual(obj.headers, {})
+
+    def test_async(self) -> None:
+        async def produce() -> t.AsyncIterator[bytes]:
+            yield b"abc"
+
+        async def consume(obj: responses.StreamedResponse) -> bytes:
+            return b"".join([chunk async for chunk in obj.aiter_chunks()])
+
+        obj = responses.StreamedResponse(produce())
+        obj.protocol_version = "1.1"
+
+        loop = asyncio.new_event_loop()
+        try:
+            self.assertEqual(
+                loop.run_until_complete(consume(obj)), b"3\r\nabc\r\n0\r\n\r\n"
+            )
+        finally:
+            loop.close()
+
+        self.assertTrue(obj.is_async)
+        self.assertRaises(exceptions.ResponseException, obj.iter_body)
+
+
+class TestStatusLine(unittest.TestCase):
+    def test_status_line(self) -> None:
+        self.assertEqual(responses.status_line(200, "1.1"), b"HTTP/1.1 200 OK\r\n")
+        self.assertEqual(responses.status_line(404), b"HTTP/1.0 404 Not Found\r\n")
+        self.assertEqual(responses.status_line(299, "1.1"), b"HTTP/1.1 299 \r\n")
+        self.assertEqual(responses.status_line(200, "2"), b"HTTP/2 200 OK\r\n")
+        self.assertEqual(responses.status_line(999, "1.1"), b"HTTP/1.1 999 \r\n")
+
+    def test_reason_phrase(self) -> None:
+        for code in responses.HTTPStatusCode:
+            self.assertEqual(
+                responses.reason_phrase(code.value),
+                responses.HTTPStatusMessage[code.name].value,
+            )
+
+        self.assertEqual(responses.reason_phrase(-1), "")
+
+    def test_response_status_line(self) -> None:
+        obj = responses.BaseHTTPResponse(code=responses.HTTP_CODE_NOT_MODIFIED)
+        obj.protocol_version = "1.1"
+
+        self.assertEqual(obj.reason_phrase, "Not Modified")
+        self.assertEqual(obj.status_line, b"HTTP/1.1 304 Not Modified\r\n")
+
+
+class TestStatusClass(unittest.TestCase):
+    def test_groups(self) -> None:
+        groups = {
+            responses.STATUS_CLASS_INFORMATIONAL: responses.HTTP_CODES_INFORMATIONAL,
+            responses.STATUS_CLASS_SUCCESSFUL: responses.HTTP_CODES_SUCCESSFUL,
+            responses.STATUS_CLASS_REDIRECTION: responses.HTTP_CODES_REDIRECTIONS,
+            responses.STATUS_CLASS_CLIENT_ERROR: responses.HTTP_CODES_CLIENT_ERRORS,
+            responses.STATUS_CLASS_SERVER_ERROR: responses.HTTP_CODES_SERVER_ERRORS,
+        }
+
+        for tag, codes in groups.items():
+            for code in codes:
+                self.assertEqual(responses.status_class(code), tag)
+
+    def test_unregistered(self) -> None:
+        self.assertEqual(responses.status_class(299), responses.STATUS_CLASS_SUCCESSFUL)
+        self.assertEqual(
+            responses.status_class(599), responses.STATUS_CLASS_SERVER_ERROR
+        )
+        self.assertEqual(responses.status_class(99), responses.STATUS_CLASS_UNKNOWN)
+        self.assertEqual(responses.status_class(600), responses.STATUS_CLASS_UNKNOWN)
+        self.assertEqual(responses.status_class(-1), responses.STATUS_CLASS_UNKNOWN)
+
+    def test_bulk(self) -> None:
+        codes = array("H", [200, 404, 500, 101, 302, 200])
+
+        self.assertEqual(
+            responses.classify_status_codes(codes), b"\x02\x04\x05\x01\x03\x02"
+        )
+        self.assertEqual(responses.count_status_classes(codes), (0, 1, 2, 1, 1, 1))
+        self.assertEqual(
+            responses.classify_status_codes([200, 700, -5]), b"\x02\x00\x00"
+        )
+        self.assertEqual(responses.classify_status_codes([]), b"")
+
+    def test_properties(self) -> None:
+        obj = responses.BaseHTTPResponse(code=103)
+
+        self.assertTrue(obj.is_informational)
+        self.assertFalse(obj.is_successful)
+
+        obj.code = 299
+        self.assertTrue(obj.is_successful)
+
+
+class TestSerialize(unittest.TestCase):
+    def test_serialize(self) -> None:
+        obj = responses.BaseHTTPResponse(
+            "hello", headers={"Content-Type": "text/plain"}
+        )
+        obj.protocol_version = "1.1"
+        obj.headers.add("Set-Cookie", "a=1")
+        obj.headers.add("Set-Cookie", "b=2")
+
+        self.assertEqual(
+            obj.serialize(),
+            [
+                b"HTTP/1.1 200 OK\r\n",
+                b"Content-Type: text/plain\r\nSet-Cookie: a=1\r\nSet-Cookie: b=2\r\n"
+                b"Content-Length: 5\r\n\r\n",
+                b"hello",
+            ],
+        )
+
+    def test_head_and_bodiless(self) -> None:
+        head = requests.BaseRequest(server={"REQUEST_METHOD": "HEAD"})
+        obj = responses.BaseHTTPResponse("hello")
+
+        self.assertEqual(
+            obj.serialize(head),
+            [b"HTTP/1.0 200 OK\r\n", b"Content-Length: 5\r\n\r\n"],
+        )
+
+        obj.code = responses.HTTP_CODE_NO_CONTENT
+        self.assertEqual(
+            list(obj.iter_wire_chunks()), [b"HTTP/1.0 204 No Content\r\n", b"\r\n"]
+        )
+
+    def test_streamed(self) -> None:
+        obj = responses.StreamedResponse(iter([b"abc"]))
+        obj.protocol_version = "1.1"
+
+        self.assertEqual(
+            b"".join(obj.iter_wire_chunks()),
+            b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n3\r\nabc\r\n0\r\n\r\n",
+        )
@@ -0,0 +1,116 @@
+# Copyright (c) 2021-2021 Mediapills HttpFoundation.
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import typing as t
+import unittest
+import uuid
+
+from mediapills.http_foundation import requests
+from mediapills.http_foundation import responses
+from mediapills.http_foundation import routing
+
+
+def handler(
+    name: str,
+) -> t.Callable[[requests.BaseRequest], responses.BaseHTTPResponse]:
+    def handle(request: requests.BaseRequest) -> responses.BaseHTTPResponse:
+        return responses.BaseHTTPResponse(name)
+
+    return handle
+
+
+class TestRouter(unittest.TestCase):
+    def setUp(self) -> None:
+        self.router = routing.Router()
+        self.router.add("/users", handler("list"))
+        self.router.add("/users", handler("create"), [requests.HTTPRequestMethod.POST])
+        self.router.add("/users/me", handler("me"))
+        self.router.add("/users/{id:int}", handler("user"), ["GET", "PUT"])
+        self.router.add("/users/{name}/files/{file:path}", handler("file"))
+        self.router.add("/tokens/{token:uuid}", handler("token"))
+
+    def test_match(self) -> None:
+        token = uuid.uuid4()
+        cases = [
+            ("GET", "/users", "list", {}),
+            ("POST", "/users", "create", {}),
+            ("GET", "/users/me", "me", {}),
+            ("PUT", "/users/42", "user", {"id": 42}),
+            ("HEAD", "/users/42", "user", {"id": 42}),
+            (
+                "GET",
+                "/users/bob/files/a/b%20c",
+                "file",
+                {"name": "bob", "file": "a/b c"},
+            ),
+            ("GET", "/tokens/%s" % token, "token", {"token": token}),
+        ]
+
+        for method, path, name, attributes in cases:
+            match = self.router.match(method, path)
+            self.assertEqual(match.code, 200, path)
+            self.assertEqual(match.attributes, attributes)
+
+    def test_backtrack_by_method(self) -> None:
+        router = routing.Router()
+        router.add("/users/me", handler("me"))
+        router.add("/users/{id}", handler("delete"), ["DELETE"])
+
+        match = router.match("DELETE", "/users/me")
+        self.assertEqual(match.code, 200)
+        self.assertEqual(match.attributes, {"id": "me"})
+
+        match = router.match("PUT", "/users/me")
+        self.assertEqual(match.code, 405)
+        self.assertEqual(match.allowed, ("GET", "HEAD", "DELETE"))
+
+    def test_errors(self) -> None:
+        self.assertEqual(self.router.match("GET", "/users/x1/files").code, 404)
+        self.assertEqual(self.router.match("GET", "/tokens/nope").code, 404)
+
+        match = self.router.match("DELETE", "/users/42")
+        self.assertEqual(match.code, 405)
+        self.assertEqual(match.allowed, ("GET", "PUT", "HEAD"))
+
+        with self.assertRaises(ValueError):
+            self.router.add("/users", handler("again"))
+
+        with self.assertRaises(ValueError):
+            self.router.add("/a/{rest:path}/b", handler("bad"))
+
+    def test_call(self) -> None:
+        request = requests.BaseRequest(
+            server={"REQUEST_METHOD": "PATCH", "PATH_INFO": "/users/7"}
+        )
+        response = self.router(request)
+
+        self.assertIsInstance(response, responses.BaseHTTPResponse)
+        self.assertEqual(t.cast(responses.BaseHTTPResponse, response).code, 405)
+        self.assertEqual(
+            t.cast(responses.BaseHTTPResponse, response).headers["Allow"],
+            "GET, PUT, HEAD",
+        )
+
+        request = requests.BaseRequest(
+            server={"REQUEST_METHOD": "GET", "PATH_INFO": "/users/7"}
+        )
+        response = self.router(request)
+        self.assertEqual(t.cast(responses.BaseHTTPResponse, response).content, "user")
+        self.assertEqual(request.attributes, {"id": 7})
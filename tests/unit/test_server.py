@@ -0,0 +1,199 @@
+# Copyright (c) 2021-2021 Mediapills HttpFoundation.
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import asyncio
+import os
+import tempfile
+import typing as t
+import unittest
+
+from mediapills.http_foundation import file_responses
+from mediapills.http_foundation import metrics
+from mediapills.http_foundation import requests
+from mediapills.http_foundation import responses
+from mediapills.http_foundation import server
+
+
+def handler(request: requests.BaseRequest) -> responses.BaseHTTPResponse:
+    return responses.BaseHTTPResponse(request.server["PATH_INFO"])
+
+
+async def async_handler(request: requests.BaseRequest) -> responses.BaseHTTPResponse:
+    await asyncio.sleep(0.01 if request.server["PATH_INFO"] == "/slow" else 0)
+    return responses.StreamedResponse(iter([request.server["PATH_INFO"].encode()]))
+
+
+class NoSendfileEventLoop(asyncio.SelectorEventLoop):
+    async def sendfile(self, *args: t.Any, **kwargs: t.Any) -> int:
+        raise NotImplementedError
+
+
+class TestHTTPServer(unittest.TestCase):
+    def exchange(
+        self,
+        handle: server.Handler,
+        data: bytes,
+        new_event_loop: t.Callable[
+            [], asyncio.AbstractEventLoop
+        ] = asyncio.new_event_loop,
+        **options: t.Any
+    ) -> bytes:
+        async def run() -> bytes:
+            obj = server.HTTPServer(handle, port=0, **options)
+            await obj.start()
+            port = obj.sockets[0].getsockname()[1]
+
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(data)
+            received = await asyncio.wait_for(reader.read(), 5)
+            writer.close()
+
+            await obj.shutdown(timeout=1)
+            return received
+
+        loop = new_event_loop()
+        try:
+            return loop.run_until_complete(run())
+        finally:
+            loop.close()
+
+    def test_pipelined(self) -> None:
+        recorder = metrics.RequestMetrics()
+        received = self.exchange(
+            handler,
+            b"GET /a HTTP/1.1\r\nHost: x\r\n\r\n"
+            b"GET /b HTTP/1.1\r\nHost: x\r\nConnection: close\r\n\r\n",
+            metrics=recorder,
+        )
+
+        self.assertEqual(
+            received,
+            b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\n/a"
+            b"HTTP/1.1 200 OK\r\nConnection: close\r\nContent-Length: 2\r\n\r\n/b",
+        )
+        self.assertEqual(recorder.count(metrics.STAGE_HANDLER, "GET", 200), 2)
+        self.assertEqual(recorder.count(metrics.STAGE_WRITE, "GET", 200), 2)
+        self.assertNotIn(
+            'stage="request",method="GET",status_class="2xx"} 0.0\n', recorder.render()
+        )
+
+    def test_async_handler_order(self) -> None:
+        received = self.exchange(
+            async_handler,
+            b"GET /slow HTTP/1.1\r\nHost: x\r\n\r\nGET /fast HTTP/1.0\r\n\r\n",
+        )
+
+        self.assertLess(received.index(b"/slow"), received.index(b"/fast"))
+        self.assertTrue(received.endswith(b"/fast"))
+        self.assertIn(b"Connection: close", received)
+
+    def test_file_response(self) -> None:
+        fd, path = tempfile.mkstemp()
+        os.write(fd, b"0123456789")
+        os.close(fd)
+        self.addCleanup(os.unlink, path)
+
+        def file_handler(request: requests.BaseRequest) -> responses.BaseHTTPResponse:
+            return file_responses.FileResponse(path, headers={"Last-Modified": "x"})
+
+        for new_event_loop in (asyncio.new_event_loop, NoSendfileEventLoop):
+            received = self.exchange(
+                file_handler,
+                b"HEAD / HTTP/1.1\r\nHost: x\r\n\r\n"
+                b"GET / HTTP/1.1\r\nHost: x\r\nRange: bytes=2-4\r\n\r\n"
+                b"GET / HTTP/1.1\r\nHost: x\r\nConnection: close\r\n\r\n",
+                new_event_loop,
+            )
+
+            head, partial, full = received.split(b"HTTP/1.1 ")[1:]
+            self.assertTrue(head.startswith(b"200 ") and head.endswith(b"\r\n\r\n"))
+            self.assertTrue(
+                partial.startswith(b"206 ") and partial.endswith(b"\r\n\r\n234")
+            )
+            self.assertTrue(full.endswith(b"\r\n\r\n0123456789"))
+
+    def test_body_error(self) -> None:
+        def broken_body() -> t.Iterator[bytes]:
+            yield b"abc"
+            raise RuntimeError("broken")
+
+        def streamed(request: requests.BaseRequest) -> responses.BaseHTTPResponse:
+            return responses.StreamedResponse(broken_body())
+
+        class BrokenResponse(responses.BaseHTTPResponse):
+            def serialize(self, request: t.Any = None) -> t.List[bytes]:
+                raise RuntimeError("broken")
+
+        with self.assertLogs("asyncio", "ERROR"):
+            received = self.exchange(streamed, b"GET / HTTP/1.1\r\nHost: x\r\n\r\n")
+
+        self.assertTrue(received.endswith(b"\r\n3\r\nabc\r\n"))
+
+        with self.assertLogs("asyncio", "ERROR"):
+            received = self.exchange(
+                lambda request: BrokenResponse(), b"GET / HTTP/1.1\r\nHost: x\r\n\r\n"
+            )
+
+        self.assertTrue(received.startswith(b"HTTP/1.1 500 "))
+        self.assertIn(b"Connection: close", received)
+
+    def test_expect_continue(self) -> None:
+        async def run() -> t.Tuple[bytes, bytes]:
+            obj = server.HTTPServer(handler, port=0)
+            await obj.start()
+            port = obj.sockets[0].getsockname()[1]
+
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(
+                b"POST /upload HTTP/1.1\r\nHost: x\r\nExpect: 100-continue\r\n"
+                b"Content-Length: 3\r\nConnection: close\r\n\r\n"
+            )
+            interim = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), 5)
+            writer.write(b"abc")
+            received = await asyncio.wait_for(reader.read(), 5)
+            writer.close()
+
+            await obj.shutdown(timeout=1)
+            return interim, received
+
+        loop = asyncio.new_event_loop()
+        try:
+            interim, received = loop.run_until_complete(run())
+        finally:
+            loop.close()
+
+        self.assertEqual(interim, server.CONTINUE_RESPONSE)
+        self.assertTrue(received.startswith(b"HTTP/1.1 200 OK\r\n"))
+        self.assertTrue(received.endswith(b"/upload"))
+
+    def test_partial_request_timeout(self) -> None:
+        received = self.exchange(
+            handler,
+            b"GET / HTTP/1.1\r\nHost: x\r\n",
+            keep_alive_timeout=10,
+            read_timeout=0.05,
+        )
+
+        self.assertEqual(received, b"")
+
+    def test_bad_request(self) -> None:
+        received = self.exchange(handler, b"GET / HTTP/9.9\r\n\r\n")
+
+        self.assertTrue(received.startswith(b"HTTP/1.0 505 "))
@@ -0,0 +1,74 @@
+# Copyright (c) 2021-2021 Mediapills HttpFoundation.
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import io
+import typing as t
+import unittest
+
+from mediapills.http_foundation import wsgi
+
+
+class TestWSGIRequest(unittest.TestCase):
+    def environ(self, body: bytes = b"", **kwargs: str) -> t.Dict[str, t.Any]:
+        environ: t.Dict[str, t.Any] = {
+            "REQUEST_METHOD": "post",
+            "QUERY_STRING": "a=1&b=&a=2",
+            "HTTP_COOKIE": "session=abc; theme=dark",
+            "CONTENT_TYPE": "application/x-www-form-urlencoded; charset=utf-8",
+            "CONTENT_LENGTH": str(len(body)),
+            "wsgi.input": io.BytesIO(body),
+        }
+        environ.update(kwargs)
+
+        return environ
+
+    def test_server_by_reference(self) -> None:
+        environ = self.environ()
+        obj = wsgi.WSGIRequest(environ)
+
+        self.assertIs(obj.server, environ)
+        self.assertEqual(obj.method, "POST")
+
+    def test_lazy_parsing(self) -> None:
+        environ = self.environ(b"name=J%C3%BCrgen&x=1")
+        obj = wsgi.WSGIRequest(environ)
+
+        self.assertEqual(environ["wsgi.input"].tell(), 0)
+        self.assertEqual(obj.query, {"a": "2", "b": ""})
+        self.assertEqual(obj.cookies, {"session": "abc", "theme": "dark"})
+        self.assertEqual(obj.request, {"name": "Jürgen", "x": "1"})
+        self.assertEqual(obj.content, "name=J%C3%BCrgen&x=1")
+        self.assertIs(obj.query, obj.query)
+
+    def test_not_form_body(self) -> None:
+        obj = wsgi.WSGIRequest(
+            self.environ(b"{}", CONTENT_TYPE="application/json", CONTENT_LENGTH="x")
+        )
+
+        self.assertEqual(obj.request, {})
+        self.assertEqual(obj.content, "")
+
+    def test_spooled_payload(self) -> None:
+        obj = wsgi.WSGIRequest(self.environ(b"x=" + b"1" * 100))
+        obj.max_memory_size = 10
+
+        self.assertTrue(obj.payload.is_spooled)
+        self.assertEqual(obj.request, {"x": "1" * 100})
+        obj.payload.close()